@@ -4,6 +4,8 @@ from pathlib import Path
 import dj_database_url
 from django.core.exceptions import ImproperlyConfigured
 
+from fincore.services.line_items import FIELDS_PER_LINE, MAX_LINE_ITEMS
+
 
 def get_env(name: str, default=None, required: bool = False, cast=str):
     """Small helper to pull environment variables with optional casting."""
@@ -39,10 +41,15 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    # After WhiteNoise so static files are not counted as requests.
+    "fincore.middleware.SlowQueryMiddleware",
+    "fincore.middleware.RequestMetricsMiddleware",
+    "fincore.middleware.ReportRefreshMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "fincore.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
@@ -75,6 +82,87 @@ DATABASES = {
     )
 }
 
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # WAL lets readers keep reading while the single writer commits, and
+    # IMMEDIATE takes the write lock at BEGIN so concurrent writers queue on
+    # busy_timeout instead of failing a lock upgrade with "database is locked".
+    # Django turns foreign_keys on for every SQLite connection itself.
+    DATABASES["default"].setdefault("OPTIONS", {}).update(
+        {
+            "transaction_mode": get_env("SQLITE_TRANSACTION_MODE", "IMMEDIATE"),
+            "init_command": ";".join(
+                [
+                    f"PRAGMA journal_mode = {get_env('SQLITE_JOURNAL_MODE', 'WAL')}",
+                    f"PRAGMA synchronous = {get_env('SQLITE_SYNCHRONOUS', 'NORMAL')}",
+                    f"PRAGMA busy_timeout = {get_env('SQLITE_BUSY_TIMEOUT_MS', 5000, cast=int)}",
+                    # Negative cache_size is in KiB: -20000 is about 20 MB per connection.
+                    f"PRAGMA cache_size = {get_env('SQLITE_CACHE_SIZE', -20000, cast=int)}",
+                    f"PRAGMA mmap_size = {get_env('SQLITE_MMAP_SIZE', 134217728, cast=int)}",
+                    f"PRAGMA temp_store = {get_env('SQLITE_TEMP_STORE', 'MEMORY')}",
+                ]
+            ),
+        }
+    )
+
+# Optional read-only copy of the SQLite database for reports, refreshed with
+# `manage.py refresh_report_snapshot`. Report views read from it while it is
+# younger than FINCORE_REPORTS_MAX_STALENESS seconds; `?fresh=1` reads live data.
+FINCORE_REPORTS_SNAPSHOT = get_env("FINCORE_REPORTS_SNAPSHOT", "")
+FINCORE_REPORTS_MAX_STALENESS = get_env("FINCORE_REPORTS_MAX_STALENESS", 900, cast=int)
+
+if FINCORE_REPORTS_SNAPSHOT and DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["reports"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        # immutable: the snapshot is replaced by rename, never written in place,
+        # so readers can skip locking entirely.
+        "NAME": f"file:{FINCORE_REPORTS_SNAPSHOT}?mode=ro&immutable=1",
+        "CONN_MAX_AGE": 0,
+        "OPTIONS": {
+            "init_command": ";".join(
+                [
+                    "PRAGMA query_only = ON",
+                    f"PRAGMA cache_size = {get_env('SQLITE_CACHE_SIZE', -20000, cast=int)}",
+                    f"PRAGMA mmap_size = {get_env('SQLITE_MMAP_SIZE', 134217728, cast=int)}",
+                    f"PRAGMA temp_store = {get_env('SQLITE_TEMP_STORE', 'MEMORY')}",
+                ]
+            ),
+        },
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["fincore.db.routers.ReportsRouter"]
+
+# On PostgreSQL, COPY for import loads and the monthly-totals materialized view
+# for the P&L (fincore.db.postgres). Ignored on other databases.
+FINCORE_POSTGRES_FAST_PATHS = get_env("FINCORE_POSTGRES_FAST_PATHS", "1") not in {"0", "false", "False", ""}
+
+# Write paths wrapped in fincore.db.writes.write_transaction() queue on a file
+# lock next to the SQLite database instead of racing for the writer lock.
+# FINCORE_WRITE_LOCK_TIMEOUT is the whole budget for the lock wait and BEGIN
+# retries; plus one SQLITE_BUSY_TIMEOUT_MS it must stay below GUNICORN_TIMEOUT.
+FINCORE_WRITE_LOCK_TIMEOUT = get_env("FINCORE_WRITE_LOCK_TIMEOUT", 15, cast=float)
+FINCORE_WRITE_RETRY_ATTEMPTS = get_env("FINCORE_WRITE_RETRY_ATTEMPTS", 5, cast=int)
+
+# Per-request query/latency instrumentation (Server-Timing header + /metrics).
+FINCORE_REQUEST_METRICS = get_env("FINCORE_REQUEST_METRICS", "1") not in {"0", "false", "False", ""}
+# Log a possible N+1 when one SQL statement runs this many times in a request.
+FINCORE_DUPLICATE_QUERY_THRESHOLD = get_env("FINCORE_DUPLICATE_QUERY_THRESHOLD", 10, cast=int)
+# When set, /metrics requires "Authorization: Bearer <token>".
+FINCORE_METRICS_TOKEN = get_env("FINCORE_METRICS_TOKEN", "")
+
+# Slow-query log (admin > Slow queries). 0 disables it. Statements slower than
+# FINCORE_SLOW_QUERY_MS are sampled at FINCORE_SLOW_QUERY_SAMPLE_RATE with an
+# EXPLAIN plan; only the newest FINCORE_SLOW_QUERY_KEEP rows are kept.
+FINCORE_SLOW_QUERY_MS = get_env("FINCORE_SLOW_QUERY_MS", 0, cast=float)
+FINCORE_SLOW_QUERY_SAMPLE_RATE = get_env("FINCORE_SLOW_QUERY_SAMPLE_RATE", 1.0, cast=float)
+FINCORE_SLOW_QUERY_KEEP = get_env("FINCORE_SLOW_QUERY_KEEP", 500, cast=int)
+
+# Staff-only request profiling (admin > Request profiles): send
+# "X-Fincore-Profile: 1" or add ?_profile=1. Files go to MEDIA_ROOT/profiles/;
+# only the newest FINCORE_PROFILE_KEEP profiles are kept.
+FINCORE_PROFILING = get_env("FINCORE_PROFILING", "1") not in {"0", "false", "False", ""}
+FINCORE_PROFILE_KEEP = get_env("FINCORE_PROFILE_KEEP", 50, cast=int)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -107,6 +195,10 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Invoice and bill forms post a handful of fields per line; leave room for the
+# header fields so a form at MAX_LINE_ITEMS is not rejected with TooManyFieldsSent.
+DATA_UPLOAD_MAX_NUMBER_FIELDS = MAX_LINE_ITEMS * FIELDS_PER_LINE + 100
+
 CSRF_TRUSTED_ORIGINS = get_env("CSRF_TRUSTED_ORIGINS", "").split(",") if get_env("CSRF_TRUSTED_ORIGINS") else []
 
 LOGIN_URL = "/admin/login/"
@@ -125,3 +217,6 @@ LOGGING = {
         "level": "INFO",
     },
 }
+
+# Worker processes used to parse files in a bulk CSV upload (0 = one per CPU).
+FINCORE_IMPORT_WORKERS = get_env("FINCORE_IMPORT_WORKERS", 0, cast=int)
@@ -1,13 +1,31 @@
+import marshal
+import os
+
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.db.models import Avg, Count, Max, Min
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
 
 from .models import (
     Account,
+    CategorizationRule,
     Category,
+    DocumentSequence,
     ImportBatch,
+    ImportProfile,
     ImportRow,
+    RecurringTemplate,
+    RecurringTemplateItem,
+    RequestProfile,
+    SlowQuery,
     Transaction,
     TransferGroup,
 )
+from .profiling import top_functions
 
 
 @admin.register(Account)
@@ -49,3 +67,170 @@ class ImportRowAdmin(admin.ModelAdmin):
     list_display = ("batch", "id", "created_at")
     list_filter = ("batch",)
     search_fields = ("batch__filename",)
+
+
+@admin.register(ImportProfile)
+class ImportProfileAdmin(admin.ModelAdmin):
+    list_display = ("account", "header_fingerprint", "amount_strategy", "last_filename", "updated_at")
+    list_filter = ("account",)
+    search_fields = ("last_filename", "account__name")
+
+
+@admin.register(CategorizationRule)
+class CategorizationRuleAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "field", "match_type", "pattern", "category", "vendor", "account", "priority", "is_active")
+    list_editable = ("priority", "is_active")
+    list_filter = ("is_active", "field", "match_type", "account")
+    search_fields = ("name", "pattern")
+    autocomplete_fields = ("account", "category")
+    raw_id_fields = ("vendor",)
+
+
+class RecurringTemplateItemInline(admin.TabularInline):
+    model = RecurringTemplateItem
+    extra = 1
+    autocomplete_fields = ("category",)
+
+
+@admin.register(RecurringTemplate)
+class RecurringTemplateAdmin(admin.ModelAdmin):
+    list_display = ("name", "kind", "counterparty", "account", "frequency", "next_run_date", "end_date", "is_active")
+    list_editable = ("is_active",)
+    list_filter = ("kind", "frequency", "is_active", "account")
+    search_fields = ("name", "counterparty__name")
+    autocomplete_fields = ("account",)
+    raw_id_fields = ("counterparty",)
+    inlines = [RecurringTemplateItemInline]
+
+
+@admin.register(DocumentSequence)
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    list_display = ("name", "prefix", "padding", "next_value", "updated_at")
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "duration_ms", "view", "call_site", "database", "short_fingerprint")
+    list_filter = ("view", "database")
+    search_fields = ("sql", "call_site", "fingerprint")
+    readonly_fields = [field.name for field in SlowQuery._meta.fields]
+    change_list_template = "admin/fincore/slowquery/change_list.html"
+
+    @admin.display(description="Fingerprint", ordering="fingerprint")
+    def short_fingerprint(self, obj):
+        return obj.fingerprint[:10]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "fingerprints/",
+                self.admin_site.admin_view(self.fingerprints_view),
+                name="fincore_slowquery_fingerprints",
+            ),
+            *super().get_urls(),
+        ]
+
+    def fingerprints_view(self, request):
+        """Slow queries grouped by normalized SQL, worst total time first."""
+        groups = list(
+            SlowQuery.objects.values("fingerprint")
+            .annotate(
+                samples=Count("id"),
+                avg_ms=Avg("duration_ms"),
+                max_ms=Max("duration_ms"),
+                sample_id=Max("id"),
+                first_seen=Min("created_at"),
+                last_seen=Max("created_at"),
+            )
+            .order_by()
+        )
+        latest = SlowQuery.objects.in_bulk([group["sample_id"] for group in groups])
+        for group in groups:
+            group["total_ms"] = group["avg_ms"] * group["samples"]
+            group["latest"] = latest.get(group["sample_id"])
+        groups.sort(key=lambda group: group["total_ms"], reverse=True)
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Slow queries by fingerprint",
+            "groups": groups,
+        }
+        return TemplateResponse(request, "admin/fincore/slowquery/fingerprints.html", context)
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    DOWNLOADS = {"stats": "stats_file", "collapsed": "collapsed_file", "allocations": "allocations_file"}
+
+    list_display = ("created_at", "method", "path", "view", "status_code", "duration_ms", "peak_memory_kb", "user", "downloads")
+    list_filter = ("view", "method")
+    search_fields = ("path", "query_string", "view")
+    readonly_fields = [field.name for field in RequestProfile._meta.fields] + ["downloads", "slowest_functions"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Files")
+    def downloads(self, obj):
+        return format_html_join(
+            " | ",
+            '<a href="{}">{}</a>',
+            (
+                (reverse("admin:fincore_requestprofile_download", args=[obj.id, kind]), kind)
+                for kind, field in self.DOWNLOADS.items()
+                if getattr(obj, field)
+            ),
+        )
+
+    @admin.display(description="Slowest functions (cumulative)")
+    def slowest_functions(self, obj):
+        try:
+            with obj.stats_file.open("rb") as handle:
+                stats = marshal.load(handle)
+        except (OSError, ValueError, EOFError):
+            return "Stats file is missing or unreadable."
+        lines = [f"{'cumulative s':>12} {'self s':>9} {'calls':>8}  function"]
+        lines += [f"{ct:>12.4f} {tt:>9.4f} {nc:>8}  {label}" for label, nc, tt, ct in top_functions(stats)]
+        return format_html("<pre>{}</pre>", "\n".join(lines))
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:profile_id>/download/<str:kind>/",
+                self.admin_site.admin_view(self.download_view),
+                name="fincore_requestprofile_download",
+            ),
+            *super().get_urls(),
+        ]
+
+    def download_view(self, request, profile_id, kind):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        if kind not in self.DOWNLOADS:
+            raise Http404
+        field = getattr(get_object_or_404(RequestProfile, pk=profile_id), self.DOWNLOADS[kind])
+        if not field:
+            raise Http404
+        try:
+            handle = field.open("rb")
+        except OSError:
+            raise Http404 from None
+        return FileResponse(handle, as_attachment=True, filename=os.path.basename(field.name))
+
+    def delete_model(self, request, obj):
+        obj.delete_files()
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for profile in queryset:
+            profile.delete_files()
+        super().delete_queryset(request, queryset)
@@ -0,0 +1,206 @@
+"""
+Benchmarks for fincore's hot paths.
+
+Each case times one view or context builder against the configured database,
+usually one filled by ``generate_ledger``. Run it with ``manage.py benchmark``.
+Every case records its median and best wall time and its query count.
+Results are keyed by a scale label (10k / 100k / 1M transactions), so one
+baseline JSON covers every dataset size.
+"""
+
+import json
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from fincore.models import Account, Bill, ImportBatch, Invoice, Transaction
+from fincore.services.aging import aging_summary
+from fincore.services.bill_matching import OPEN_STATUSES as BILL_OPEN_STATUSES
+from fincore.services.invoice_matching import OPEN_STATUSES as INVOICE_OPEN_STATUSES
+from fincore.services.sales_tax import sales_tax_summary
+from fincore.views.bill_views import _build_bill_match_context
+from fincore.views.sales_views import _build_invoice_match_context
+from fincore.views.transaction_views import _balance_sheet_context, _cashflow_context, _profit_loss_context
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "baseline.json"
+IMPORT_ROWS = 2000
+IMPORT_FILENAME = "benchmark.csv"
+IMPORT_MAPPING = {"Date": "date", "Description": "description", "Amount": "amount"}
+
+
+def scale_label(transactions):
+    """Nearest of 10k / 100k / 1M on a log scale."""
+    if transactions < 31_623:
+        return "10k"
+    if transactions < 316_228:
+        return "100k"
+    return "1M"
+
+
+@dataclass
+class Result:
+    name: str
+    median_ms: float
+    min_ms: float
+    queries: int
+
+    def as_dict(self):
+        return {"median_ms": round(self.median_ms, 2), "min_ms": round(self.min_ms, 2), "queries": self.queries}
+
+
+class BenchmarkSuite:
+    def __init__(self, repeat=5, import_rows=IMPORT_ROWS, seed=0):
+        self.repeat = repeat
+        self.import_rows = import_rows
+        self.rng = random.Random(seed)
+        host = next((host for host in settings.ALLOWED_HOSTS if host and host != "*"), "localhost")
+        self.client = Client(HTTP_HOST=host.lstrip("."))
+        bounds = Transaction.objects.aggregate(first=Min("date"), last=Max("date"))
+        self.first_date, self.last_date = bounds["first"], bounds["last"]
+        self.account = Account.objects.filter(is_active=True, transactions__isnull=False).order_by("id").first()
+        self.invoice = Invoice.objects.filter(status__in=INVOICE_OPEN_STATUSES).order_by("-id").first()
+        self.bill = Bill.objects.filter(status__in=BILL_OPEN_STATUSES).order_by("-id").first()
+
+    @property
+    def report_query(self):
+        return {
+            "date_range": "custom",
+            "date_from": self.first_date.isoformat(),
+            "date_to": self.last_date.isoformat(),
+        }
+
+    def cases(self):
+        """``(name, func, setup, teardown)``; ``func`` gets setup's return value and its own goes to teardown."""
+        report = RequestFactory().get("/", self.report_query)
+        table = {"account_id": self.account.id}
+        cases = [
+            ("transaction_table", lambda _: self._get("fincore:transaction_table", table, htmx=True)),
+            ("transaction_table_search", lambda _: self._get(
+                "fincore:transaction_table", {**table, "q": "Supplier"}, htmx=True
+            )),
+            ("profit_loss_context", lambda _: _profit_loss_context(report)),
+            ("balance_sheet_context", lambda _: _balance_sheet_context(report)),
+            ("cashflow_context", lambda _: _cashflow_context(report)),
+            ("aging_summary", lambda _: aging_summary("receivables", self.last_date)),
+            ("sales_tax_summary", lambda _: sales_tax_summary(self.first_date, self.last_date, basis="cash")),
+            ("profit_loss_export_xlsx", lambda _: self._get("fincore:profit_loss_export_xlsx", self.report_query)),
+        ]
+        if self.invoice:
+            cases.append(("invoice_match_context", lambda _: _build_invoice_match_context(self.invoice)))
+        if self.bill:
+            cases.append(("bill_match_context", lambda _: _build_bill_match_context(self.bill)))
+        cases = [(name, func, None, None) for name, func in cases]
+        cases.append(("import_stage", lambda _: self._stage(), None, self._discard))
+        cases.append(("import_commit", self._commit, self._stage, self._discard))
+        return cases
+
+    def _get(self, name, query, htmx=False):
+        headers = {"HTTP_HX_REQUEST": "true"} if htmx else {}
+        response = self.client.get(reverse(name), query, **headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"{name} returned {response.status_code}")
+        return response
+
+    def _time(self, name, func, setup=None, teardown=None):
+        timings = []
+        queries = 0
+        for _ in range(self.repeat + 1):  # the first run warms caches and is discarded
+            state = setup() if setup else None
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                outcome = func(state)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = len(captured)
+            if teardown:
+                teardown(outcome)
+        timings = timings[1:]
+        return Result(name, statistics.median(timings), min(timings), queries)
+
+    # -- import ----------------------------------------------------------------
+
+    def _import_csv(self):
+        lines = ["Date,Description,Amount"]
+        for n in range(self.import_rows):
+            amount = round(self.rng.lognormvariate(4, 1), 2)
+            lines.append(f"{self.last_date.isoformat()},Benchmark {n} {self.rng.getrandbits(32):08x},-{amount:.2f}")
+        return "\n".join(lines).encode()
+
+    def _stage(self, _state=None):
+        response = self.client.post(
+            reverse("fincore:import_stage"),
+            {
+                "csv_file": SimpleUploadedFile(IMPORT_FILENAME, self._import_csv()),
+                "account_id": self.account.id,
+                "mapping": json.dumps(IMPORT_MAPPING),
+                "amount_strategy": "signed",
+            },
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"import_stage returned {response.status_code}")
+        return ImportBatch.objects.filter(filename=IMPORT_FILENAME).latest("id")
+
+    def _commit(self, batch):
+        self.client.post(reverse("fincore:import_commit", args=[batch.id]))
+        return batch
+
+    def _discard(self, batch):
+        """Remove a benchmark batch so every run sees the same data."""
+        batch.refresh_from_db()
+        view = "fincore:import_rollback" if batch.status == "imported" else "fincore:import_delete"
+        self.client.post(reverse(view, args=[batch.id]))
+
+    def run(self, only=None):
+        if self.account is None or self.last_date is None:
+            raise RuntimeError("No data to benchmark; run generate_ledger first.")
+        return [
+            self._time(name, func, setup, teardown)
+            for name, func, setup, teardown in self.cases()
+            if not only or name in only
+        ]
+
+
+def compare(results, baseline, tolerance):
+    """
+    ``(name, result, base, regressed)`` per result. A case regresses when its
+    median is more than ``tolerance`` slower or it runs more queries.
+    """
+    rows = []
+    for result in results:
+        base = baseline.get(result.name)
+        regressed = bool(
+            base
+            and (
+                result.median_ms > base["median_ms"] * (1 + tolerance)
+                or result.queries > base["queries"]
+            )
+        )
+        rows.append((result.name, result, base, regressed))
+    return rows
+
+
+def load_baseline(path):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baseline(path, scale, results, transactions):
+    path = Path(path)
+    data = load_baseline(path)
+    data[scale] = {
+        "transactions": transactions,
+        "results": {result.name: result.as_dict() for result in results},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
@@ -0,0 +1 @@
+"""Database plumbing for fincore: connection routing, SQLite helpers and PostgreSQL fast paths."""
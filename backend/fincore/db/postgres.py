@@ -0,0 +1,212 @@
+"""
+PostgreSQL fast paths.
+
+fincore sticks to portable ORM calls so the same code runs on SQLite. When
+the ``default`` database is PostgreSQL (as in ``docker/docker-compose.yml``)
+this module swaps in faster equivalents:
+
+* ``bulk_insert()`` streams rows with ``COPY ... FROM STDIN`` instead of
+  multi-row INSERTs; import staging and import commit use it.
+* Migration 0033 adds a BRIN index on ``Transaction.date`` and trigram
+  indexes for the payee/description search. ``icontains`` compiles to
+  ``UPPER(col) LIKE UPPER(%s)``, so the trigram indexes are on ``UPPER(col)``.
+* ``fincore_monthly_category_totals`` is a materialized view of reportable
+  transactions summed per month, category, kind, account and vendor. The
+  monthly P&L reads it through ``monthly_category_totals()`` instead of
+  grouping the whole ledger.
+
+Statement triggers on the transaction and import batch tables add a row to
+``fincore_ledger_change`` on every relevant write, so the view is current
+exactly when that table looks empty to the reader. ``refresh_report_views()``
+deletes the rows it can see and refreshes the view concurrently in the same
+transaction: a write that commits meanwhile leaves its row behind and keeps
+the view marked stale. A stale view is never read; the report falls back to
+the live query and a refresh is scheduled.
+
+On every other database, and with ``FINCORE_POSTGRES_FAST_PATHS=0``, each
+helper falls back to the portable code path.
+"""
+
+import io
+import json
+import logging
+import threading
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+
+logger = logging.getLogger(__name__)
+
+MONTHLY_TOTALS_VIEW = "fincore_monthly_category_totals"
+CHANGE_LOG_TABLE = "fincore_ledger_change"
+# Any constant works; it only has to be the same in every process.
+REFRESH_LOCK_KEY = 0x66696E63
+
+_refresh_guard = threading.Lock()
+_refresh_pending = False
+_refresh_thread = None
+
+
+def enabled(using=DEFAULT_DB_ALIAS):
+    return settings.FINCORE_POSTGRES_FAST_PATHS and connections[using].vendor == "postgresql"
+
+
+def _copy_text(field, obj, connection):
+    """One value in COPY text format: ``\\N`` for NULL, backslash escapes otherwise."""
+    value = field.pre_save(obj, add=True)
+    if value is None:
+        return "\\N"
+    if isinstance(field, models.JSONField):
+        text = json.dumps(value, cls=field.encoder)
+    else:
+        value = field.get_db_prep_save(value, connection)
+        if value is None:
+            return "\\N"
+        if isinstance(value, bool):
+            text = "t" if value else "f"
+        elif isinstance(value, (date, datetime, time)):
+            text = value.isoformat()
+        else:
+            text = str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def copy_rows(model, objs, using=DEFAULT_DB_ALIAS):
+    """Insert ``objs`` with one ``COPY FROM STDIN``. Primary keys are not set on the objects."""
+    connection = connections[using]
+    opts = model._meta
+    fields = [field for field in opts.concrete_fields if field is not opts.auto_field and not field.generated]
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    sql = f"COPY {connection.ops.quote_name(opts.db_table)} ({columns}) FROM STDIN"
+    buffer = io.StringIO()
+    for obj in objs:
+        buffer.write("\t".join(_copy_text(field, obj, connection) for field in fields))
+        buffer.write("\n")
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, "copy_expert"):  # psycopg2
+            raw.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def bulk_insert(model, objs, batch_size=None, using=DEFAULT_DB_ALIAS):
+    """
+    ``bulk_create`` for callers that do not need primary keys back: COPY on
+    PostgreSQL, ``bulk_create`` elsewhere. Returns the number of rows.
+    """
+    objs = list(objs)
+    if not objs:
+        return 0
+    if enabled(using):
+        copy_rows(model, objs, using=using)
+    else:
+        model.objects.using(using).bulk_create(objs, batch_size=batch_size)
+    return len(objs)
+
+
+def report_views_current(using=DEFAULT_DB_ALIAS):
+    """True when no ledger write has committed since the last refresh."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {CHANGE_LOG_TABLE})")
+        return cursor.fetchone()[0]
+
+
+def _month_aligned(start_date, end_date):
+    starts = start_date is None or start_date.day == 1
+    ends = end_date is None or (end_date + timedelta(days=1)).day == 1
+    return starts and ends
+
+
+def monthly_category_totals(
+    kinds, start_date=None, end_date=None, account_id=None, vendor_id=None, category_id=None, using=DEFAULT_DB_ALIAS
+):
+    """
+    Reportable, unmatched transactions summed per category and month, read
+    from the materialized view. Rows match the P&L's ORM grouping
+    (``category_id``, ``category__name``, ``category__kind``, ``period``,
+    ``total``). Returns None when the view cannot answer: not PostgreSQL, a
+    stale view, or a range that does not start and end on month boundaries.
+    """
+    if not enabled(using) or not _month_aligned(start_date, end_date):
+        return None
+    if not report_views_current(using):
+        schedule_refresh()
+        return None
+
+    from fincore.models import Category
+
+    conditions = ["m.kind = ANY(%s)"]
+    params = [list(kinds)]
+    for column, value in (
+        ("m.month >=", start_date),
+        ("m.month <=", end_date),
+        ("m.account_id =", account_id),
+        ("m.vendor_id =", vendor_id),
+        ("m.category_id =", category_id),
+    ):
+        if value:
+            conditions.append(f"{column} %s")
+            params.append(value)
+    sql = f"""
+        SELECT m.category_id, c.name, c.kind, m.month, SUM(m.total)
+        FROM {MONTHLY_TOTALS_VIEW} m
+        JOIN {Category._meta.db_table} c ON c.id = m.category_id
+        WHERE {" AND ".join(conditions)}
+        GROUP BY m.category_id, c.name, c.kind, m.month
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [
+        {"category_id": category, "category__name": name, "category__kind": kind, "period": month, "total": total}
+        for category, name, kind, month, total in rows
+    ]
+
+
+def refresh_report_views(using=DEFAULT_DB_ALIAS):
+    """Refresh the materialized views if the ledger changed; returns whether it refreshed."""
+    connection = connections[using]
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        # One refresher at a time; a waiting one usually finds nothing left to do.
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [REFRESH_LOCK_KEY])
+        cursor.execute(f"DELETE FROM {CHANGE_LOG_TABLE}")
+        if not cursor.rowcount:
+            return False
+        cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {MONTHLY_TOTALS_VIEW}")
+    return True
+
+
+def schedule_refresh():
+    """
+    Refresh the views in a background thread. Requests made while a refresh
+    runs are coalesced into one more run after it.
+    """
+    global _refresh_pending, _refresh_thread
+    with _refresh_guard:
+        _refresh_pending = True
+        if _refresh_thread is not None:
+            return
+        _refresh_thread = threading.Thread(target=_refresh_worker, name="fincore-report-refresh", daemon=True)
+        _refresh_thread.start()
+
+
+def _refresh_worker():
+    global _refresh_pending, _refresh_thread
+    try:
+        while True:
+            with _refresh_guard:
+                if not _refresh_pending:
+                    _refresh_thread = None
+                    return
+                _refresh_pending = False
+            try:
+                refresh_report_views()
+            except Exception:
+                # Keep the worker alive: the view stays stale and reports read live data.
+                logger.warning("Could not refresh the report views", exc_info=True)
+    finally:
+        connections.close_all()
@@ -0,0 +1,105 @@
+"""
+Read-only report snapshot.
+
+When ``FINCORE_REPORTS_SNAPSHOT`` is set, the ``reports`` database alias
+points at a copy of the SQLite database made with the online backup API.
+Views wrapped in ``report_view`` read from it while it is younger than
+``FINCORE_REPORTS_MAX_STALENESS`` seconds, so heavy report queries never hold
+read locks or page cache on the live file. A stale or missing snapshot, or
+``?fresh=1`` on the request, falls back to the live database.
+
+The copy is written to a temporary file and renamed over the old one, so a
+report already reading the old snapshot keeps its file until it finishes.
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+REPORTS_ALIAS = "reports"
+
+_active_alias = ContextVar("fincore_reports_alias", default=None)
+
+
+def active_reports_alias():
+    """The alias report reads are routed to right now, or None for the live database."""
+    return _active_alias.get()
+
+
+def snapshot_path():
+    return getattr(settings, "FINCORE_REPORTS_SNAPSHOT", "") or ""
+
+
+def snapshot_age(path=None):
+    """Seconds since the snapshot was last refreshed, or None if there is none."""
+    path = path or snapshot_path()
+    try:
+        return time.time() - os.path.getmtime(path)
+    except (OSError, TypeError):
+        return None
+
+
+def usable_snapshot_alias():
+    if REPORTS_ALIAS not in settings.DATABASES or not snapshot_path():
+        return None
+    age = snapshot_age()
+    if age is None or age > settings.FINCORE_REPORTS_MAX_STALENESS:
+        return None
+    return REPORTS_ALIAS
+
+
+def refresh_snapshot(source=None, target=None):
+    """
+    Copy the live SQLite database to ``target`` and return its size in bytes.
+
+    The backup runs as one step, which in WAL mode is a single read
+    transaction: writers keep committing while it copies.
+    """
+    source = source or str(settings.DATABASES["default"]["NAME"])
+    target = target or snapshot_path()
+    if not target:
+        raise ValueError("No snapshot path configured (FINCORE_REPORTS_SNAPSHOT).")
+    temp_path = f"{target}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    live = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    copy = sqlite3.connect(temp_path)
+    try:
+        live.backup(copy)
+        # Readers open the snapshot immutable, which needs a rollback-journal file.
+        copy.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        copy.close()
+        live.close()
+    os.replace(temp_path, target)
+    return os.path.getsize(target)
+
+
+@contextmanager
+def reports_database(fresh=False):
+    """Route report reads in this block to the snapshot when it is usable."""
+    alias = None if fresh else usable_snapshot_alias()
+    token = _active_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _active_alias.reset(token)
+
+
+def report_view(view):
+    """Serve a read-only report view from the snapshot; ``?fresh=1`` forces live data."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        fresh = (request.GET.get("fresh") or "").strip() == "1"
+        with reports_database(fresh=fresh) as alias:
+            response = view(request, *args, **kwargs)
+        response["X-Fincore-Report-Source"] = "snapshot" if alias else "live"
+        return response
+
+    return wrapper
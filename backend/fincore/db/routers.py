@@ -0,0 +1,28 @@
+from .reports import REPORTS_ALIAS, active_reports_alias
+
+
+class ReportsRouter:
+    """
+    Send reads inside ``reports_database()`` / ``report_view`` to the report
+    snapshot. Everything else, and every write, uses the default routing.
+    Only fincore models are routed, so auth and session lookups stay live.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != "fincore":
+            return None
+        return active_reports_alias()
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Snapshot rows are copies of default rows, so relations across them are fine.
+        if {obj1._state.db, obj2._state.db} <= {"default", REPORTS_ALIAS}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPORTS_ALIAS:
+            return False
+        return None
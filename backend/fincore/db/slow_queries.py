@@ -0,0 +1,158 @@
+"""
+Opt-in slow-query recorder.
+
+``capture_slow_queries()`` installs an execute wrapper on every connection.
+Statements slower than FINCORE_SLOW_QUERY_MS are sampled with their
+parameters, the fincore function that issued them and an ``EXPLAIN`` of the
+plan. Samples are held in memory and written to the ``SlowQuery`` ring
+buffer when the block exits, so the request's own transactions are never
+touched.
+"""
+
+import hashlib
+import logging
+import random
+import re
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+MAX_SQL_LENGTH = 10_000
+# Frames in these modules belong to the instrumentation, not the caller.
+_SKIP_MODULES = ("fincore.db", "fincore.middleware")
+
+_IN_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)+\s*\)")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+_capturing = ContextVar("fincore_slow_query_capturing", default=False)
+
+
+def normalize_sql(sql):
+    """Collapse literals and IN-lists so the same query shape shares a fingerprint."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(%s, ...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+def call_site():
+    """``module.function:line`` of the innermost fincore frame outside the instrumentation."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("fincore") and not module.startswith(_SKIP_MODULES):
+            return f"{module}.{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return ""
+
+
+def _json_params(params, many):
+    if many:
+        params = next(iter(params or []), [])
+    if isinstance(params, dict):
+        params = list(params.values())
+    return [value if isinstance(value, (int, float, str, bool, type(None))) else str(value) for value in params or []]
+
+
+def explain(connection, sql, params):
+    """The query plan for a SELECT, or an empty string for anything else."""
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        return ""
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        with ExitStack() as stack:
+            if connection.in_atomic_block:
+                # A failed EXPLAIN must not poison the caller's transaction.
+                stack.enter_context(transaction.atomic(using=connection.alias))
+            with connection.cursor() as cursor:
+                cursor.execute(f"{prefix} {sql}", params)
+                rows = cursor.fetchall()
+    except DatabaseError as exc:
+        return f"EXPLAIN failed: {exc}"
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+class SlowQueryRecorder:
+    def __init__(self, threshold_ms, sample_rate=1.0):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.samples = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if _capturing.get():
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= self.threshold_ms and random.random() < self.sample_rate:
+            token = _capturing.set(True)
+            try:
+                self._capture(context["connection"], sql, params, many, duration_ms)
+            finally:
+                _capturing.reset(token)
+        return result
+
+    def _capture(self, connection, sql, params, many, duration_ms):
+        normalized = normalize_sql(sql)
+        self.samples.append(
+            {
+                "fingerprint": fingerprint(normalized),
+                "normalized_sql": normalized[:MAX_SQL_LENGTH],
+                "sql": sql[:MAX_SQL_LENGTH],
+                "params": _json_params(params, many),
+                "duration_ms": round(duration_ms, 3),
+                "call_site": call_site()[:255],
+                "database": connection.alias,
+                "explain": "" if many else explain(connection, sql, params),
+            }
+        )
+
+    def flush(self, view=""):
+        """Write the samples to the ring buffer. Never raises: diagnostics must not break a request."""
+        from fincore.models import SlowQuery
+
+        if not self.samples:
+            return 0
+        samples, self.samples = self.samples, []
+        token = _capturing.set(True)
+        try:
+            SlowQuery.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+                [SlowQuery(view=view[:200], **sample) for sample in samples]
+            )
+            keep = settings.FINCORE_SLOW_QUERY_KEEP
+            oldest = list(
+                SlowQuery.objects.using(DEFAULT_DB_ALIAS).order_by("-id").values_list("id", flat=True)[keep : keep + 1]
+            )
+            if oldest:
+                SlowQuery.objects.using(DEFAULT_DB_ALIAS).filter(id__lte=oldest[0]).delete()
+        except DatabaseError:
+            logger.warning("Could not record %s slow queries", len(samples), exc_info=True)
+            return 0
+        finally:
+            _capturing.reset(token)
+        return len(samples)
+
+
+@contextmanager
+def capture_slow_queries(threshold_ms=None, sample_rate=None):
+    """Record slow statements on every connection inside the block; call ``recorder.flush()`` after."""
+    recorder = SlowQueryRecorder(
+        settings.FINCORE_SLOW_QUERY_MS if threshold_ms is None else threshold_ms,
+        settings.FINCORE_SLOW_QUERY_SAMPLE_RATE if sample_rate is None else sample_rate,
+    )
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
@@ -0,0 +1,152 @@
+"""
+Write coordination for SQLite.
+
+SQLite allows one writer at a time. Gunicorn runs several processes with
+several threads each, and under a burst (an import commit, a bulk
+recategorize and a match apply at once) the losers of the race hit
+``database is locked`` once ``busy_timeout`` runs out.
+
+``write_transaction()`` replaces ``transaction.atomic()`` for write paths:
+
+* a process-wide lock plus an advisory file lock next to the database file
+  queue writers from every worker in order, so the SQLite lock is never
+  fought over;
+* ``BEGIN IMMEDIATE`` is retried with exponential backoff and full jitter in
+  case something outside fincore (a shell, a cron job) holds the lock;
+* the lock wait and the retries share one deadline,
+  ``FINCORE_WRITE_LOCK_TIMEOUT``. After it a writer raises
+  ``WriteLockTimeout``; the last ``BEGIN`` can still wait one SQLite
+  ``busy_timeout`` on top, so keep the sum below gunicorn's ``timeout``;
+* lock waits and retries are recorded in ``fincore.metrics``.
+
+On other databases, and inside an existing atomic block, it is a plain
+``transaction.atomic()``.
+"""
+
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+from fincore import metrics
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: process-local lock only
+    fcntl = None
+
+LOCK_POLL_SECONDS = 0.005
+RETRY_BASE_DELAY = 0.05
+RETRY_MAX_DELAY = 1.0
+
+lock_wait_seconds = metrics.histogram(
+    "fincore_db_write_lock_wait_seconds", "Time spent waiting for the SQLite write lock."
+)
+write_retries = metrics.counter("fincore_db_write_retries_total", "BEGIN IMMEDIATE attempts retried on a busy database.")
+lock_timeouts = metrics.counter("fincore_db_write_lock_timeouts_total", "Writers that gave up waiting for the write lock.")
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+class WriteLockTimeout(OperationalError):
+    """The write lock could not be acquired within FINCORE_WRITE_LOCK_TIMEOUT."""
+
+
+def is_lock_error(exc):
+    message = str(exc).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def lock_path(connection):
+    """Advisory lock file for a SQLite connection, or None for in-memory databases."""
+    name = str(connection.settings_dict["NAME"])
+    if not name or name == ":memory:" or "mode=memory" in name:
+        return None
+    return f"{name}.write-lock"
+
+
+def _thread_lock(key):
+    with _thread_locks_guard:
+        lock = _thread_locks.get(key)
+        if lock is None:
+            lock = _thread_locks[key] = threading.Lock()
+    return lock
+
+
+@contextmanager
+def write_lock(connection, timeout=None):
+    """Hold the cross-process write lock for ``connection``'s database file."""
+    timeout = settings.FINCORE_WRITE_LOCK_TIMEOUT if timeout is None else timeout
+    path = lock_path(connection)
+    started = time.monotonic()
+    deadline = started + timeout
+
+    local = _thread_lock(path or connection.alias)
+    if not local.acquire(timeout=timeout):
+        lock_timeouts.inc(alias=connection.alias)
+        raise WriteLockTimeout(f"Timed out after {timeout}s waiting for the write lock.")
+    handle = None
+    try:
+        if path and fcntl is not None:
+            handle = open(path, "a+b")
+            while True:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        lock_timeouts.inc(alias=connection.alias)
+                        raise WriteLockTimeout(f"Timed out after {timeout}s waiting for the write lock.")
+                    time.sleep(LOCK_POLL_SECONDS)
+        lock_wait_seconds.observe(time.monotonic() - started, alias=connection.alias)
+        yield
+    finally:
+        if handle is not None:
+            handle.close()  # closing the file releases the flock
+        local.release()
+
+
+def _begin(using, attempts, deadline):
+    for attempt in range(1, attempts + 1):
+        block = transaction.atomic(using=using)
+        try:
+            block.__enter__()
+            return block
+        except OperationalError as exc:
+            if not is_lock_error(exc) or attempt == attempts:
+                raise
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+            if time.monotonic() + delay >= deadline:
+                lock_timeouts.inc(alias=using)
+                raise WriteLockTimeout("Gave up retrying a busy BEGIN at the write deadline.") from exc
+            write_retries.inc(alias=using)
+            time.sleep(delay)
+
+
+@contextmanager
+def write_transaction(using=None, attempts=None):
+    """``transaction.atomic()`` that waits its turn for the SQLite writer lock."""
+    using = using or DEFAULT_DB_ALIAS
+    connection = connections[using]
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    attempts = attempts or settings.FINCORE_WRITE_RETRY_ATTEMPTS
+    # One budget for waiting on the lock and for retrying BEGIN.
+    timeout = settings.FINCORE_WRITE_LOCK_TIMEOUT
+    deadline = time.monotonic() + timeout
+    with write_lock(connection, timeout=timeout):
+        block = _begin(using, attempts, deadline)
+        try:
+            yield
+        except BaseException:
+            block.__exit__(*sys.exc_info())
+            raise
+        block.__exit__(None, None, None)
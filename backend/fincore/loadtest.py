@@ -0,0 +1,358 @@
+"""
+HTTP load harness for the HTMX endpoints.
+
+Each virtual bookkeeper runs in its own thread with its own cookie session.
+It repeatedly picks a scenario and replays it against a running server,
+pausing between clicks:
+
+* ``filter``: filter churn on ``transaction_table`` (search-as-you-type,
+  kind, date range, category, paging);
+* ``report``: switching the P&L range and grouping;
+* ``import``: stage a CSV, commit it, roll it back;
+* ``match``: open an invoice's match list, apply a payment, undo it.
+
+Only the standard library is used on the client side, so the numbers reflect
+the server. Targets (account, invoice and category ids) are read from the
+database the server uses. Run it against a scratch copy, e.g. one filled by
+``generate_ledger``: matches and imports are undone, but they still write.
+"""
+
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from http.cookiejar import CookieJar
+from urllib.parse import urlencode
+
+from django.db import connection
+from django.db.models import Max, Min
+from django.urls import reverse
+
+from fincore.middleware import LOCKED_HEADER
+from fincore.models import Account, Category, Invoice, Transaction, Vendor
+from fincore.services.invoice_matching import OPEN_STATUSES
+
+DEFAULT_MIX = {"filter": 6, "report": 3, "import": 1, "match": 1}
+TABLE_KINDS = ("income", "expense", "transfer")
+TABLE_RANGES = ("all", "this_month", "last_month", "this_year")
+REPORT_RANGES = ("this_year", "last_year", "this_month", "last_month", "this_quarter", "custom")
+REPORT_DISPLAY = ("months", "quarters", "weeks", "vendor")
+IMPORT_MAPPING = {"Date": "date", "Description": "description", "Amount": "amount"}
+
+MATCH_INPUT = re.compile(r'name="match_(\d+)"')
+PAYMENT_DELETE = re.compile(r"/sales/transactions/payment/(\d+)/delete/")
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content, content_type) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n".encode()
+            + content
+            + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+@dataclass
+class Targets:
+    accounts: list
+    categories: list
+    search_terms: list
+    invoices: list
+    first_date: object
+    last_date: object
+
+    @classmethod
+    def discover(cls, sample=50):
+        bounds = Transaction.objects.aggregate(first=Min("date"), last=Max("date"))
+        targets = cls(
+            accounts=list(
+                Account.objects.filter(is_active=True, transactions__isnull=False)
+                .distinct()
+                .order_by("id")
+                .values_list("id", flat=True)[:sample]
+            ),
+            categories=list(Category.objects.order_by("id").values_list("id", flat=True)[:sample]),
+            search_terms=[name.split()[-1] for name in Vendor.objects.order_by("id").values_list("name", flat=True)[:sample]],
+            invoices=list(
+                Invoice.objects.filter(status__in=OPEN_STATUSES).order_by("-id").values_list("id", flat=True)[:sample]
+            ),
+            first_date=bounds["first"],
+            last_date=bounds["last"],
+        )
+        connection.close()  # the worker threads never touch the database
+        return targets
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.locked = Counter()
+
+    def record(self, label, seconds, status, locked=False):
+        """``status`` is None when the request never got a response (refused, timed out)."""
+        with self._lock:
+            self.timings[label].append(seconds)
+            self.statuses[label][status] += 1
+            if locked:
+                self.locked[label] += 1
+
+    def summary(self, elapsed):
+        rows = []
+        for label in sorted(self.timings):
+            ordered = sorted(self.timings[label])
+            statuses = self.statuses[label]
+            errors = sum(count for status, count in statuses.items() if status is None or status >= 500)
+            rows.append(
+                {
+                    "endpoint": label,
+                    "requests": len(ordered),
+                    "rps": len(ordered) / elapsed if elapsed else 0.0,
+                    "p50_ms": percentile(ordered, 50) * 1000,
+                    "p95_ms": percentile(ordered, 95) * 1000,
+                    "p99_ms": percentile(ordered, 99) * 1000,
+                    "max_ms": ordered[-1] * 1000,
+                    "errors": errors,
+                    "client_errors": sum(count for status, count in statuses.items() if status and 400 <= status < 500),
+                    "locked": self.locked[label],
+                }
+            )
+        return rows
+
+
+@dataclass
+class Response:
+    status: int
+    headers: object
+    body: str
+
+
+class Session:
+    """A cookie-keeping HTTP client that records every request in ``stats``."""
+
+    def __init__(self, base_url, stats, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def csrf_token(self):
+        return next((cookie.value for cookie in self.cookies if cookie.name == "csrftoken"), "")
+
+    def get(self, label, path, params=None, htmx=True):
+        if params:
+            path = f"{path}?{urlencode(params, doseq=True)}"
+        return self._send(label, urllib.request.Request(self.base_url + path), htmx)
+
+    def post(self, label, path, data=None, files=None):
+        if files:
+            body, content_type = _multipart(data or {}, files)
+        else:
+            body, content_type = urlencode(data or {}, doseq=True).encode(), "application/x-www-form-urlencoded"
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=body,
+            headers={"Content-Type": content_type, "X-CSRFToken": self.csrf_token(), "Referer": self.base_url + "/"},
+        )
+        return self._send(label, request, htmx=True)
+
+    def _send(self, label, request, htmx):
+        if htmx:
+            request.add_header("HX-Request", "true")
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=self.timeout) as reply:
+                status, headers, body = reply.status, reply.headers, reply.read()
+        except urllib.error.HTTPError as exc:
+            status, headers, body = exc.code, exc.headers, exc.read()
+        except OSError:  # refused, reset or timed out
+            self.stats.record(label, time.perf_counter() - started, None)
+            return None
+        locked = headers.get(LOCKED_HEADER) == "1" or b"database is locked" in body
+        self.stats.record(label, time.perf_counter() - started, status, locked)
+        return Response(status, headers, body.decode("utf-8", "replace"))
+
+
+class Bookkeeper:
+    """One virtual user replaying scenarios until the deadline."""
+
+    def __init__(self, loadtest, number, stats):
+        self.loadtest = loadtest
+        self.targets = loadtest.targets
+        self.rng = random.Random(loadtest.seed * 10_007 + number)
+        self.session = Session(loadtest.base_url, stats, loadtest.timeout)
+
+    def think(self, scale=1.0):
+        low, high = self.loadtest.think
+        time.sleep(self.rng.uniform(low, high) * scale)
+
+    def __call__(self, deadline):
+        time.sleep(self.rng.uniform(0, self.loadtest.think[1]))  # stagger the start
+        # A full page sets the CSRF cookie, like a browser's first visit.
+        self.session.get("transaction_list", reverse("fincore:transaction_list"), htmx=False)
+        scenarios, weights = zip(*self.loadtest.mix.items())
+        while time.monotonic() < deadline:
+            getattr(self, f"scenario_{self.rng.choices(scenarios, weights)[0]}")(deadline)
+            self.think()
+
+    def scenario_filter(self, deadline):
+        rng, targets = self.rng, self.targets
+        path = reverse("fincore:transaction_table")
+        params = {"account_id": rng.choice(targets.accounts)}
+        steps = [{}]
+        if targets.search_terms:
+            term = rng.choice(targets.search_terms)
+            steps += [{"q": term[:n]} for n in range(1, min(len(term), 5) + 1)]
+        steps += [
+            {"kind": rng.choice(TABLE_KINDS)},
+            {"date_range": rng.choice(TABLE_RANGES)},
+            {"page": 2},
+            {"q": "", "kind": "", "page": 1},
+        ]
+        if targets.categories:
+            steps.insert(-2, {"category": rng.choice(targets.categories)})
+        for step in steps:
+            if time.monotonic() >= deadline:
+                return
+            params.update(step)
+            self.session.get("transaction_table", path, {key: value for key, value in params.items() if value != ""})
+            # Typing fires on htmx's keyup delay; other filters are clicks.
+            self.think(0.3 if "q" in step else 1.0)
+
+    def scenario_report(self, deadline):
+        rng, targets = self.rng, self.targets
+        path = reverse("fincore:profit_loss_content")
+        for _ in range(rng.randint(2, 5)):
+            if time.monotonic() >= deadline:
+                return
+            params = {"date_range": rng.choice(REPORT_RANGES), "display_by": rng.choice(REPORT_DISPLAY)}
+            if params["date_range"] == "custom":
+                span = (targets.last_date - targets.first_date).days
+                start = targets.first_date + timedelta(days=rng.randint(0, span))
+                params["date_from"] = start.isoformat()
+                params["date_to"] = min(targets.last_date, start + timedelta(days=rng.randint(30, 400))).isoformat()
+            self.session.get("profit_loss_content", path, params)
+            self.think()
+
+    def _import_csv(self):
+        lines = ["Date,Description,Amount"]
+        tag = uuid.uuid4().hex[:8]
+        for n in range(self.loadtest.import_rows):
+            when = self.targets.last_date - timedelta(days=self.rng.randint(0, 60))
+            lines.append(f"{when.isoformat()},Load test {tag} {n},-{self.rng.lognormvariate(4, 1):.2f}")
+        return "\n".join(lines).encode()
+
+    def scenario_import(self, deadline):
+        response = self.session.post(
+            "import_stage",
+            reverse("fincore:import_stage"),
+            data={
+                "account_id": self.rng.choice(self.targets.accounts),
+                "mapping": json.dumps(IMPORT_MAPPING),
+                "amount_strategy": "signed",
+            },
+            files={"csv_file": ("loadtest.csv", self._import_csv(), "text/csv")},
+        )
+        trigger = response.headers.get("HX-Trigger") if response else None
+        if not trigger:
+            return
+        batch_id = json.loads(trigger)["import:staged"]["batch_id"]
+        self.think()
+        committed = self.session.post("import_commit", reverse("fincore:import_commit", args=[batch_id]))
+        self.think()
+        # Leave the ledger as it was: undo a committed batch, drop a staged one.
+        if committed and committed.status == 200:
+            self.session.post("import_rollback", reverse("fincore:import_rollback", args=[batch_id]))
+        else:
+            self.session.post("import_delete", reverse("fincore:import_delete", args=[batch_id]))
+
+    def scenario_match(self, deadline):
+        if not self.targets.invoices:
+            return
+        invoice_id = self.rng.choice(self.targets.invoices)
+        listing = self.session.get("sales_invoice_matches", reverse("fincore:sales_invoice_matches"), {"invoice_id": invoice_id})
+        candidates = MATCH_INPUT.findall(listing.body) if listing and listing.status == 200 else []
+        if not candidates:
+            return
+        # Note the payments already there and undo everything added since. When
+        # two bookkeepers match the same invoice at once, both delete both new
+        # payments (the second delete is a no-op), so none is left behind.
+        before = self._payment_ids(invoice_id)
+        if before is None:
+            return
+        self.think()
+        applied = self.session.post(
+            "sales_invoice_match_apply",
+            reverse("fincore:sales_invoice_match_apply"),
+            data={"invoice_id": invoice_id, f"match_{self.rng.choice(candidates)}": "0.01"},
+        )
+        if not applied or applied.status != 200:
+            return
+        self.think()
+        for payment_id in sorted((self._payment_ids(invoice_id) or set()) - before):
+            self.session.post(
+                "sales_invoice_payment_delete", reverse("fincore:sales_invoice_payment_delete", args=[payment_id])
+            )
+
+    def _payment_ids(self, invoice_id):
+        detail = self.session.get(
+            "sales_invoice_detail", reverse("fincore:sales_invoice_detail", args=[invoice_id]), htmx=False
+        )
+        if not detail or detail.status != 200:
+            return None
+        return {int(pk) for pk in PAYMENT_DELETE.findall(detail.body)}
+
+
+class LoadTest:
+    def __init__(self, base_url, targets, concurrency=8, duration=60, mix=None, think=(0.2, 1.0), import_rows=200,
+                 seed=0, timeout=60):
+        self.base_url = base_url
+        self.targets = targets
+        self.concurrency = concurrency
+        self.duration = duration
+        self.mix = {name: weight for name, weight in (mix or DEFAULT_MIX).items() if weight > 0}
+        self.think = think
+        self.import_rows = import_rows
+        self.seed = seed
+        self.timeout = timeout
+
+    def run(self):
+        """Run every bookkeeper until ``duration`` is up; returns ``(stats, elapsed seconds)``."""
+        if not self.targets.accounts:
+            raise RuntimeError("No accounts with transactions to load; run generate_ledger first.")
+        stats = Stats()
+        started = time.monotonic()
+        deadline = started + self.duration
+        threads = [
+            threading.Thread(target=Bookkeeper(self, number, stats), args=(deadline,), name=f"loadtest-{number}")
+            for number in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return stats, time.monotonic() - started
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fincore.models import Account
+from fincore.services.categorization import DEFAULT_CHUNK_SIZE, categorize_uncategorized, load_rule_matcher
+
+
+class Command(BaseCommand):
+    help = "Apply active categorization rules to transactions that are still uncategorized."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--account", type=int, help="Only process transactions for this account id.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Report matches without saving them.")
+
+    def handle(self, *args, **options):
+        account = None
+        if options["account"]:
+            account = Account.objects.filter(pk=options["account"]).first()
+            if account is None:
+                raise CommandError(f"Account {options['account']} does not exist.")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        started = time.monotonic()
+        matcher = load_rule_matcher(account)
+        scanned, updated = categorize_uncategorized(
+            matcher,
+            account=account,
+            chunk_size=options["chunk_size"],
+            dry_run=options["dry_run"],
+        )
+        elapsed = time.monotonic() - started
+        verb = "Would categorize" if options["dry_run"] else "Categorized"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {updated} of {scanned} uncategorized transactions "
+                f"using {matcher.rule_count} rules in {elapsed:.1f}s."
+            )
+        )
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from fincore.benchmarks import DEFAULT_BASELINE, BenchmarkSuite, compare, load_baseline, save_baseline, scale_label
+from fincore.models import Transaction
+
+
+class Command(BaseCommand):
+    help = "Time fincore's hot views against the current database and compare with a stored baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (after one warm-up).")
+        parser.add_argument("--only", nargs="+", metavar="CASE", help="Run only these cases.")
+        parser.add_argument("--scale", choices=["10k", "100k", "1M"], help="Baseline key (default from row count).")
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON file.")
+        parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+        parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%).")
+        parser.add_argument("--fail-on-regression", action="store_true", help="Exit non-zero when a case regresses.")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be >= 1.")
+        transactions = Transaction.objects.count()
+        scale = options["scale"] or scale_label(transactions)
+        baseline = load_baseline(options["baseline"]).get(scale, {}).get("results", {})
+
+        try:
+            results = BenchmarkSuite(repeat=options["repeat"]).run(only=options["only"])
+        except RuntimeError as exc:
+            raise CommandError(str(exc)) from exc
+        if not results:
+            raise CommandError("No benchmark case matched --only.")
+
+        self.stdout.write(f"{transactions} transactions, scale {scale}, {options['repeat']} runs per case")
+        self.stdout.write(f"{'case':<26}{'median ms':>11}{'min ms':>10}{'queries':>9}  vs baseline")
+        regressions = []
+        for name, result, base, regressed in compare(results, baseline, options["tolerance"]):
+            delta = "-"
+            if base:
+                change = (result.median_ms / base["median_ms"] - 1) * 100 if base["median_ms"] else 0
+                delta = f"{change:+.0f}% time, {result.queries - base['queries']:+d} queries"
+            line = f"{name:<26}{result.median_ms:>11.1f}{result.min_ms:>10.1f}{result.queries:>9}  {delta}"
+            if regressed:
+                regressions.append(name)
+                line = self.style.ERROR(line + "  REGRESSION")
+            self.stdout.write(line)
+
+        if options["save_baseline"]:
+            save_baseline(options["baseline"], scale, results, transactions)
+            self.stdout.write(self.style.SUCCESS(f"Baseline for {scale} saved to {options['baseline']}."))
+        if regressions and options["fail_on_regression"]:
+            raise CommandError(f"{len(regressions)} case(s) regressed: {', '.join(regressions)}")
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions."))
@@ -0,0 +1,49 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from fincore.models import Account
+from fincore.services.ledger_generator import DEFAULT_CHUNK_SIZE, generate_ledger
+
+
+class Command(BaseCommand):
+    help = "Generate a seeded synthetic ledger (accounts, transactions, invoices, bills) for benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--transactions", type=int, default=10_000, help="Ledger transactions to generate.")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed; the same seed gives the same data.")
+        parser.add_argument("--years", type=int, default=3, help="Years of history ending at --end.")
+        parser.add_argument("--end", help="Last transaction date (YYYY-MM-DD, default today).")
+        parser.add_argument("--invoices", type=int, help="Invoices to generate (default transactions / 40).")
+        parser.add_argument("--bills", type=int, help="Bills to generate (default transactions / 50).")
+        parser.add_argument("--vendors", type=int, help="Vendors to generate (default transactions / 200, 20-2000).")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per write transaction.")
+
+    def handle(self, *args, **options):
+        end = date.today()
+        if options["end"]:
+            end = parse_date(options["end"])
+            if end is None:
+                raise CommandError("--end must be a date in YYYY-MM-DD format.")
+        if options["transactions"] < 0 or options["chunk_size"] < 1 or options["years"] < 1:
+            raise CommandError("--transactions must be >= 0, --chunk-size and --years >= 1.")
+        if Account.objects.filter(name__startswith=f"S{options['seed']} ").exists():
+            raise CommandError(f"A ledger for seed {options['seed']} already exists; use another --seed.")
+
+        started = time.monotonic()
+        counts = generate_ledger(
+            transactions=options["transactions"],
+            seed=options["seed"],
+            years=options["years"],
+            end=end,
+            invoices=options["invoices"],
+            bills=options["bills"],
+            vendors=options["vendors"],
+            chunk_size=options["chunk_size"],
+        )
+        elapsed = time.monotonic() - started
+        for table, count in sorted(counts.items()):
+            self.stdout.write(f"  {table}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Ledger for seed {options['seed']} generated in {elapsed:.1f}s."))
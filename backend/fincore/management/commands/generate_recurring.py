@@ -0,0 +1,50 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from fincore.services.recurring import DEFAULT_CHUNK_SIZE, generate_recurring
+
+
+class Command(BaseCommand):
+    help = "Generate invoices and bills from recurring templates due on or before a date."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Run date (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--kind", choices=["invoice", "bill"], help="Only generate this document kind.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Templates per transaction.")
+        parser.add_argument("--dry-run", action="store_true", help="List due periods without creating documents.")
+
+    def handle(self, *args, **options):
+        run_date = date.today()
+        if options["date"]:
+            run_date = parse_date(options["date"])
+            if run_date is None:
+                raise CommandError("--date must be YYYY-MM-DD.")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        started = time.monotonic()
+        result = generate_recurring(
+            run_date, kind=options["kind"], chunk_size=options["chunk_size"], dry_run=options["dry_run"]
+        )
+        elapsed = time.monotonic() - started
+
+        if options["dry_run"]:
+            for template, period in result.periods:
+                self.stdout.write(f"{period} {template.kind} {template.name} ({template.counterparty.name})")
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Would generate {len(result.periods)} documents from {result.templates} due templates in {elapsed:.1f}s."
+                )
+            )
+            return
+
+        note = f" {result.skipped} periods already had a document." if result.skipped else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {result.invoices} invoices and {result.bills} bills from {result.templates} due templates "
+                f"in {elapsed:.1f}s.{note}"
+            )
+        )
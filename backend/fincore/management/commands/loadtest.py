@@ -0,0 +1,167 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from fincore.loadtest import DEFAULT_MIX, LoadTest, Targets
+
+SERVER_START_TIMEOUT = 30
+
+
+def _parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise CommandError(f"Unknown scenario {name.strip()!r}; choose from {', '.join(DEFAULT_MIX)}.")
+        try:
+            mix[name.strip()] = float(weight)
+        except ValueError:
+            raise CommandError(f"Scenario weight for {name.strip()!r} must be a number.") from None
+    return mix
+
+
+class Command(BaseCommand):
+    help = "Replay concurrent bookkeeper scenarios against a running server and report latency per endpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server to load (ignored with --start-server).")
+        parser.add_argument(
+            "--start-server", action="store_true", help="Start gunicorn with gunicorn.conf.py for the run, then stop it."
+        )
+        parser.add_argument("--port", type=int, default=8765, help="Port for --start-server.")
+        parser.add_argument("--workers", type=int, default=2, help="Gunicorn workers for --start-server.")
+        parser.add_argument("--threads", type=int, default=4, help="Gunicorn threads per worker for --start-server.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Simultaneous virtual bookkeepers.")
+        parser.add_argument("--duration", type=float, default=60, help="Seconds to run.")
+        parser.add_argument(
+            "--mix",
+            default=",".join(f"{name}={weight}" for name, weight in DEFAULT_MIX.items()),
+            help="Scenario weights, e.g. filter=6,report=3,import=1,match=1.",
+        )
+        parser.add_argument("--think", default="0.2,1.0", help="Pause between clicks in seconds, as MIN,MAX.")
+        parser.add_argument("--import-rows", type=int, default=200, help="Rows per staged CSV in the import scenario.")
+        parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for the scenario choices.")
+        parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        try:
+            think = tuple(float(value) for value in options["think"].split(","))
+        except ValueError:
+            think = ()
+        if len(think) != 2 or not 0 <= think[0] <= think[1]:
+            raise CommandError("--think must be MIN,MAX seconds with MIN <= MAX.")
+        if options["concurrency"] < 1 or options["duration"] <= 0:
+            raise CommandError("--concurrency must be >= 1 and --duration > 0.")
+
+        targets = Targets.discover()
+        with self._server(options) as base_url:
+            loadtest = LoadTest(
+                base_url,
+                targets,
+                concurrency=options["concurrency"],
+                duration=options["duration"],
+                mix=_parse_mix(options["mix"]),
+                think=think,
+                import_rows=options["import_rows"],
+                seed=options["seed"],
+                timeout=options["timeout"],
+            )
+            self.stdout.write(
+                f"{options['concurrency']} bookkeepers for {options['duration']:g}s against {base_url} "
+                f"({connection.vendor})"
+            )
+            try:
+                stats, elapsed = loadtest.run()
+            except RuntimeError as exc:
+                raise CommandError(str(exc)) from exc
+
+        rows = stats.summary(elapsed)
+        self._report(rows, elapsed)
+        if options["json_path"]:
+            payload = {
+                "url": base_url,
+                "database": connection.vendor,
+                "concurrency": options["concurrency"],
+                "workers": options["workers"] if options["start_server"] else None,
+                "threads": options["threads"] if options["start_server"] else None,
+                "elapsed": round(elapsed, 2),
+                "endpoints": rows,
+            }
+            with open(options["json_path"], "w") as handle:
+                json.dump(payload, handle, indent=2)
+                handle.write("\n")
+
+    def _report(self, rows, elapsed):
+        self.stdout.write(
+            f"{'endpoint':<30}{'reqs':>7}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'max ms':>9}{'5xx':>6}{'4xx':>6}{'locked':>8}"
+        )
+        for row in rows:
+            line = (
+                f"{row['endpoint']:<30}{row['requests']:>7}{row['rps']:>8.1f}{row['p50_ms']:>9.0f}"
+                f"{row['p95_ms']:>9.0f}{row['p99_ms']:>9.0f}{row['max_ms']:>9.0f}"
+                f"{row['errors']:>6}{row['client_errors']:>6}{row['locked']:>8}"
+            )
+            self.stdout.write(self.style.ERROR(line) if row["errors"] else line)
+        requests = sum(row["requests"] for row in rows)
+        errors = sum(row["errors"] for row in rows)
+        locked = sum(row["locked"] for row in rows)
+        summary = (
+            f"{requests} requests in {elapsed:.1f}s ({requests / elapsed:.1f}/s), "
+            f"{errors} errors ({errors / requests:.1%}), {locked} 'database is locked'"
+            if requests
+            else "No requests completed."
+        )
+        self.stdout.write(self.style.SUCCESS(summary) if requests and not errors else self.style.WARNING(summary))
+
+    @contextmanager
+    def _server(self, options):
+        if not options["start_server"]:
+            yield options["url"].rstrip("/")
+            return
+        if find_spec("gunicorn") is None:
+            raise CommandError("gunicorn is not installed (requirements/prod.txt); start a server and pass --url instead.")
+        env = {
+            **os.environ,
+            "WEB_CONCURRENCY": str(options["workers"]),
+            "GUNICORN_THREADS": str(options["threads"]),
+        }
+        command = [
+            sys.executable, "-m", "gunicorn", "config.wsgi:application",
+            "--config", "gunicorn.conf.py", "--bind", f"127.0.0.1:{options['port']}",
+            "--access-logfile", "/dev/null",
+        ]
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+        base_url = f"http://127.0.0.1:{options['port']}"
+        try:
+            self._wait_for(base_url, server)
+            self.stdout.write(f"gunicorn: {options['workers']} workers x {options['threads']} threads")
+            yield base_url
+        finally:
+            server.terminate()
+            server.wait(timeout=SERVER_START_TIMEOUT)
+
+    def _wait_for(self, base_url, server):
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"gunicorn exited with status {server.returncode}.")
+            try:
+                urllib.request.urlopen(base_url + "/", timeout=2).close()
+                return
+            except urllib.error.HTTPError:
+                return  # any HTTP answer means it is serving
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"gunicorn did not answer on {base_url} within {SERVER_START_TIMEOUT}s.")
@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fincore.models import Account
+from fincore.services.transfer_pairing import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_WINDOW_DAYS,
+    create_transfer_groups,
+    load_candidates,
+    propose_transfer_pairs,
+)
+
+
+class Command(BaseCommand):
+    help = "Pair unpaired transactions into transfers across accounts (equal and opposite amounts)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--account",
+            type=int,
+            action="append",
+            help="Only consider these account ids (repeat for several). Both sides must be in the set.",
+        )
+        parser.add_argument("--window-days", type=int, default=DEFAULT_WINDOW_DAYS)
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="List proposed pairs without saving them.")
+        parser.add_argument("--preview", type=int, default=20, help="Pairs to print in a dry run.")
+
+    def handle(self, *args, **options):
+        account_ids = options["account"] or []
+        if account_ids:
+            missing = set(account_ids) - set(Account.objects.filter(pk__in=account_ids).values_list("id", flat=True))
+            if missing:
+                raise CommandError(f"Account(s) {', '.join(map(str, sorted(missing)))} do not exist.")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive.")
+        if options["window_days"] < 0:
+            raise CommandError("--window-days cannot be negative.")
+
+        started = time.monotonic()
+        candidates = load_candidates(account_ids)
+        pairs = propose_transfer_pairs(candidates, window_days=options["window_days"])
+
+        if options["dry_run"]:
+            names = dict(Account.objects.values_list("id", "name"))
+            for pair in pairs[: options["preview"]]:
+                self.stdout.write(
+                    f"{pair.outflow.date} {names.get(pair.outflow.account_id)} #{pair.outflow.id} -> "
+                    f"{pair.inflow.date} {names.get(pair.inflow.account_id)} #{pair.inflow.id} "
+                    f"{abs(pair.outflow.cents) / 100:.2f} ({pair.days_apart}d apart)"
+                )
+            if len(pairs) > options["preview"]:
+                self.stdout.write(f"... {len(pairs) - options['preview']} more")
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Would pair {len(pairs)} transfers from {len(candidates)} unpaired transactions in {elapsed:.1f}s."
+                )
+            )
+            return
+
+        paired, skipped = create_transfer_groups(pairs, chunk_size=options["chunk_size"])
+        elapsed = time.monotonic() - started
+        note = f" {skipped} skipped because they changed during the run." if skipped else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Paired {paired} transfers from {len(candidates)} unpaired transactions in {elapsed:.1f}s.{note}"
+            )
+        )
@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from fincore.db.reports import refresh_snapshot, snapshot_age, snapshot_path
+
+
+class Command(BaseCommand):
+    help = "Copy the live SQLite database to the read-only report snapshot (FINCORE_REPORTS_SNAPSHOT)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", help="Write the snapshot here instead of FINCORE_REPORTS_SNAPSHOT.")
+        parser.add_argument(
+            "--if-older-than",
+            type=int,
+            default=0,
+            help="Skip the refresh when the snapshot is younger than this many seconds.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("refresh_report_snapshot only applies to SQLite databases.")
+        target = options["target"] or snapshot_path()
+        if not target:
+            raise CommandError("Set FINCORE_REPORTS_SNAPSHOT or pass --target.")
+
+        age = snapshot_age(target)
+        if options["if_older_than"] and age is not None and age < options["if_older_than"]:
+            self.stdout.write(f"Snapshot is {age:.0f}s old; nothing to do.")
+            return
+
+        started = time.monotonic()
+        size = refresh_snapshot(source=str(settings.DATABASES["default"]["NAME"]), target=target)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"Snapshot written to {target} ({size / 1024 / 1024:.1f} MB) in {elapsed:.1f}s.")
+        )
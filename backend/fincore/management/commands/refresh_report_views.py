@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from fincore.db.postgres import refresh_report_views, report_views_current
+
+
+class Command(BaseCommand):
+    help = "Refresh the PostgreSQL report materialized views (concurrently) if the ledger changed."
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("refresh_report_views only applies to PostgreSQL databases.")
+        if report_views_current():
+            self.stdout.write("Report views are current; nothing to do.")
+            return
+
+        started = time.monotonic()
+        refreshed = refresh_report_views()
+        elapsed = time.monotonic() - started
+        if refreshed:
+            self.stdout.write(self.style.SUCCESS(f"Report views refreshed in {elapsed:.1f}s."))
+        else:
+            self.stdout.write("Another process refreshed the report views first.")
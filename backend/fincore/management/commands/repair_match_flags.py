@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction as db_transaction
+from django.db.models import Exists, F, OuterRef, Q
+
+from fincore.models import BillPayment, InvoicePayment, Transaction
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = "Recompute Transaction.is_invoice_matched / is_bill_matched from the payment tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Count drifted rows without fixing them.")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        has_invoice = Exists(InvoicePayment.objects.filter(transaction=OuterRef("pk")))
+        has_bill = Exists(BillPayment.objects.filter(transaction=OuterRef("pk")))
+        drifted = (
+            Transaction.objects.annotate(has_invoice=has_invoice, has_bill=has_bill)
+            .filter(~Q(is_invoice_matched=F("has_invoice")) | ~Q(is_bill_matched=F("has_bill")))
+        )
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"{drifted.count()} transactions have stale match flags."))
+            return
+
+        fixed = 0
+        last_id = 0
+        while True:
+            ids = list(drifted.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:chunk_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            with db_transaction.atomic():
+                fixed += Transaction.objects.filter(id__in=ids).refresh_match_flags()
+        self.stdout.write(self.style.SUCCESS(f"Repaired match flags on {fixed} transactions."))
@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = "Refresh SQLite planner statistics, reclaim free pages and checkpoint the WAL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--analyze", action="store_true", help="Run a full ANALYZE instead of PRAGMA optimize.")
+        parser.add_argument(
+            "--vacuum-pages",
+            type=int,
+            default=0,
+            help="Free pages to reclaim with incremental_vacuum (0 = all). Needs auto_vacuum=INCREMENTAL.",
+        )
+        parser.add_argument(
+            "--enable-incremental-vacuum",
+            action="store_true",
+            help="Switch the database to auto_vacuum=INCREMENTAL. Runs a full VACUUM once, which blocks writers.",
+        )
+
+    def _pragma(self, cursor, statement):
+        cursor.execute(f"PRAGMA {statement}")
+        return cursor.fetchone()
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("sqlite_maintenance only applies to SQLite databases.")
+        if options["vacuum_pages"] < 0:
+            raise CommandError("--vacuum-pages cannot be negative.")
+
+        started = time.monotonic()
+        with connection.cursor() as cursor:
+            free_before = self._pragma(cursor, "freelist_count")[0]
+
+            if options["enable_incremental_vacuum"]:
+                self._pragma(cursor, "auto_vacuum = INCREMENTAL")
+                cursor.execute("VACUUM")
+                self.stdout.write("auto_vacuum set to INCREMENTAL (full VACUUM done).")
+
+            if options["analyze"]:
+                cursor.execute("ANALYZE")
+                self.stdout.write("ANALYZE done.")
+            else:
+                cursor.execute("PRAGMA optimize")
+                self.stdout.write("PRAGMA optimize done.")
+
+            # 0 = NONE, 1 = FULL, 2 = INCREMENTAL
+            if self._pragma(cursor, "auto_vacuum")[0] == 2:
+                pages = options["vacuum_pages"]
+                cursor.execute(f"PRAGMA incremental_vacuum({pages})" if pages else "PRAGMA incremental_vacuum")
+                cursor.fetchall()
+            elif free_before:
+                self.stdout.write(
+                    f"{free_before} free pages not reclaimed: auto_vacuum is not INCREMENTAL "
+                    "(see --enable-incremental-vacuum)."
+                )
+            free_after = self._pragma(cursor, "freelist_count")[0]
+
+            checkpoint = None
+            if self._pragma(cursor, "journal_mode")[0] == "wal":
+                checkpoint = self._pragma(cursor, "wal_checkpoint(TRUNCATE)")
+
+        elapsed = time.monotonic() - started
+        note = ""
+        if checkpoint is not None:
+            busy, log_frames, _ = checkpoint
+            note = " WAL checkpoint was blocked by a reader; retry later." if busy else f" WAL checkpointed ({log_frames} frames)."
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Maintenance finished in {elapsed:.1f}s. Free pages {free_before} -> {free_after}.{note}"
+            )
+        )
@@ -0,0 +1,138 @@
+"""
+In-process metrics registry.
+
+Counters and histograms are kept per worker process and are cheap enough to
+update on every request. Each metric can carry labels passed as keyword
+arguments to ``inc`` / ``observe``. ``render_text()`` produces the Prometheus
+text exposition format served on ``/metrics``.
+"""
+
+import threading
+from bisect import bisect_left
+
+# Seconds; covers a fast query up to a slow import chunk.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_registry = {}
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self.values.get(_label_key(labels), 0)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with _lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def series(self, **labels):
+        return self.values.get(_label_key(labels))
+
+
+def _get_or_create(cls, name, help_text, **kwargs):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help_text, **kwargs)
+    if not isinstance(metric, cls):
+        raise ValueError(f"Metric {name} is already registered as a {metric.kind}.")
+    return metric
+
+
+def counter(name, help_text=""):
+    return _get_or_create(Counter, name, help_text)
+
+
+def histogram(name, help_text="", buckets=DEFAULT_BUCKETS):
+    return _get_or_create(Histogram, name, help_text, buckets=buckets)
+
+
+def all_metrics():
+    with _lock:
+        return sorted(_registry.values(), key=lambda metric: metric.name)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    pairs = [*key, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_number(value):
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+def _copy_values(metric):
+    with _lock:
+        if metric.kind == "histogram":
+            return {key: {**series, "counts": list(series["counts"])} for key, series in metric.values.items()}
+        return dict(metric.values)
+
+
+def render_text():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in all_metrics():
+        values = _copy_values(metric)
+        if metric.help:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for key in sorted(values):
+            series = values[key]
+            if metric.kind == "counter":
+                lines.append(f"{metric.name}{_format_labels(key)} {_format_number(series)}")
+                continue
+            cumulative = 0
+            bounds = [_format_number(float(bound)) for bound in metric.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, series["counts"]):
+                cumulative += count
+                lines.append(f"{metric.name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+            lines.append(f"{metric.name}_sum{_format_labels(key)} {_format_number(series['sum'])}")
+            lines.append(f"{metric.name}_count{_format_labels(key)} {series['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Clear recorded values (tests); registered metrics are kept."""
+    with _lock:
+        for metric in _registry.values():
+            metric.values.clear()
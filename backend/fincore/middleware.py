@@ -0,0 +1,221 @@
+"""
+Per-request instrumentation.
+
+``RequestMetricsMiddleware`` times every request and, per view, records the
+number of SQL queries, time spent in SQL, repeated statements (the usual
+sign of an N+1 loop), template render time and response size. The numbers
+are sent back in a ``Server-Timing`` header, so they show up in the browser's
+network panel for HTMX partials too. They are also aggregated into
+histograms for ``/metrics``. Requests that fail with ``database is locked``
+are counted separately, and their 500 responses carry
+``X-Fincore-Db-Locked: 1`` so a load test can tell them apart from other
+errors.
+
+Set ``FINCORE_REQUEST_METRICS=0`` to remove the middleware entirely.
+
+``SlowQueryMiddleware`` is opt-in (``FINCORE_SLOW_QUERY_MS``) and records
+slow statements with their plans; see ``fincore.db.slow_queries``.
+
+``ProfilingMiddleware`` profiles a single request when a staff user asks for
+it; see ``fincore.profiling``.
+
+``ReportRefreshMiddleware`` is only active on PostgreSQL: after a request that
+may have written, it schedules a refresh of the report materialized views;
+see ``fincore.db.postgres``.
+"""
+
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import OperationalError, connections
+from django.template.backends.django import Template as DjangoTemplate
+
+from fincore import metrics, profiling
+from fincore.db import postgres
+from fincore.db.slow_queries import capture_slow_queries
+from fincore.db.writes import WriteLockTimeout, is_lock_error
+
+logger = logging.getLogger(__name__)
+
+LOCKED_HEADER = "X-Fincore-Db-Locked"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS", "TRACE"}
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SIZE_BUCKETS = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+request_seconds = metrics.histogram("fincore_request_duration_seconds", "Request latency by view.")
+sql_seconds = metrics.histogram("fincore_request_sql_seconds", "Time spent in SQL per request, by view.")
+template_seconds = metrics.histogram("fincore_request_template_seconds", "Template render time per request, by view.")
+query_count = metrics.histogram("fincore_request_queries", "SQL queries per request, by view.", buckets=COUNT_BUCKETS)
+response_bytes = metrics.histogram("fincore_response_size_bytes", "Response body size, by view.", buckets=SIZE_BUCKETS)
+requests_total = metrics.counter("fincore_requests_total", "Requests by view and status code.")
+duplicate_queries = metrics.counter(
+    "fincore_request_duplicate_queries_total", "Queries that repeated an earlier statement in the same request."
+)
+locked_errors = metrics.counter("fincore_request_db_locked_total", "Requests that failed on a locked database, by view.")
+
+_current = ContextVar("fincore_request_stats", default=None)
+
+
+class RequestStats:
+    __slots__ = ("queries", "sql_time", "template_time", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        return self.queries - len(self.statements)
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return render(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            stats.template_time += time.perf_counter() - started
+
+    wrapper.fincore_timed = True
+    return wrapper
+
+
+def _instrument_templates():
+    # Only top-level renders go through the backend Template; {% include %}
+    # renders happen inside them, so nothing is counted twice.
+    if not getattr(DjangoTemplate.render, "fincore_timed", False):
+        DjangoTemplate.render = _timed_render(DjangoTemplate.render)
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or match._func_path
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        if not settings.FINCORE_REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.duplicate_threshold = settings.FINCORE_DUPLICATE_QUERY_THRESHOLD
+        _instrument_templates()
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        elapsed = time.perf_counter() - started
+
+        view = _view_name(request)
+        size = None if response.streaming else len(response.content)
+        request_seconds.observe(elapsed, view=view)
+        sql_seconds.observe(stats.sql_time, view=view)
+        template_seconds.observe(stats.template_time, view=view)
+        query_count.observe(stats.queries, view=view)
+        requests_total.inc(view=view, status=response.status_code)
+        if size is not None:
+            response_bytes.observe(size, view=view)
+        if getattr(request, "_fincore_db_locked", False):
+            locked_errors.inc(view=view)
+            response[LOCKED_HEADER] = "1"
+        if stats.duplicates:
+            duplicate_queries.inc(stats.duplicates, view=view)
+            statement, repeats = stats.statements.most_common(1)[0]
+            if repeats >= self.duplicate_threshold:
+                logger.warning("Possible N+1 in %s: statement ran %s times: %s", view, repeats, statement[:200])
+
+        timings = [
+            f"app;dur={elapsed * 1000:.1f}",
+            f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.queries} queries, {stats.duplicates} repeated"',
+            f"tpl;dur={stats.template_time * 1000:.1f}",
+        ]
+        if response.has_header("Server-Timing"):
+            timings.insert(0, response["Server-Timing"])
+        response["Server-Timing"] = ", ".join(timings)
+        return response
+
+    def process_exception(self, request, exception):
+        # The 500 response is built further in, so note the cause for __call__.
+        if isinstance(exception, WriteLockTimeout) or (
+            isinstance(exception, OperationalError) and is_lock_error(exception)
+        ):
+            request._fincore_db_locked = True
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        if not settings.FINCORE_SLOW_QUERY_MS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with capture_slow_queries() as recorder:
+            response = self.get_response(request)
+        recorder.flush(view=_view_name(request))
+        return response
+
+
+class ReportRefreshMiddleware:
+    def __init__(self, get_response):
+        if not postgres.enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # The refresh is a no-op when nothing in the ledger changed.
+        if request.method not in SAFE_METHODS and response.status_code < 500:
+            postgres.schedule_refresh()
+        return response
+
+
+class ProfilingMiddleware:
+    """Must come after AuthenticationMiddleware: only staff may trigger a profile."""
+
+    def __init__(self, get_response):
+        if not settings.FINCORE_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.requested(request) or not request.user.is_staff:
+            return self.get_response(request)
+        profiling.strip_flag(request)
+        with profiling.profiling_slot() as acquired:
+            if not acquired:
+                response = self.get_response(request)
+                response[profiling.PROFILE_HEADER] = "busy"
+                return response
+            response, capture = profiling.run_profiled(self.get_response, request)
+            profile = profiling.save_profile(request, response, capture, view=_view_name(request))
+        if profile is not None:
+            response[profiling.PROFILE_HEADER] = str(profile.id)
+        return response
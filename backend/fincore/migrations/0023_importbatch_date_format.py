@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fincore", "0022_account_parent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importbatch",
+            name="date_format",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="strptime format inferred for the date column when the batch was staged.",
+                max_length=20,
+            ),
+        ),
+    ]
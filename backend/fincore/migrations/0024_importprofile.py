@@ -0,0 +1,33 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fincore", "0023_importbatch_date_format"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportProfile",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("header_fingerprint", models.CharField(db_index=True, max_length=40)),
+                ("headers", models.JSONField(blank=True, default=list)),
+                ("mapping", models.JSONField(default=dict)),
+                ("amount_strategy", models.CharField(choices=[("signed", "Signed Amount"), ("indicator", "Amount + Indicator"), ("split_columns", "Debit / Credit Columns")], default="signed", max_length=15)),
+                ("indicator_credit_value", models.CharField(blank=True, default="", max_length=100)),
+                ("indicator_debit_value", models.CharField(blank=True, default="", max_length=100)),
+                ("date_format", models.CharField(blank=True, default="", max_length=20)),
+                ("last_filename", models.CharField(blank=True, default="", max_length=255)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("account", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="import_profiles", to="fincore.account")),
+            ],
+            options={
+                "ordering": ["-updated_at"],
+                "constraints": [models.UniqueConstraint(fields=("account", "header_fingerprint"), name="uniq_importprofile_account_fingerprint")],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fincore", "0024_importprofile"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CategorizationRule",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(blank=True, max_length=100)),
+                ("field", models.CharField(choices=[("description", "Description"), ("payee", "Payee")], default="description", max_length=12)),
+                ("match_type", models.CharField(choices=[("contains", "Contains"), ("startswith", "Starts with"), ("regex", "Regular expression")], default="contains", max_length=10)),
+                ("pattern", models.CharField(max_length=255)),
+                ("amount_min", models.DecimalField(blank=True, decimal_places=2, help_text="Inclusive lower bound on the signed amount (expenses are negative).", max_digits=12, null=True)),
+                ("amount_max", models.DecimalField(blank=True, decimal_places=2, help_text="Inclusive upper bound on the signed amount.", max_digits=12, null=True)),
+                ("priority", models.PositiveIntegerField(default=100, help_text="Lower numbers win when several rules match.")),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("account", models.ForeignKey(blank=True, help_text="Limit the rule to one account; empty applies to all accounts.", null=True, on_delete=django.db.models.deletion.CASCADE, related_name="categorization_rules", to="fincore.account")),
+                ("category", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="categorization_rules", to="fincore.category")),
+                ("vendor", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name="categorization_rules", to="fincore.vendor")),
+            ],
+            options={
+                "ordering": ["priority", "id"],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fincore", "0025_categorizationrule"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importbatch",
+            name="committed_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importbatch",
+            name="committed_through_row",
+            field=models.BigIntegerField(default=0, help_text="Checkpoint: id of the last ImportRow whose transaction has been written."),
+        ),
+        migrations.AlterField(
+            model_name="importbatch",
+            name="status",
+            field=models.CharField(choices=[("pending", "Pending"), ("validated", "Validated"), ("committing", "Committing"), ("imported", "Imported"), ("rolling_back", "Rolling back"), ("failed", "Failed")], default="pending", max_length=15),
+        ),
+    ]
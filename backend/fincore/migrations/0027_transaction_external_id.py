@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fincore", "0026_importbatch_commit_checkpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="external_id",
+            field=models.CharField(blank=True, default="", help_text="Bank-assigned transaction id (OFX FITID, CAMT.053 AcctSvcrRef); unique per account when set.", max_length=255),
+        ),
+        migrations.AddConstraint(
+            model_name="transaction",
+            constraint=models.UniqueConstraint(condition=models.Q(("external_id", ""), _negated=True), fields=("account", "external_id"), name="uniq_transaction_account_external_id"),
+        ),
+    ]
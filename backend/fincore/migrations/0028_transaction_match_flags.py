@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+def backfill_match_flags(apps, schema_editor):
+    Transaction = apps.get_model("fincore", "Transaction")
+    InvoicePayment = apps.get_model("fincore", "InvoicePayment")
+    BillPayment = apps.get_model("fincore", "BillPayment")
+    Transaction.objects.filter(
+        id__in=InvoicePayment.objects.values("transaction_id")
+    ).update(is_invoice_matched=True)
+    Transaction.objects.filter(
+        id__in=BillPayment.objects.values("transaction_id")
+    ).update(is_bill_matched=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fincore", "0027_transaction_external_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="is_bill_matched",
+            field=models.BooleanField(db_index=True, default=False, help_text="Denormalized: at least one BillPayment references this row."),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="is_invoice_matched",
+            field=models.BooleanField(db_index=True, default=False, help_text="Denormalized: at least one InvoicePayment references this row."),
+        ),
+        migrations.RunPython(backfill_match_flags, migrations.RunPython.noop),
+    ]
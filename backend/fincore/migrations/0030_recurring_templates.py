@@ -0,0 +1,103 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fincore", "0029_aging_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentSequence",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=32, unique=True)),
+                ("prefix", models.CharField(blank=True, max_length=16)),
+                ("padding", models.PositiveSmallIntegerField(default=6)),
+                ("next_value", models.PositiveBigIntegerField(default=1)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["name"],
+            },
+        ),
+        migrations.CreateModel(
+            name="RecurringTemplateItem",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("description", models.CharField(blank=True, max_length=255)),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("tax_exempt", models.BooleanField(default=False)),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="bill",
+            name="recurring_period",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="recurring_period",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="RecurringTemplate",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=120)),
+                ("kind", models.CharField(choices=[("invoice", "Invoice"), ("bill", "Bill")], max_length=10)),
+                ("frequency", models.CharField(choices=[("monthly", "Monthly"), ("quarterly", "Quarterly"), ("yearly", "Yearly")], default="monthly", max_length=10)),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField(blank=True, null=True)),
+                ("next_run_date", models.DateField(blank=True)),
+                ("due_days", models.PositiveSmallIntegerField(default=30, help_text="Invoices only: due date is the period date plus this many days.")),
+                ("tax_rate", models.DecimalField(decimal_places=2, default=0, max_digits=6)),
+                ("tax_exclude", models.BooleanField(default=False)),
+                ("notes", models.TextField(blank=True)),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("account", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="recurring_templates", to="fincore.account")),
+                ("counterparty", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="recurring_templates", to="fincore.vendor")),
+            ],
+            options={
+                "ordering": ["name", "id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="bill",
+            name="recurring_template",
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="bills", to="fincore.recurringtemplate"),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="recurring_template",
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="invoices", to="fincore.recurringtemplate"),
+        ),
+        migrations.AddConstraint(
+            model_name="bill",
+            constraint=models.UniqueConstraint(fields=("recurring_template", "recurring_period"), name="uniq_bill_recurring_period"),
+        ),
+        migrations.AddConstraint(
+            model_name="invoice",
+            constraint=models.UniqueConstraint(fields=("recurring_template", "recurring_period"), name="uniq_invoice_recurring_period"),
+        ),
+        migrations.AddField(
+            model_name="recurringtemplateitem",
+            name="category",
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="recurring_items", to="fincore.category"),
+        ),
+        migrations.AddField(
+            model_name="recurringtemplateitem",
+            name="template",
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="items", to="fincore.recurringtemplate"),
+        ),
+        migrations.AddIndex(
+            model_name="recurringtemplate",
+            index=models.Index(fields=["is_active", "next_run_date"], name="recurring_due_idx"),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fincore", "0030_recurring_templates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("fingerprint", models.CharField(db_index=True, max_length=40)),
+                ("normalized_sql", models.TextField()),
+                ("sql", models.TextField()),
+                ("params", models.JSONField(blank=True, default=list)),
+                ("duration_ms", models.FloatField()),
+                ("view", models.CharField(blank=True, default="", max_length=200)),
+                ("call_site", models.CharField(blank=True, default="", max_length=255)),
+                ("database", models.CharField(default="default", max_length=32)),
+                ("explain", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name_plural": "slow queries",
+                "ordering": ["-id"],
+            },
+        ),
+    ]
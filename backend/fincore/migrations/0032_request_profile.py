@@ -0,0 +1,35 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fincore", "0031_slow_query"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestProfile",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("method", models.CharField(max_length=10)),
+                ("path", models.CharField(max_length=500)),
+                ("query_string", models.TextField(blank=True, default="")),
+                ("view", models.CharField(blank=True, default="", max_length=200)),
+                ("status_code", models.PositiveSmallIntegerField(blank=True, null=True)),
+                ("duration_ms", models.FloatField()),
+                ("peak_memory_kb", models.PositiveIntegerField(default=0)),
+                ("stats_file", models.FileField(upload_to="profiles/")),
+                ("collapsed_file", models.FileField(upload_to="profiles/")),
+                ("allocations_file", models.FileField(upload_to="profiles/")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("user", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "ordering": ["-id"],
+            },
+        ),
+    ]
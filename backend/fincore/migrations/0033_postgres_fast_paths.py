@@ -0,0 +1,94 @@
+from django.db import migrations
+
+# PostgreSQL only; see fincore.db.postgres. On other databases this migration
+# does nothing. The SQL is spelled out here so later model changes cannot
+# alter what this migration did.
+
+FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX fincore_txn_date_brin ON fincore_transaction USING brin (date)",
+    # icontains compiles to UPPER(col) LIKE UPPER(%s); index the same expression.
+    "CREATE INDEX fincore_txn_payee_trgm ON fincore_transaction USING gin (UPPER(payee) gin_trgm_ops)",
+    "CREATE INDEX fincore_txn_description_trgm ON fincore_transaction USING gin (UPPER(description) gin_trgm_ops)",
+    """
+    CREATE TABLE fincore_ledger_change (
+        id bigserial PRIMARY KEY,
+        changed_at timestamptz NOT NULL DEFAULT now()
+    )
+    """,
+    """
+    CREATE FUNCTION fincore_note_ledger_change() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO fincore_ledger_change DEFAULT VALUES;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE TRIGGER fincore_transaction_changed
+    AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF
+        date, amount, kind, account_id, vendor_id, category_id, import_batch_id, is_invoice_matched
+    ON fincore_transaction
+    FOR EACH STATEMENT EXECUTE FUNCTION fincore_note_ledger_change()
+    """,
+    # Reports skip transactions of batches that are mid-commit or mid-rollback.
+    """
+    CREATE TRIGGER fincore_importbatch_changed
+    AFTER UPDATE OF status ON fincore_importbatch
+    FOR EACH STATEMENT EXECUTE FUNCTION fincore_note_ledger_change()
+    """,
+    """
+    CREATE MATERIALIZED VIEW fincore_monthly_category_totals AS
+    SELECT
+        date_trunc('month', t.date)::date AS month,
+        t.category_id,
+        t.kind,
+        t.account_id,
+        COALESCE(t.vendor_id, 0) AS vendor_id,
+        SUM(t.amount) AS total,
+        COUNT(*) AS row_count
+    FROM fincore_transaction t
+    LEFT JOIN fincore_importbatch b ON b.id = t.import_batch_id
+    WHERE t.category_id IS NOT NULL
+        AND NOT t.is_invoice_matched
+        AND (b.id IS NULL OR b.status NOT IN ('committing', 'rolling_back'))
+    GROUP BY 1, 2, 3, 4, 5
+    """,
+    # REFRESH ... CONCURRENTLY needs a unique index over plain columns.
+    """
+    CREATE UNIQUE INDEX fincore_monthly_category_totals_key
+    ON fincore_monthly_category_totals (month, category_id, kind, account_id, vendor_id)
+    """,
+]
+
+BACKWARD = [
+    "DROP MATERIALIZED VIEW IF EXISTS fincore_monthly_category_totals",
+    "DROP TRIGGER IF EXISTS fincore_importbatch_changed ON fincore_importbatch",
+    "DROP TRIGGER IF EXISTS fincore_transaction_changed ON fincore_transaction",
+    "DROP FUNCTION IF EXISTS fincore_note_ledger_change()",
+    "DROP TABLE IF EXISTS fincore_ledger_change",
+    "DROP INDEX IF EXISTS fincore_txn_description_trgm",
+    "DROP INDEX IF EXISTS fincore_txn_payee_trgm",
+    "DROP INDEX IF EXISTS fincore_txn_date_brin",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for statement in statements:
+            schema_editor.execute(statement, params=None)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fincore", "0032_request_profile"),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD), _run(BACKWARD)),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fincore", "0033_postgres_fast_paths"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importbatch",
+            name="source",
+            field=models.CharField(choices=[("csv", "CSV Import"), ("ofx", "OFX/QFX Import"), ("camt", "CAMT.053 Import")], default="csv", help_text="File format the rows were staged from; copied to each committed transaction.", max_length=6),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="source",
+            field=models.CharField(choices=[("manual", "Manual"), ("csv", "CSV Import"), ("ofx", "OFX/QFX Import"), ("camt", "CAMT.053 Import")], default="manual", max_length=6),
+        ),
+    ]
@@ -4,6 +4,7 @@ from .transaction import Transaction
 from .transfer_group import TransferGroup
 from .import_batch import ImportBatch
 from .import_row import ImportRow
+from .import_profile import ImportProfile
 from .vendor import Vendor
 from .invoice import Invoice
 from .invoice_item import InvoiceItem
@@ -11,6 +12,11 @@ from .invoice_payment import InvoicePayment
 from .bill import Bill
 from .bill_item import BillItem
 from .bill_payment import BillPayment
+from .categorization_rule import CategorizationRule
+from .document_sequence import DocumentSequence
+from .recurring_template import RecurringTemplate, RecurringTemplateItem
+from .slow_query import SlowQuery
+from .request_profile import RequestProfile
 
 __all__ = [
     "Account",
@@ -19,6 +25,7 @@ __all__ = [
     "TransferGroup",
     "ImportBatch",
     "ImportRow",
+    "ImportProfile",
     "Vendor",
     "Invoice",
     "InvoiceItem",
@@ -26,4 +33,10 @@ __all__ = [
     "Bill",
     "BillItem",
     "BillPayment",
+    "CategorizationRule",
+    "DocumentSequence",
+    "RecurringTemplate",
+    "RecurringTemplateItem",
+    "SlowQuery",
+    "RequestProfile",
 ]
@@ -3,6 +3,7 @@ from decimal import Decimal
 from django.db import models
 from django.db.models import Sum
 from .account import Account
+from .recurring_template import RecurringTemplate
 from .vendor import Vendor
 
 
@@ -23,10 +24,20 @@ class Bill(models.Model):
     subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     notes = models.TextField(blank=True)
+    recurring_template = models.ForeignKey(
+        RecurringTemplate, on_delete=models.SET_NULL, null=True, blank=True, related_name="bills"
+    )
+    recurring_period = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-date", "-id"]
+        indexes = [models.Index(fields=["status", "date"], name="bill_status_date_idx")]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recurring_template", "recurring_period"], name="uniq_bill_recurring_period"
+            )
+        ]
 
     def __str__(self):
         return f"{self.number} {self.total}"
@@ -0,0 +1,83 @@
+import re
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from .account import Account
+from .category import Category
+from .vendor import Vendor
+
+
+class CategorizationRule(models.Model):
+    """
+    Assigns a category (and optionally a vendor) to imported or uncategorized
+    transactions. All patterns are case-insensitive; when several rules match,
+    the lowest priority wins (ties go to the oldest rule).
+    """
+
+    FIELD_CHOICES = [
+        ("description", "Description"),
+        ("payee", "Payee"),
+    ]
+
+    MATCH_CHOICES = [
+        ("contains", "Contains"),
+        ("startswith", "Starts with"),
+        ("regex", "Regular expression"),
+    ]
+
+    name = models.CharField(max_length=100, blank=True)
+    field = models.CharField(max_length=12, choices=FIELD_CHOICES, default="description")
+    match_type = models.CharField(max_length=10, choices=MATCH_CHOICES, default="contains")
+    pattern = models.CharField(max_length=255)
+    amount_min = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Inclusive lower bound on the signed amount (expenses are negative).",
+    )
+    amount_max = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Inclusive upper bound on the signed amount.",
+    )
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="categorization_rules",
+        help_text="Limit the rule to one account; empty applies to all accounts.",
+    )
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name="categorization_rules")
+    vendor = models.ForeignKey(
+        Vendor,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="categorization_rules",
+    )
+    priority = models.PositiveIntegerField(default=100, help_text="Lower numbers win when several rules match.")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["priority", "id"]
+
+    def clean(self):
+        if not self.pattern.strip():
+            raise ValidationError({"pattern": "Pattern is required."})
+        if self.match_type == "regex":
+            try:
+                re.compile(self.pattern)
+            except re.error as exc:
+                raise ValidationError({"pattern": f"Invalid regular expression: {exc}"})
+        if self.amount_min is not None and self.amount_max is not None and self.amount_min > self.amount_max:
+            raise ValidationError({"amount_max": "Maximum must be greater than or equal to minimum."})
+        if self.category_id and self.category.kind == "transfer":
+            raise ValidationError({"category": "Transfer categories cannot be assigned by rules."})
+
+    def __str__(self):
+        return self.name or f"{self.get_match_type_display()} '{self.pattern}'"
@@ -0,0 +1,41 @@
+from django.db import models, transaction
+from django.db.models import F
+
+
+class DocumentSequence(models.Model):
+    """
+    Gap-tolerant counter for document numbers (invoices, bills).
+
+    Numbers are reserved in blocks with a single UPDATE, so bulk generation
+    never has to probe for unused random numbers.
+    """
+
+    DEFAULT_PREFIXES = {"invoice": "INV-", "bill": "BILL-"}
+
+    name = models.CharField(max_length=32, unique=True)
+    prefix = models.CharField(max_length=16, blank=True)
+    padding = models.PositiveSmallIntegerField(default=6)
+    next_value = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return f"{self.name} ({self.format(self.next_value)})"
+
+    def format(self, value):
+        return f"{self.prefix}{value:0{self.padding}d}"
+
+    @classmethod
+    def allocate(cls, name, count=1):
+        """Reserve ``count`` consecutive numbers for ``name`` and return them formatted."""
+        if count < 1:
+            return []
+        cls.objects.get_or_create(name=name, defaults={"prefix": cls.DEFAULT_PREFIXES.get(name, "")})
+        with transaction.atomic():
+            # UPDATE first so the row is write-locked before it is read back.
+            cls.objects.filter(name=name).update(next_value=F("next_value") + count)
+            sequence = cls.objects.get(name=name)
+        start = sequence.next_value - count
+        return [sequence.format(value) for value in range(start, start + count)]
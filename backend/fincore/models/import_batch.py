@@ -6,18 +6,29 @@ class ImportBatch(models.Model):
     STATUS_CHOICES = [
         ("pending", "Pending"),
         ("validated", "Validated"),
+        ("committing", "Committing"),
         ("imported", "Imported"),
+        ("rolling_back", "Rolling back"),
         ("failed", "Failed"),
     ]
 
+    # Batches whose transactions are only partly written; reports skip them.
+    IN_FLIGHT_STATUSES = ("committing", "rolling_back")
+
     AMOUNT_STRATEGY_CHOICES = [
         ("signed", "Signed Amount"),
         ("indicator", "Amount + Indicator"),
         ("split_columns", "Debit / Credit Columns"),
     ]
 
+    SOURCE_CHOICES = [
+        ("csv", "CSV Import"),
+        ("ofx", "OFX/QFX Import"),
+        ("camt", "CAMT.053 Import"),
+    ]
+
     uploaded_at = models.DateTimeField(auto_now_add=True)
-    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default="pending")
     filename = models.CharField(max_length=255)
     account = models.ForeignKey(
         Account,
@@ -33,10 +44,31 @@ class ImportBatch(models.Model):
     )
     indicator_credit_value = models.CharField(max_length=100, blank=True, default="")
     indicator_debit_value = models.CharField(max_length=100, blank=True, default="")
+    date_format = models.CharField(
+        max_length=20,
+        blank=True,
+        default="",
+        help_text="strptime format inferred for the date column when the batch was staged.",
+    )
+    committed_through_row = models.BigIntegerField(
+        default=0,
+        help_text="Checkpoint: id of the last ImportRow whose transaction has been written.",
+    )
+    committed_count = models.PositiveIntegerField(default=0)
+    source = models.CharField(
+        max_length=6,
+        choices=SOURCE_CHOICES,
+        default="csv",
+        help_text="File format the rows were staged from; copied to each committed transaction.",
+    )
     error_message = models.TextField(blank=True)
 
     class Meta:
         ordering = ["-uploaded_at"]
 
+    @property
+    def is_in_flight(self):
+        return self.status in self.IN_FLIGHT_STATUSES
+
     def __str__(self):
         return f"{self.filename} ({self.status})"
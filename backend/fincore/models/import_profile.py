@@ -0,0 +1,39 @@
+from django.db import models
+from .account import Account
+from .import_batch import ImportBatch
+
+
+class ImportProfile(models.Model):
+    """
+    Saved column mapping for a statement layout, keyed by a fingerprint of the
+    CSV headers. Written whenever a file stages cleanly through the wizard and
+    used by bulk uploads to route each file to its account.
+    """
+
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="import_profiles")
+    header_fingerprint = models.CharField(max_length=40, db_index=True)
+    headers = models.JSONField(default=list, blank=True)
+    mapping = models.JSONField(default=dict)
+    amount_strategy = models.CharField(
+        max_length=15,
+        choices=ImportBatch.AMOUNT_STRATEGY_CHOICES,
+        default="signed",
+    )
+    indicator_credit_value = models.CharField(max_length=100, blank=True, default="")
+    indicator_debit_value = models.CharField(max_length=100, blank=True, default="")
+    date_format = models.CharField(max_length=20, blank=True, default="")
+    last_filename = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-updated_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "header_fingerprint"],
+                name="uniq_importprofile_account_fingerprint",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.account} ({self.header_fingerprint[:8]})"
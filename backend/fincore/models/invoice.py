@@ -3,6 +3,7 @@ from decimal import Decimal
 from django.db import models
 from django.db.models import Sum
 from .account import Account
+from .recurring_template import RecurringTemplate
 from .vendor import Vendor
 
 
@@ -28,10 +29,20 @@ class Invoice(models.Model):
     total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     is_locked = models.BooleanField(default=False)
     notes = models.TextField(blank=True)
+    recurring_template = models.ForeignKey(
+        RecurringTemplate, on_delete=models.SET_NULL, null=True, blank=True, related_name="invoices"
+    )
+    recurring_period = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-date", "-id"]
+        indexes = [models.Index(fields=["status", "due_date"], name="invoice_status_due_idx")]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recurring_template", "recurring_period"], name="uniq_invoice_recurring_period"
+            )
+        ]
 
     def __str__(self):
         return f"{self.number} {self.customer} {self.total}"
@@ -45,8 +56,10 @@ class Invoice(models.Model):
     def remaining_balance(self):
         return (self.total - self.paid_amount).quantize(Decimal("0.01"))
 
-    def update_status_from_payments(self):
-        paid = self.paid_amount
+    def update_status_from_payments(self, paid=None):
+        """Recompute status; pass ``paid`` when the payment total is already known."""
+        if paid is None:
+            paid = self.paid_amount
         if paid <= 0:
             if self.status not in {"draft", "sent"}:
                 self.status = "sent"
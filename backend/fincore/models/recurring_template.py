@@ -0,0 +1,79 @@
+import calendar
+from datetime import date
+
+from django.db import models
+
+from .account import Account
+from .category import Category
+from .vendor import Vendor
+
+
+class RecurringTemplate(models.Model):
+    """
+    Schedule for issuing the same invoice (to a customer) or bill (from a
+    vendor) every month, quarter or year. ``next_run_date`` is the period
+    date of the next document to generate.
+    """
+
+    KIND_CHOICES = [
+        ("invoice", "Invoice"),
+        ("bill", "Bill"),
+    ]
+    FREQUENCY_CHOICES = [
+        ("monthly", "Monthly"),
+        ("quarterly", "Quarterly"),
+        ("yearly", "Yearly"),
+    ]
+    FREQUENCY_MONTHS = {"monthly": 1, "quarterly": 3, "yearly": 12}
+
+    name = models.CharField(max_length=120)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    counterparty = models.ForeignKey(Vendor, on_delete=models.PROTECT, related_name="recurring_templates")
+    account = models.ForeignKey(Account, on_delete=models.PROTECT, related_name="recurring_templates")
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default="monthly")
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    next_run_date = models.DateField(blank=True)
+    due_days = models.PositiveSmallIntegerField(default=30, help_text="Invoices only: due date is the period date plus this many days.")
+    tax_rate = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    tax_exclude = models.BooleanField(default=False)
+    notes = models.TextField(blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["name", "id"]
+        indexes = [models.Index(fields=["is_active", "next_run_date"], name="recurring_due_idx")]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_frequency_display()} {self.kind})"
+
+    def save(self, *args, **kwargs):
+        if not self.next_run_date:
+            self.next_run_date = self.start_date
+        super().save(*args, **kwargs)
+
+    def period_after(self, period):
+        """Next period date, keeping the start date's day of month (clamped to short months)."""
+        months = period.year * 12 + period.month - 1 + self.FREQUENCY_MONTHS[self.frequency]
+        year, month = divmod(months, 12)
+        month += 1
+        day = min(self.start_date.day, calendar.monthrange(year, month)[1])
+        return date(year, month, day)
+
+    def is_open_for(self, period):
+        return self.end_date is None or period <= self.end_date
+
+
+class RecurringTemplateItem(models.Model):
+    template = models.ForeignKey(RecurringTemplate, on_delete=models.CASCADE, related_name="items")
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name="recurring_items")
+    description = models.CharField(max_length=255, blank=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    tax_exempt = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.template.name} {self.amount}"
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """
+    A cProfile and tracemalloc capture of one staff-triggered request. The
+    pstats dump, folded stacks and top allocation sites are stored as files
+    under ``MEDIA_ROOT/profiles/``. Only the newest FINCORE_PROFILE_KEEP
+    profiles are kept.
+    """
+
+    FILE_FIELDS = ("stats_file", "collapsed_file", "allocations_file")
+
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    query_string = models.TextField(blank=True, default="")
+    view = models.CharField(max_length=200, blank=True, default="")
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    duration_ms = models.FloatField()
+    peak_memory_kb = models.PositiveIntegerField(default=0)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    stats_file = models.FileField(upload_to="profiles/")
+    collapsed_file = models.FileField(upload_to="profiles/")
+    allocations_file = models.FileField(upload_to="profiles/")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+    def delete_files(self):
+        for name in self.FILE_FIELDS:
+            field = getattr(self, name)
+            if field:
+                field.delete(save=False)
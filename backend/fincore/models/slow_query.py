@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """
+    A sampled SQL statement that ran over FINCORE_SLOW_QUERY_MS, with its call
+    site and query plan. The table is a ring buffer: it is trimmed to the most
+    recent FINCORE_SLOW_QUERY_KEEP rows on every write.
+    """
+
+    fingerprint = models.CharField(max_length=40, db_index=True)
+    normalized_sql = models.TextField()
+    sql = models.TextField()
+    params = models.JSONField(default=list, blank=True)
+    duration_ms = models.FloatField()
+    view = models.CharField(max_length=200, blank=True, default="")
+    call_site = models.CharField(max_length=255, blank=True, default="")
+    database = models.CharField(max_length=32, default="default")
+    explain = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-id"]
+        verbose_name_plural = "slow queries"
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f} ms {self.call_site or self.view}"
@@ -6,6 +6,22 @@ from .vendor import Vendor
 from .import_batch import ImportBatch
 
 
+class TransactionQuerySet(models.QuerySet):
+    def reportable(self):
+        """Exclude rows from import batches that are mid-commit or mid-rollback."""
+        return self.exclude(import_batch__status__in=ImportBatch.IN_FLIGHT_STATUSES)
+
+    def refresh_match_flags(self):
+        """Recompute is_invoice_matched / is_bill_matched from the payment tables."""
+        from .bill_payment import BillPayment
+        from .invoice_payment import InvoicePayment
+
+        return self.update(
+            is_invoice_matched=models.Exists(InvoicePayment.objects.filter(transaction=models.OuterRef("pk"))),
+            is_bill_matched=models.Exists(BillPayment.objects.filter(transaction=models.OuterRef("pk"))),
+        )
+
+
 class Transaction(models.Model):
     """
     Core financial event stored as a single entry.
@@ -29,7 +45,7 @@ class Transaction(models.Model):
 
     SOURCE_CHOICES = [
         ("manual", "Manual"),
-        ("csv", "CSV Import"),
+        *ImportBatch.SOURCE_CHOICES,
     ]
 
     date = models.DateField()
@@ -51,11 +67,32 @@ class Transaction(models.Model):
         help_text="Nullable link to the import batch that created these rows.",
     )
     description = models.CharField(max_length=255, blank=True)
+    external_id = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        help_text="Bank-assigned transaction id (OFX FITID, CAMT.053 AcctSvcrRef); unique per account when set.",
+    )
     source = models.CharField(max_length=6, choices=SOURCE_CHOICES, default="manual")
+    is_invoice_matched = models.BooleanField(
+        default=False, db_index=True, help_text="Denormalized: at least one InvoicePayment references this row."
+    )
+    is_bill_matched = models.BooleanField(
+        default=False, db_index=True, help_text="Denormalized: at least one BillPayment references this row."
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = TransactionQuerySet.as_manager()
+
     class Meta:
         ordering = ["-date", "-id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "external_id"],
+                condition=~models.Q(external_id=""),
+                name="uniq_transaction_account_external_id",
+            )
+        ]
 
     def save(self, *args, **kwargs):
         if not self.is_imported and self.kind != "transfer" and not self.category_id:
@@ -0,0 +1,248 @@
+"""
+On-demand request profiling.
+
+A staff user sends ``X-Fincore-Profile: 1`` (or adds ``?_profile=1``) and that
+one request runs under cProfile and tracemalloc. The capture is saved as a
+``RequestProfile``, with three files under ``MEDIA_ROOT/profiles/``:
+
+* ``.prof``: pstats data for ``python -m pstats`` or snakeviz;
+* ``.collapsed.txt``: folded stacks (``a;b;c <microseconds>``) for
+  flamegraph.pl or speedscope;
+* ``.allocations.txt``: the top allocation sites by size.
+
+A request without the flag pays only the flag check. tracemalloc is
+process-wide, so each process profiles one request at a time. A request that
+arrives while another is being profiled runs normally and gets
+``X-Fincore-Profile: busy``.
+"""
+
+import cProfile
+import linecache
+import logging
+import marshal
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Fincore-Profile"
+PROFILE_PARAM = "_profile"
+TRACEMALLOC_FRAMES = 25
+TOP_ALLOCATIONS = 50
+# Paths below this share of the request (in seconds) are not expanded further.
+MIN_STACK_SECONDS = 0.0001
+MAX_STACK_DEPTH = 128
+
+_ADDRESS = re.compile(r" at 0x[0-9a-f]+")
+_busy = threading.Lock()
+
+
+def requested(request):
+    return request.headers.get(PROFILE_HEADER) == "1" or request.GET.get(PROFILE_PARAM) == "1"
+
+
+def strip_flag(request):
+    """Drop ``?_profile=1`` so views do not carry it into their own links."""
+    if PROFILE_PARAM not in request.GET:
+        return
+    query = request.GET.copy()
+    query.pop(PROFILE_PARAM)
+    query._mutable = False
+    request.GET = query
+    request.META["QUERY_STRING"] = query.urlencode()
+
+
+@dataclass
+class Capture:
+    profile: cProfile.Profile
+    allocations: list
+    peak_bytes: int
+    duration: float
+
+
+def run_profiled(func, *args):
+    """Call ``func(*args)`` under cProfile and tracemalloc; returns ``(result, Capture)``."""
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        before = None
+    else:
+        before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    profile = cProfile.Profile()
+    started = time.perf_counter()
+    try:
+        result = profile.runcall(func, *args)
+    finally:
+        duration = time.perf_counter() - started
+        snapshot = tracemalloc.take_snapshot()
+        _current, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+    snapshot = snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+    )
+    if before is None:
+        allocations = snapshot.statistics("lineno")
+    else:
+        allocations = [stat for stat in snapshot.compare_to(before, "lineno") if stat.size_diff > 0]
+    return result, Capture(profile, allocations[:TOP_ALLOCATIONS], peak, duration)
+
+
+def _module_path(filename):
+    """``site-packages/django/db/utils.py`` -> ``django/db/utils.py``: trim the longest sys.path prefix."""
+    prefixes = [path for path in sys.path if path and filename.startswith(path.rstrip(os.sep) + os.sep)]
+    if prefixes:
+        return os.path.relpath(filename, max(prefixes, key=len))
+    return filename
+
+
+def _frame_label(func):
+    filename, _lineno, name = func
+    if filename == "~":  # built-ins: "<method 'execute' of 'sqlite3.Cursor' objects>"
+        label = _ADDRESS.sub("", name)
+    else:
+        module = _module_path(filename)
+        label = f"{module.removesuffix('.py').replace(os.sep, '.')}:{name}"
+    return label.replace(";", ",").replace(" ", "_")
+
+
+def collapsed_stacks(stats):
+    """
+    Folded stacks from pstats data. cProfile records caller/callee edges
+    rather than whole stacks, so each function's self time is split across
+    the paths that reach it in proportion to each edge's cumulative time.
+    Weights are microseconds.
+
+    A function already on the path is not entered again. Django's middleware
+    chain calls the same ``inner`` wrapper at every layer, so that chain
+    folds into one frame, and the view's stack hangs directly below it.
+    """
+    if not stats:
+        return ""
+    callees = defaultdict(list)
+    # The profiled callable has the largest cumulative time; it can still have
+    # callers when it is re-entered, like the middleware ``inner`` wrapper.
+    roots = [max(stats, key=lambda func: stats[func][3])]
+    for func, (_cc, _nc, _tt, _ct, callers) in stats.items():
+        if not callers and func not in roots:
+            roots.append(func)
+        for caller, edge in callers.items():
+            callees[caller].append((func, edge[3]))
+
+    folded = Counter()
+
+    def walk(func, path, on_path, share):
+        _cc, _nc, self_time, _ct, _callers = stats[func]
+        path = [*path, _frame_label(func)]
+        weight = round(self_time * share * 1_000_000)
+        if weight:
+            folded[";".join(path)] += weight
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_time in callees.get(func, ()):
+            callee_time = stats[callee][3]
+            callee_share = share * edge_time / callee_time if callee_time else 0
+            if callee in on_path or callee_time * callee_share < MIN_STACK_SECONDS:
+                continue
+            walk(callee, path, on_path | {callee}, callee_share)
+
+    for root in roots:
+        walk(root, [], {root}, 1.0)
+    return "".join(f"{stack} {weight}\n" for stack, weight in sorted(folded.items()))
+
+
+def top_functions(stats, limit=30):
+    """``(label, calls, self seconds, cumulative seconds)`` for the slowest functions by cumulative time."""
+    rows = [(_frame_label(func), nc, tt, ct) for func, (_cc, nc, tt, ct, _callers) in stats.items()]
+    return sorted(rows, key=lambda row: row[3], reverse=True)[:limit]
+
+
+def allocation_report(capture):
+    lines = [
+        f"# Top {len(capture.allocations)} allocation sites still holding memory at the end of the request.",
+        f"# Peak traced memory during the request: {capture.peak_bytes / 1024:,.0f} KiB",
+        "",
+    ]
+    for stat in capture.allocations:
+        frame = stat.traceback[0]
+        size = getattr(stat, "size_diff", stat.size)
+        count = getattr(stat, "count_diff", stat.count)
+        lines.append(f"{size / 1024:>10,.1f} KiB {count:>8,} blocks  {_module_path(frame.filename)}:{frame.lineno}")
+        source = linecache.getline(frame.filename, frame.lineno).strip()
+        if source:
+            lines.append(f"{'':>32}{source}")
+    return "\n".join(lines) + "\n"
+
+
+def save_profile(request, response, capture, view=""):
+    """Store the capture as a ``RequestProfile``. Never raises: diagnostics must not break a request."""
+    from fincore.models import RequestProfile
+
+    capture.profile.create_stats()
+    stats = capture.profile.stats
+    base = f"{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+    user = getattr(request, "user", None)
+    profile = RequestProfile(
+        method=request.method,
+        path=request.path[:500],
+        query_string=request.META.get("QUERY_STRING", ""),
+        view=view[:200],
+        status_code=response.status_code,
+        duration_ms=round(capture.duration * 1000, 3),
+        peak_memory_kb=capture.peak_bytes // 1024,
+        user=user if user is not None and user.is_authenticated else None,
+    )
+    try:
+        profile.stats_file.save(f"{base}.prof", ContentFile(marshal.dumps(stats)), save=False)
+        profile.collapsed_file.save(f"{base}.collapsed.txt", ContentFile(collapsed_stacks(stats).encode()), save=False)
+        profile.allocations_file.save(
+            f"{base}.allocations.txt", ContentFile(allocation_report(capture).encode()), save=False
+        )
+        profile.save(using=DEFAULT_DB_ALIAS)
+        trim_profiles()
+    except (DatabaseError, OSError):
+        logger.warning("Could not store the profile of %s", request.path, exc_info=True)
+        profile.delete_files()
+        return None
+    return profile
+
+
+def trim_profiles(keep=None):
+    """Delete all but the newest ``keep`` (FINCORE_PROFILE_KEEP) profiles and their files."""
+    from fincore.models import RequestProfile
+
+    keep = settings.FINCORE_PROFILE_KEEP if keep is None else keep
+    stale = list(RequestProfile.objects.using(DEFAULT_DB_ALIAS).order_by("-id")[keep:])
+    for profile in stale:
+        profile.delete_files()
+    if stale:
+        RequestProfile.objects.using(DEFAULT_DB_ALIAS).filter(id__in=[profile.id for profile in stale]).delete()
+    return len(stale)
+
+
+@contextmanager
+def profiling_slot():
+    """Yields True when this thread got the process's single profiling slot."""
+    acquired = _busy.acquire(blocking=False)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            _busy.release()
@@ -0,0 +1 @@
+"""Domain services for fincore (import pipeline, matching, reporting helpers)."""
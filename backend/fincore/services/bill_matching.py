@@ -0,0 +1,176 @@
+"""
+Split-payment suggestions for bills.
+
+Two shapes are searched, both as exact subset sums over integer cents:
+
+* several outgoing transactions (instalments) that add up to one bill's
+  remaining balance, and
+* one outgoing transaction that settles this bill together with other open
+  bills from the same vendor.
+
+Candidates are limited to the bill's account and a date window before the
+search starts, and the search itself is bounded by item count and a time
+budget so a busy account can never stall the match panel.
+"""
+
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from fincore.models import Bill, Transaction
+
+DEFAULT_WINDOW_DAYS = 30
+MAX_ITEMS = 5
+MAX_CANDIDATES = 40
+TIME_BUDGET_SECONDS = 0.25
+OPEN_STATUSES = ("draft", "received", "partially_paid")
+
+
+def _cents(value):
+    return int((value * 100).to_integral_value())
+
+
+def _money_total():
+    return DecimalField(max_digits=12, decimal_places=2)
+
+
+def find_subset_sum(target, amounts, max_items=MAX_ITEMS, time_budget=TIME_BUDGET_SECONDS):
+    """
+    Return indexes into ``amounts`` (positive integer cents) whose values sum
+    exactly to ``target``, using as few items as possible, or None.
+
+    Iterative deepening on the item count, each pass a depth-first search over
+    amounts sorted largest first, pruned when the remaining items cannot reach
+    (or would overshoot) the target. Gives up once ``time_budget`` seconds
+    have passed.
+    """
+    if target <= 0:
+        return None
+    order = sorted(
+        (index for index, amount in enumerate(amounts) if 0 < amount <= target),
+        key=lambda index: -amounts[index],
+    )
+    values = [amounts[index] for index in order]
+    count = len(values)
+    # suffix[i] = sum(values[i:]) for the "cannot reach" prune.
+    suffix = [0] * (count + 1)
+    for i in range(count - 1, -1, -1):
+        suffix[i] = suffix[i + 1] + values[i]
+    if suffix[0] < target:
+        return None
+
+    deadline = time.monotonic() + time_budget
+    picked = []
+
+    def search(start, needed, slots):
+        if needed == 0:
+            return True
+        if slots == 0 or time.monotonic() > deadline:
+            return False
+        for i in range(start, count):
+            value = values[i]
+            if value > needed:
+                continue
+            # Largest-first order: the best `slots` items from here are the next ones.
+            if value * slots < needed or suffix[i] < needed:
+                return False
+            if i > start and value == values[i - 1]:
+                continue
+            picked.append(i)
+            if search(i + 1, needed - value, slots - 1):
+                return True
+            picked.pop()
+        return False
+
+    for slots in range(1, min(max_items, count) + 1):
+        if search(0, target, slots):
+            return [order[i] for i in picked]
+        if time.monotonic() > deadline:
+            break
+    return None
+
+
+def outgoing_with_available(account_id, start, end):
+    """Outgoing transactions in the window that still have unallocated cash."""
+    return list(
+        Transaction.objects.reportable()
+        .filter(account_id=account_id, amount__lt=0, date__gte=start, date__lte=end, transfer_group__isnull=True)
+        .annotate(
+            allocated=Coalesce(Sum("bill_payments__amount"), Value(Decimal("0.00")), output_field=_money_total())
+        )
+        .filter(amount__lt=-F("allocated"))
+        .select_related("account", "vendor")
+        .order_by("-date", "-id")
+    )
+
+
+def available_amount(txn):
+    return abs(txn.amount) - txn.allocated
+
+
+def open_bills_for_vendor(bill, start, end):
+    bills = (
+        Bill.objects.filter(
+            account_id=bill.account_id,
+            vendor_id=bill.vendor_id,
+            status__in=OPEN_STATUSES,
+            date__gte=start,
+            date__lte=end,
+        )
+        .exclude(pk=bill.pk)
+        .annotate(paid_total=Coalesce(Sum("payments__amount"), Value(Decimal("0.00")), output_field=_money_total()))
+        .order_by("date", "id")
+    )
+    open_bills = []
+    for other in bills:
+        other.open_balance = other.total - other.paid_total
+        if other.open_balance > 0:
+            open_bills.append(other)
+    return open_bills
+
+
+def split_payment_suggestions(bill, transactions=None, window_days=DEFAULT_WINDOW_DAYS):
+    """
+    Return ``{"instalments": [...], "combined_bills": [...]}`` for ``bill``.
+
+    ``instalments`` is a list of transactions whose available amounts sum to
+    the bill's remaining balance (empty if no combination was found).
+    ``combined_bills`` is a list of ``{"transaction", "bills"}`` dicts where
+    one transaction settles ``bill`` plus the listed other bills exactly.
+    """
+    remaining = bill.remaining_balance
+    result = {"instalments": [], "combined_bills": []}
+    if remaining <= 0:
+        return result
+    remaining_cents = _cents(remaining)
+    window = timedelta(days=window_days)
+    start, end = bill.date - window, bill.date + window
+    if transactions is None:
+        transactions = outgoing_with_available(bill.account_id, start, end)
+
+    # Closest dates first, so the candidate cap drops the least likely ones.
+    by_distance = sorted(transactions, key=lambda txn: (abs((txn.date - bill.date).days), -txn.id))
+    smaller = [txn for txn in by_distance if _cents(available_amount(txn)) < remaining_cents][:MAX_CANDIDATES]
+    picked = find_subset_sum(remaining_cents, [_cents(available_amount(txn)) for txn in smaller])
+    if picked and len(picked) > 1:
+        result["instalments"] = sorted((smaller[index] for index in picked), key=lambda txn: (txn.date, txn.id))
+
+    larger = [txn for txn in by_distance if _cents(available_amount(txn)) > remaining_cents][:MAX_CANDIDATES]
+    if larger:
+        others = open_bills_for_vendor(bill, start, end)[:MAX_CANDIDATES]
+        other_cents = [_cents(other.open_balance) for other in others]
+        for txn in larger:
+            picked = find_subset_sum(
+                _cents(available_amount(txn)) - remaining_cents,
+                other_cents,
+                max_items=MAX_ITEMS - 1,
+                time_budget=TIME_BUDGET_SECONDS / len(larger),
+            )
+            if picked:
+                result["combined_bills"].append(
+                    {"transaction": txn, "bills": [others[index] for index in sorted(picked)]}
+                )
+    return result
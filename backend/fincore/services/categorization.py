@@ -0,0 +1,296 @@
+"""
+Rule-based categorization.
+
+Active ``CategorizationRule`` rows are compiled once into a ``RuleMatcher``:
+substring and prefix patterns go into one Aho-Corasick automaton per field.
+Regex patterns contribute a literal they require (e.g. ``amzn`` from
+``^amzn\\s+mktp``) to the same automaton and only run when that literal is
+present; regexes with no usable literal share one combined prefilter
+expression, except those with back-references, which run on their own. Each text is scanned once, so cost grows with the text length
+rather than with the number of rules.
+"""
+
+import re
+from collections import deque
+
+from django.db.models import Q
+
+from fincore.db.writes import write_transaction
+from fincore.models import CategorizationRule, Category, Transaction
+
+UNCATEGORIZED_NAMES = ("Uncategorized Income", "Uncategorized Expense")
+DEFAULT_CHUNK_SIZE = 2000
+
+# A numbered (``\1``) or named (``(?P=name)``) back-reference not itself escaped.
+_BACKREFERENCE = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]|\(\?P=")
+
+
+class AhoCorasick:
+    """Multi-pattern substring search. ``search`` yields ``(start, pattern_index)``."""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(index)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def search(self, text):
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in out[state]:
+                yield position - len(patterns[index]) + 1, index
+
+
+_QUANTIFIERS = "?*{"
+_MIN_LITERAL = 3
+
+
+def required_literal(pattern):
+    """
+    Return the longest literal run every match of ``pattern`` must contain
+    (case-folded), or "" when none can be proven. Deliberately conservative:
+    only top-level literals count, and any top-level alternation disables it.
+    """
+    try:
+        if re.compile(pattern).flags & re.VERBOSE:
+            return ""
+    except re.error:
+        return ""
+    runs = []
+    current = []
+    depth = 0
+    index = 0
+    length = len(pattern)
+
+    def flush():
+        if current:
+            runs.append("".join(current))
+            current.clear()
+
+    while index < length:
+        char = pattern[index]
+        if char == "\\":
+            escaped = pattern[index + 1 : index + 2]
+            index += 2
+            if escaped and not escaped.isalnum() and depth == 0:
+                literal = escaped
+            else:
+                flush()
+                continue
+        elif char == "[":
+            flush()
+            index += 1
+            if index < length and pattern[index] == "^":
+                index += 1
+            if index < length and pattern[index] == "]":
+                index += 1
+            while index < length and pattern[index] != "]":
+                index += 2 if pattern[index] == "\\" else 1
+            index += 1
+            continue
+        elif char == "(":
+            flush()
+            depth += 1
+            index += 1
+            continue
+        elif char == ")":
+            depth = max(depth - 1, 0)
+            index += 1
+            continue
+        elif char == "|":
+            if depth == 0:
+                return ""
+            index += 1
+            continue
+        elif char in ".^$+" or char in _QUANTIFIERS:
+            if char in _QUANTIFIERS and current:
+                # The preceding character is optional, so it cannot be required.
+                current.pop()
+            flush()
+            index += 1
+            if char == "{":
+                while index < length and pattern[index - 1] != "}":
+                    index += 1
+            continue
+        else:
+            literal = char
+            index += 1
+        if depth == 0:
+            current.append(literal)
+    flush()
+    best = max(runs, key=len, default="")
+    return best.casefold() if len(best) >= _MIN_LITERAL else ""
+
+
+class _FieldMatcher:
+    """Compiled patterns for one transaction field (description or payee)."""
+
+    def __init__(self, rules):
+        # Automaton outputs map to (rule, mode, compiled regex or None).
+        entries_by_literal = {}
+        unanchored_regexes = []
+        for rule in rules:
+            pattern = rule.pattern.strip()
+            if not pattern:
+                continue
+            if rule.match_type == "regex":
+                try:
+                    compiled = re.compile(pattern, re.IGNORECASE)
+                except re.error:
+                    continue
+                literal = required_literal(pattern)
+                if literal:
+                    entries_by_literal.setdefault(literal, []).append((rule, "regex", compiled))
+                else:
+                    unanchored_regexes.append((rule, compiled))
+            else:
+                entries_by_literal.setdefault(pattern.casefold(), []).append((rule, rule.match_type, None))
+
+        literals = list(entries_by_literal)
+        self._entries = [entries_by_literal[literal] for literal in literals]
+        self._automaton = AhoCorasick(literals) if literals else None
+        # Joining patterns renumbers their groups, so a back-reference would
+        # point at another rule's group; those regexes are tested one by one.
+        self._regexes = [entry for entry in unanchored_regexes if not _BACKREFERENCE.search(entry[1].pattern)]
+        self._standalone = [entry for entry in unanchored_regexes if _BACKREFERENCE.search(entry[1].pattern)]
+        self._prefilter = None
+        if self._regexes:
+            try:
+                self._prefilter = re.compile(
+                    "|".join(f"(?:{compiled.pattern})" for _, compiled in self._regexes),
+                    re.IGNORECASE,
+                )
+            except re.error:
+                # e.g. two rules defining the same group name.
+                self._standalone += self._regexes
+                self._regexes = []
+
+    def candidates(self, text):
+        if not text:
+            return
+        if self._automaton:
+            tested = set()
+            for start, index in self._automaton.search(text.casefold()):
+                for rule, mode, compiled in self._entries[index]:
+                    if mode == "contains" or (mode == "startswith" and start == 0):
+                        yield rule
+                    elif mode == "regex" and rule.id not in tested:
+                        tested.add(rule.id)
+                        if compiled.search(text):
+                            yield rule
+        if self._prefilter is not None and self._prefilter.search(text):
+            for rule, compiled in self._regexes:
+                if compiled.search(text):
+                    yield rule
+        for rule, compiled in self._standalone:
+            if compiled.search(text):
+                yield rule
+
+
+class RuleMatcher:
+    """Picks the winning rule for a transaction, or None."""
+
+    def __init__(self, rules):
+        rules = [rule for rule in rules if rule.is_active]
+        self.rule_count = len(rules)
+        self._fields = {
+            field: _FieldMatcher([rule for rule in rules if rule.field == field])
+            for field, _ in CategorizationRule.FIELD_CHOICES
+        }
+
+    def match(self, description, payee, amount, account_id):
+        best = None
+        texts = {"description": description, "payee": payee}
+        for field, matcher in self._fields.items():
+            for rule in matcher.candidates(texts[field] or ""):
+                if best is not None and (rule.priority, rule.id) >= (best.priority, best.id):
+                    continue
+                if rule.account_id and rule.account_id != account_id:
+                    continue
+                if rule.amount_min is not None and amount < rule.amount_min:
+                    continue
+                if rule.amount_max is not None and amount > rule.amount_max:
+                    continue
+                best = rule
+        return best
+
+
+def load_rule_matcher(account=None):
+    """Compile the active rules that apply to ``account`` (or to every account)."""
+    rules = CategorizationRule.objects.filter(
+        is_active=True,
+        category__is_active=True,
+    ).exclude(category__kind="transfer")
+    if account is not None:
+        rules = rules.filter(Q(account__isnull=True) | Q(account=account))
+    return RuleMatcher(rules.select_related("category", "vendor"))
+
+
+def categorize_uncategorized(matcher, account=None, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """
+    Apply ``matcher`` to transactions still in the protected Uncategorized
+    categories. Works through the table in primary-key chunks, each updated in
+    its own short transaction. Returns ``(scanned, updated)``.
+    """
+    uncategorized_ids = list(
+        Category.objects.filter(name__in=UNCATEGORIZED_NAMES, is_protected=True).values_list("id", flat=True)
+    )
+    queryset = Transaction.objects.filter(
+        Q(category__isnull=True) | Q(category_id__in=uncategorized_ids),
+        transfer_group__isnull=True,
+        is_locked=False,
+    )
+    if account is not None:
+        queryset = queryset.filter(account=account)
+    queryset = queryset.only("id", "account_id", "amount", "description", "payee", "vendor_id", "category_id", "kind")
+
+    scanned = updated = 0
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id).order_by("id")[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+        scanned += len(chunk)
+        changed = []
+        for txn in chunk:
+            rule = matcher.match(txn.description, txn.payee, txn.amount, txn.account_id)
+            if rule is None:
+                continue
+            txn.category = rule.category
+            txn.kind = rule.category.kind
+            if rule.vendor_id and not txn.vendor_id:
+                txn.vendor = rule.vendor
+            changed.append(txn)
+        updated += len(changed)
+        if changed and not dry_run:
+            with write_transaction():
+                Transaction.objects.bulk_update(changed, ["category", "kind", "vendor"], batch_size=500)
+    return scanned, updated
@@ -0,0 +1,125 @@
+"""
+CSV parsing for the import wizard.
+
+This module has no Django imports so the parse step can run inside worker
+processes (see ``import_bulk`` in the import views). Workers only parse and
+normalize; every database write happens back in the request thread.
+"""
+
+import csv
+import hashlib
+import io
+
+from .normalization import format_cents, normalize_amount_columns, normalize_date_column
+
+
+class CSVParseError(Exception):
+    """Raised when an uploaded file cannot be read as CSV at all."""
+
+
+def decode_csv(content):
+    """Decode uploaded bytes (UTF-8, optional BOM) into text."""
+    try:
+        return content.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise CSVParseError("File is not valid UTF-8 text.") from exc
+
+
+def read_headers(text):
+    """Return the header row of a CSV document without parsing the body."""
+    try:
+        return next(csv.reader(io.StringIO(text)), [])
+    except csv.Error as exc:
+        raise CSVParseError(f"Could not read CSV header: {exc}") from exc
+
+
+def header_fingerprint(headers):
+    """
+    Stable identifier for a statement layout: the SHA-1 of the normalized,
+    sorted header names. Column order and case do not change the fingerprint.
+    """
+    names = sorted({str(header).strip().lower() for header in headers if str(header).strip()})
+    return hashlib.sha1("\x1f".join(names).encode("utf-8")).hexdigest()
+
+
+def parse_csv(text, mapping, amount_strategy, indicator_credit="", indicator_debit=""):
+    """
+    Parse and normalize one CSV document against a column mapping.
+
+    Returns a dict with ``headers``, ``fingerprint``, ``date_format``,
+    ``total_rows``, ``row_errors`` and ``rows`` (a list of
+    ``(raw_row, mapped, errors)`` tuples ready to become ImportRow records).
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    try:
+        raw_rows = list(reader)
+    except csv.Error as exc:
+        raise CSVParseError(f"Could not parse CSV: {exc}") from exc
+    headers = list(reader.fieldnames or [])
+    total_rows = len(raw_rows)
+
+    # Resolve each mapped target to the CSV header it reads from (headers are
+    # matched case-insensitively; a later duplicate header wins, as before).
+    header_by_key = {}
+    for header in headers:
+        header_by_key[str(header).strip().lower()] = header
+    columns = {}
+    for column, target in mapping.items():
+        if target == "ignore":
+            continue
+        header = header_by_key.get(str(column).strip().lower())
+        if header is None:
+            columns[target] = [""] * total_rows
+        else:
+            columns[target] = [(row.get(header) or "").strip() for row in raw_rows]
+
+    date_ordinals, date_errors, date_format = normalize_date_column(
+        columns.get("date", [""] * total_rows)
+    )
+    amount_cents, amount_errors = normalize_amount_columns(
+        columns, amount_strategy, indicator_credit, indicator_debit
+    )
+
+    rows = []
+    row_errors = 0
+    for idx, row in enumerate(raw_rows):
+        mapped = {target: values[idx] for target, values in columns.items()}
+        errors = date_errors.get(idx, []) + amount_errors.get(idx, [])
+        if date_ordinals[idx] is not None:
+            mapped["date_ordinal"] = date_ordinals[idx]
+        if amount_cents[idx] is not None:
+            mapped["amount_cents"] = amount_cents[idx]
+            mapped["signed_amount"] = format_cents(amount_cents[idx])
+        if errors:
+            row_errors += 1
+        rows.append((row, mapped, errors))
+
+    return {
+        "headers": headers,
+        "fingerprint": header_fingerprint(headers),
+        "date_format": date_format or "",
+        "total_rows": total_rows,
+        "row_errors": row_errors,
+        "rows": rows,
+    }
+
+
+def parse_csv_job(job):
+    """
+    Process-pool entry point. ``job`` is a plain dict (picklable) with
+    ``name``, ``text``, ``mapping``, ``amount_strategy``, ``indicator_credit``
+    and ``indicator_debit``. Parse failures are returned, not raised, so one
+    bad file never aborts the rest of the upload.
+    """
+    try:
+        parsed = parse_csv(
+            job["text"],
+            job["mapping"],
+            job["amount_strategy"],
+            job.get("indicator_credit", ""),
+            job.get("indicator_debit", ""),
+        )
+    except CSVParseError as exc:
+        return {"name": job["name"], "error": str(exc)}
+    parsed["name"] = job["name"]
+    return parsed
@@ -0,0 +1,457 @@
+"""
+Batch matching of open invoices to incoming deposits.
+
+``propose_invoice_matches`` loads every open invoice and every unmatched
+positive transaction in one query each, then works per account: deposits are
+sorted by amount so each invoice only looks at the slice whose amount falls
+within tolerance of its remaining balance (``bisect``), and within that slice
+only at deposits inside the date window. Candidate pairs are scored and
+assigned greedily, best score first, so every invoice and every deposit is
+used at most once.
+
+``apply_invoice_matches`` writes the accepted pairs, and
+``allocate_invoice_payments`` explicit amounts (remittance files), each in one
+database transaction validated against balances loaded with a fixed number of
+queries, written with ``bulk_create``/``bulk_update``.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from fincore.db.writes import write_transaction
+from fincore.models import Invoice, InvoiceItem, InvoicePayment, Transaction
+
+DEFAULT_WINDOW_DAYS = 30
+# Deposits may differ from the open balance by this fraction (card fees,
+# rounding) and still be proposed; the payment amount never exceeds either.
+DEFAULT_AMOUNT_TOLERANCE = Decimal("0.02")
+AUTO_ACCEPT_SCORE = 0.8
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+# InvoicePayment.amount is DecimalField(max_digits=12, decimal_places=2).
+MAX_PAYMENT_AMOUNT = Decimal("9999999999.99")
+OPEN_STATUSES = ("draft", "sent", "partially_paid")
+
+AMOUNT_WEIGHT = 0.5
+DATE_WEIGHT = 0.3
+NAME_WEIGHT = 0.2
+
+_WORD = re.compile(r"[a-z0-9]+")
+_NAME_STOPWORDS = {"inc", "llc", "ltd", "co", "corp", "the", "and", "of", "gmbh", "payment", "deposit"}
+
+
+@dataclass
+class MatchProposal:
+    invoice: Invoice
+    transaction: Transaction
+    amount: Decimal
+    score: float
+    amount_diff: Decimal
+    days_apart: int
+
+    @property
+    def key(self):
+        return f"{self.invoice.id}:{self.transaction.id}"
+
+    @property
+    def auto_accept(self):
+        return self.score >= AUTO_ACCEPT_SCORE
+
+
+def _cents(value):
+    return int((value * 100).to_integral_value())
+
+
+def _name_tokens(text):
+    return {word for word in _WORD.findall((text or "").lower()) if word not in _NAME_STOPWORDS}
+
+
+def name_similarity(customer_tokens, txn):
+    """Share of the customer's name words found in the deposit's payee/description."""
+    if not customer_tokens:
+        return 0.0
+    found = _name_tokens(f"{txn.payee} {txn.description}")
+    return len(customer_tokens & found) / len(customer_tokens)
+
+
+def _score(invoice, remaining_cents, txn, customer_tokens, tolerance_cents, window_days):
+    amount_diff = abs(_cents(txn.amount) - remaining_cents)
+    amount_score = 1.0 if amount_diff == 0 else 0.5 * (1 - amount_diff / (tolerance_cents + 1))
+    days_apart = abs((txn.date - invoice.date).days)
+    date_score = 1 - days_apart / (window_days + 1)
+    if txn.vendor_id and txn.vendor_id == invoice.customer_id:
+        name_score = 1.0
+    else:
+        name_score = name_similarity(customer_tokens, txn)
+    score = AMOUNT_WEIGHT * amount_score + DATE_WEIGHT * date_score + NAME_WEIGHT * name_score
+    return score, amount_diff, days_apart
+
+
+def open_invoices(account=None):
+    invoices = (
+        Invoice.objects.filter(status__in=OPEN_STATUSES)
+        .select_related("customer", "account")
+        .annotate(
+            paid_total=Coalesce(
+                Sum("payments__amount"),
+                Value(Decimal("0.00")),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            )
+        )
+    )
+    if account is not None:
+        invoices = invoices.filter(account=account)
+    return [invoice for invoice in invoices if invoice.total - invoice.paid_total > 0]
+
+
+def unmatched_deposits(account_ids, start, end):
+    return list(
+        Transaction.objects.reportable()
+        .filter(
+            account_id__in=account_ids,
+            amount__gt=0,
+            date__gte=start,
+            date__lte=end,
+            transfer_group__isnull=True,
+            is_invoice_matched=False,
+        )
+        .select_related("account", "vendor")
+        .only(
+            "id", "date", "amount", "description", "payee", "account_id", "vendor_id",
+            "category_id", "kind", "account__name", "vendor__name",
+        )
+    )
+
+
+def propose_invoice_matches(
+    account=None, window_days=DEFAULT_WINDOW_DAYS, amount_tolerance=DEFAULT_AMOUNT_TOLERANCE
+):
+    """Return one-to-one ``MatchProposal``s, best score first."""
+    invoices = open_invoices(account)
+    if not invoices:
+        return []
+    window = timedelta(days=window_days)
+    start = min(invoice.date for invoice in invoices) - window
+    end = max(invoice.date for invoice in invoices) + window
+    deposits = unmatched_deposits({invoice.account_id for invoice in invoices}, start, end)
+
+    deposits_by_account = {}
+    for txn in deposits:
+        deposits_by_account.setdefault(txn.account_id, []).append(txn)
+    sorted_deposits = {}
+    for account_id, txns in deposits_by_account.items():
+        txns.sort(key=lambda txn: (_cents(txn.amount), txn.date, txn.id))
+        sorted_deposits[account_id] = (txns, [_cents(txn.amount) for txn in txns])
+
+    candidates = []
+    for invoice in invoices:
+        txns, amounts = sorted_deposits.get(invoice.account_id, ((), ()))
+        if not txns:
+            continue
+        remaining = invoice.total - invoice.paid_total
+        remaining_cents = _cents(remaining)
+        tolerance_cents = _cents(remaining * amount_tolerance)
+        lo = bisect_left(amounts, remaining_cents - tolerance_cents)
+        hi = bisect_right(amounts, remaining_cents + tolerance_cents)
+        customer_tokens = _name_tokens(invoice.customer.name)
+        for txn in txns[lo:hi]:
+            if abs((txn.date - invoice.date).days) > window_days:
+                continue
+            score, amount_diff, days_apart = _score(
+                invoice, remaining_cents, txn, customer_tokens, tolerance_cents, window_days
+            )
+            candidates.append((score, invoice, txn, remaining, amount_diff, days_apart))
+
+    candidates.sort(key=lambda item: (-item[0], item[1].date, item[1].id, item[2].id))
+    used_invoices = set()
+    used_transactions = set()
+    proposals = []
+    for score, invoice, txn, remaining, amount_diff, days_apart in candidates:
+        if invoice.id in used_invoices or txn.id in used_transactions:
+            continue
+        used_invoices.add(invoice.id)
+        used_transactions.add(txn.id)
+        proposals.append(
+            MatchProposal(
+                invoice=invoice,
+                transaction=txn,
+                amount=min(remaining, txn.amount),
+                score=round(score, 3),
+                amount_diff=Decimal(amount_diff) / 100,
+                days_apart=days_apart,
+            )
+        )
+    return proposals
+
+
+def parse_match_keys(values):
+    """Turn ``"<invoice_id>:<transaction_id>"`` strings into unique id pairs."""
+    pairs = []
+    seen = set()
+    for value in values:
+        invoice_id, _, txn_id = (value or "").partition(":")
+        if not (invoice_id.isdigit() and txn_id.isdigit()):
+            continue
+        pair = (int(invoice_id), int(txn_id))
+        if pair not in seen:
+            seen.add(pair)
+            pairs.append(pair)
+    return pairs
+
+
+class _AllocationState:
+    """
+    Everything needed to validate a set of allocations, loaded with a fixed
+    number of queries: the invoices and transactions (locked), one pass over
+    their existing InvoicePayments (totals per invoice and per transaction,
+    plus existing pairs) and the first item category of each invoice.
+    """
+
+    def __init__(self, invoice_ids, txn_ids):
+        self.invoices = (
+            Invoice.objects.select_for_update().select_related("customer").in_bulk(invoice_ids)
+        )
+        self.transactions = Transaction.objects.select_for_update().in_bulk(txn_ids)
+        self.invoice_paid = {}
+        self.txn_allocated = {}
+        self.existing_pairs = set()
+        payments = InvoicePayment.objects.filter(
+            Q(invoice_id__in=invoice_ids) | Q(transaction_id__in=txn_ids)
+        ).values_list("invoice_id", "transaction_id", "amount")
+        for invoice_id, txn_id, amount in payments:
+            self.invoice_paid[invoice_id] = self.invoice_paid.get(invoice_id, ZERO) + amount
+            self.txn_allocated[txn_id] = self.txn_allocated.get(txn_id, ZERO) + amount
+            self.existing_pairs.add((invoice_id, txn_id))
+        self.first_category = {}
+        items = (
+            InvoiceItem.objects.filter(invoice_id__in=invoice_ids)
+            .select_related("category")
+            .order_by("invoice_id", "id")
+        )
+        for item in items:
+            self.first_category.setdefault(item.invoice_id, item.category)
+
+    def remaining(self, invoice):
+        return invoice.total - self.invoice_paid.get(invoice.id, ZERO)
+
+    def available(self, txn):
+        return txn.amount - self.txn_allocated.get(txn.id, ZERO)
+
+    def add(self, invoice, txn, amount):
+        self.invoice_paid[invoice.id] = self.invoice_paid.get(invoice.id, ZERO) + amount
+        self.txn_allocated[txn.id] = self.txn_allocated.get(txn.id, ZERO) + amount
+        self.existing_pairs.add((invoice.id, txn.id))
+
+
+def _write_payments(state, allocations):
+    """Bulk-write ``(invoice, txn, amount)`` allocations already added to ``state``."""
+    payments = []
+    changed_txns = {}
+    touched = {}
+    for invoice, txn, amount in allocations:
+        payments.append(InvoicePayment(invoice=invoice, transaction=txn, amount=amount))
+        touched[invoice.id] = invoice
+        # Same categorization as a manual match: first item category + customer.
+        category = state.first_category.get(invoice.id)
+        if category and txn.category_id != category.id:
+            txn.category = category
+            txn.kind = category.kind
+        if invoice.customer_id and txn.vendor_id != invoice.customer_id:
+            txn.vendor_id = invoice.customer_id
+        txn.is_invoice_matched = True
+        changed_txns[txn.id] = txn
+
+    InvoicePayment.objects.bulk_create(payments, batch_size=500)
+    if changed_txns:
+        Transaction.objects.bulk_update(
+            changed_txns.values(), ["category", "kind", "vendor", "is_invoice_matched"], batch_size=500
+        )
+    for invoice in touched.values():
+        invoice.update_status_from_payments(paid=state.invoice_paid.get(invoice.id, ZERO))
+    if touched:
+        Invoice.objects.bulk_update(touched.values(), ["status"], batch_size=500)
+    return len(payments)
+
+
+def apply_invoice_matches(pairs):
+    """
+    Create an InvoicePayment for each ``(invoice_id, transaction_id)`` pair in
+    one transaction, for the smaller of the open balance and the deposit.
+    Pairs that no longer fit (deposit already matched, account mismatch,
+    invoice settled meanwhile) are skipped. Returns ``(applied, skipped)``.
+    """
+    if not pairs:
+        return 0, 0
+    with write_transaction():
+        state = _AllocationState({invoice_id for invoice_id, _ in pairs}, {txn_id for _, txn_id in pairs})
+        allocations = []
+        skipped = 0
+        for invoice_id, txn_id in pairs:
+            invoice = state.invoices.get(invoice_id)
+            txn = state.transactions.get(txn_id)
+            if (
+                invoice is None
+                or txn is None
+                or invoice.status not in OPEN_STATUSES
+                or state.txn_allocated.get(txn_id)
+                or txn.amount <= 0
+                or txn.account_id != invoice.account_id
+                or state.remaining(invoice) <= 0
+            ):
+                skipped += 1
+                continue
+            amount = min(state.remaining(invoice), txn.amount)
+            state.add(invoice, txn, amount)
+            allocations.append((invoice, txn, amount))
+        applied = _write_payments(state, allocations)
+    return applied, skipped
+
+
+def allocate_invoice_payments(allocations):
+    """
+    Apply explicit ``(invoice_id, transaction_id, amount)`` allocations, all or
+    nothing, in one transaction. Every allocation is validated against the
+    balances loaded once up front plus the allocations before it, so several
+    rows may split one deposit or pay one invoice in parts.
+
+    Returns ``(applied, errors)``; when ``errors`` is non-empty nothing was
+    written. Error messages are prefixed with the 1-based allocation number.
+    """
+    if not allocations:
+        return 0, ["No allocations provided."]
+    with write_transaction():
+        state = _AllocationState(
+            {invoice_id for invoice_id, _, _ in allocations},
+            {txn_id for _, txn_id, _ in allocations},
+        )
+        errors = []
+        valid = []
+        for line, (invoice_id, txn_id, amount) in enumerate(allocations, start=1):
+            invoice = state.invoices.get(invoice_id)
+            txn = state.transactions.get(txn_id)
+            if invoice is None:
+                errors.append(f"Allocation {line}: invoice {invoice_id} not found.")
+                continue
+            if txn is None:
+                errors.append(f"Allocation {line}: transaction {txn_id} not found.")
+                continue
+            if amount <= 0:
+                error = "amount must be greater than zero."
+            elif invoice.status == "void":
+                error = f"invoice {invoice.number} is void."
+            elif txn.amount <= 0:
+                error = f"transaction {txn.id} must be positive."
+            elif txn.account_id != invoice.account_id:
+                error = f"transaction {txn.id} account mismatch."
+            elif (invoice.id, txn.id) in state.existing_pairs:
+                error = f"transaction {txn.id} is already matched to invoice {invoice.number}."
+            elif amount > state.available(txn):
+                error = f"transaction {txn.id}: amount {amount} exceeds available {state.available(txn)}."
+            elif amount > state.remaining(invoice):
+                error = f"amount {amount} exceeds invoice {invoice.number} remaining {state.remaining(invoice)}."
+            else:
+                state.add(invoice, txn, amount)
+                valid.append((invoice, txn, amount))
+                continue
+            errors.append(f"Allocation {line}: {error}")
+        if errors:
+            return 0, errors
+        applied = _write_payments(state, valid)
+    return applied, []
+
+
+LUMP_SUM_ORDERS = ("date", "due_date")
+
+
+def allocate_lump_sum(txn_id, customer_id, order="date"):
+    """
+    Spread one deposit across a customer's open invoices in the deposit's
+    account, oldest first (``order="date"``) or earliest due first
+    (``order="due_date"``; invoices without a due date go last). Each invoice
+    gets ``min(open balance, what is left of the deposit)``.
+
+    Runs in one transaction with the deposit and invoices locked. Returns
+    ``(payments_created, amount_allocated, errors)``.
+    """
+    if order not in LUMP_SUM_ORDERS:
+        return 0, ZERO, [f"Unknown allocation order {order!r}."]
+    ordering = ("date", "id") if order == "date" else (F("due_date").asc(nulls_last=True), "date", "id")
+    with write_transaction():
+        txn = Transaction.objects.filter(pk=txn_id).only("id", "account_id").first()
+        if txn is None:
+            return 0, ZERO, [f"Transaction {txn_id} not found."]
+        invoice_ids = list(
+            Invoice.objects.filter(customer_id=customer_id, account_id=txn.account_id, status__in=OPEN_STATUSES)
+            .order_by(*ordering)
+            .values_list("id", flat=True)
+        )
+        state = _AllocationState(invoice_ids, {txn.id})
+        txn = state.transactions[txn.id]
+        if txn.amount <= 0:
+            return 0, ZERO, [f"Transaction {txn.id} must be positive."]
+        available = state.available(txn)
+        if available <= 0:
+            return 0, ZERO, [f"Transaction {txn.id} is already fully allocated."]
+
+        allocations = []
+        for invoice_id in invoice_ids:
+            if available <= 0:
+                break
+            invoice = state.invoices[invoice_id]
+            remaining = state.remaining(invoice)
+            if remaining <= 0 or (invoice.id, txn.id) in state.existing_pairs:
+                continue
+            amount = min(remaining, available)
+            state.add(invoice, txn, amount)
+            allocations.append((invoice, txn, amount))
+            available -= amount
+        if not allocations:
+            return 0, ZERO, ["The customer has no open invoices in this account."]
+        created = _write_payments(state, allocations)
+    return created, sum((amount for _, _, amount in allocations), ZERO), []
+
+
+def parse_allocation_rows(rows):
+    """
+    Turn remittance rows (dicts with ``invoice_number`` or ``invoice_id``,
+    ``transaction_id`` and ``amount``) into ``(invoice_id, transaction_id,
+    amount)`` tuples. Invoice numbers are resolved with a single query.
+    Returns ``(allocations, errors)``.
+    """
+    parsed = []
+    errors = []
+    for line, row in enumerate(rows, start=1):
+        row = {str(key).strip().lower(): str(value if value is not None else "").strip() for key, value in row.items()}
+        invoice_ref = row.get("invoice_number") or row.get("invoice") or ""
+        invoice_id = row.get("invoice_id", "")
+        txn_id = row.get("transaction_id", "")
+        try:
+            amount = Decimal(row.get("amount", "").replace(",", "")).quantize(CENT)
+        except InvalidOperation:
+            amount = None
+        if not (invoice_ref or invoice_id.isdigit()):
+            errors.append(f"Allocation {line}: invoice_number or invoice_id is required.")
+        elif not txn_id.isdigit():
+            errors.append(f"Allocation {line}: transaction_id must be a number.")
+        elif amount is None or not amount.is_finite() or abs(amount) > MAX_PAYMENT_AMOUNT:
+            errors.append(f"Allocation {line}: amount is not a number or is out of range.")
+        else:
+            parsed.append((line, invoice_ref, int(invoice_id) if invoice_id.isdigit() else None, int(txn_id), amount))
+
+    numbers = {invoice_ref for _, invoice_ref, invoice_id, _, _ in parsed if invoice_id is None}
+    ids_by_number = dict(Invoice.objects.filter(number__in=numbers).values_list("number", "id")) if numbers else {}
+    allocations = []
+    for line, invoice_ref, invoice_id, txn_id, amount in parsed:
+        if invoice_id is None:
+            invoice_id = ids_by_number.get(invoice_ref)
+            if invoice_id is None:
+                errors.append(f"Allocation {line}: invoice {invoice_ref} not found.")
+                continue
+        allocations.append((invoice_id, txn_id, amount))
+    return allocations, errors
@@ -0,0 +1,375 @@
+"""
+Seeded synthetic ledger for benchmarks and manual testing.
+
+``generate_ledger`` builds a realistic dataset: a tree of accounts and
+categories, weighted vendors, transactions with yearly and weekly
+seasonality plus growth, transfer pairs, import batches, and invoices and
+bills with full and partial payments. The same seed always produces the
+same data. Rows are written in chunks of ``chunk_size`` with
+``bulk_create`` (plain transactions with COPY on PostgreSQL), so millions of
+transactions fit in bounded memory.
+"""
+
+import math
+import random
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from uuid import UUID
+
+from fincore.db.postgres import bulk_insert
+from fincore.db.writes import write_transaction
+from fincore.models import (
+    Account,
+    Bill,
+    BillItem,
+    BillPayment,
+    Category,
+    DocumentSequence,
+    ImportBatch,
+    Invoice,
+    InvoiceItem,
+    InvoicePayment,
+    Transaction,
+    TransferGroup,
+    Vendor,
+)
+
+DEFAULT_CHUNK_SIZE = 5000
+CENT = Decimal("0.01")
+
+# (parent name, account_type, [children]); a parent without children is a leaf.
+ACCOUNT_TREE = [
+    ("Operating", "checking", ["Operating Checking", "Payroll Checking"]),
+    ("Reserve Savings", "savings", []),
+    ("Cards", "credit_card", ["Corporate Card", "Travel Card"]),
+    ("Petty Cash", "cash", []),
+]
+
+CATEGORY_TREE = {
+    "income": [("Sales", ["Product Sales", "Service Revenue"]), ("Other Income", ["Interest Income"])],
+    "expense": [
+        ("Operations", ["Rent", "Utilities", "Software"]),
+        ("Travel", ["Airfare", "Lodging", "Meals"]),
+        ("Marketing", ["Advertising", "Events"]),
+    ],
+    "payroll": [("Payroll", ["Salaries", "Payroll Taxes"])],
+    "cogs": [("Cost of Goods", ["Materials", "Freight"])],
+}
+
+# Share of generated ledger events by kind; a transfer is two rows.
+KIND_MIX = [("expense", 0.55), ("income", 0.2), ("cogs", 0.1), ("payroll", 0.08), ("transfer", 0.07)]
+
+# (mu, sigma) of the log-normal amount distribution by kind.
+AMOUNT_SHAPE = {
+    "expense": (4.0, 1.1),
+    "income": (6.0, 1.0),
+    "cogs": (5.5, 0.8),
+    "payroll": (7.5, 0.3),
+    "transfer": (7.0, 0.8),
+}
+
+TAX_RATES = [Decimal("0"), Decimal("5"), Decimal("8.25"), Decimal("10")]
+IMPORTED_SHARE = 0.8
+
+
+@dataclass
+class LedgerGenerator:
+    transactions: int = 10_000
+    seed: int = 42
+    years: int = 3
+    end: date = None
+    invoices: int = None
+    bills: int = None
+    vendors: int = None
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+        self.end = self.end or date.today()
+        self.start = self.end - timedelta(days=365 * self.years)
+        if self.invoices is None:
+            self.invoices = max(10, self.transactions // 40)
+        if self.bills is None:
+            self.bills = max(10, self.transactions // 50)
+        if self.vendors is None:
+            self.vendors = max(20, min(2000, self.transactions // 200))
+        self.label = f"S{self.seed}"
+        self.counts = Counter()
+
+    # -- helpers -------------------------------------------------------------
+
+    def _uuid(self):
+        return str(UUID(int=self.rng.getrandbits(128), version=4))
+
+    def _amount(self, kind):
+        mu, sigma = AMOUNT_SHAPE[kind]
+        return Decimal(str(round(max(1.0, self.rng.lognormvariate(mu, sigma)), 2)))
+
+    def _day_weights(self):
+        """Per-day weights: year-end peak, quiet weekends, ~30% growth over the range."""
+        days = (self.end - self.start).days + 1
+        weights = []
+        for offset in range(days):
+            day = self.start + timedelta(days=offset)
+            season = 1 + 0.35 * math.cos(2 * math.pi * (day.month - 12) / 12)
+            weekday = 0.3 if day.weekday() >= 5 else 1.0
+            trend = 1 + 0.3 * offset / days
+            weights.append(season * weekday * trend)
+        return list(accumulate(weights))
+
+    def _dates(self, count):
+        offsets = self.rng.choices(range(len(self._cum_days)), cum_weights=self._cum_days, k=count)
+        return [self.start + timedelta(days=offset) for offset in offsets]
+
+    def _pick(self, population, cum_weights):
+        return self.rng.choices(population, cum_weights=cum_weights, k=1)[0]
+
+    @staticmethod
+    def _zipf(count):
+        return list(accumulate(1 / (rank + 1) for rank in range(count)))
+
+    # -- reference data ------------------------------------------------------
+
+    def _build_accounts(self):
+        parents = Account.objects.bulk_create(
+            [Account(name=f"{self.label} {name}", account_type=kind) for name, kind, _ in ACCOUNT_TREE]
+        )
+        children = Account.objects.bulk_create(
+            [
+                Account(name=f"{self.label} {child}", account_type=parent.account_type, parent=parent)
+                for parent, (_, _, names) in zip(parents, ACCOUNT_TREE)
+                for child in names
+            ]
+        )
+        self.counts["accounts"] += len(parents) + len(children)
+        with_children = {child.parent_id for child in children}
+        self.leaf_accounts = [account for account in parents if account.id not in with_children] + children
+        self.operating = next(account for account in children if account.name.endswith("Operating Checking"))
+
+    def _build_categories(self):
+        self.leaf_categories = {}
+        for kind, groups in CATEGORY_TREE.items():
+            leaves = []
+            for parent_name, names in groups:
+                parent, _ = Category.objects.get_or_create(name=parent_name, kind=kind, parent=None)
+                for name in names:
+                    leaf, _ = Category.objects.get_or_create(name=name, kind=kind, parent=parent)
+                    leaves.append(leaf)
+            self.leaf_categories[kind] = leaves
+        self.counts["categories"] = sum(len(leaves) for leaves in self.leaf_categories.values())
+
+    def _build_vendors(self):
+        payers = self.vendors // 3
+        vendors = Vendor.objects.bulk_create(
+            [
+                Vendor(
+                    name=f"{self.label} {'Customer' if n < payers else 'Supplier'} {n:05d}",
+                    kind="payer" if n < payers else "payee",
+                )
+                for n in range(self.vendors)
+            ]
+        )
+        self.payers = vendors[:payers]
+        self.payees = vendors[payers:]
+        self.payer_weights = self._zipf(len(self.payers))
+        self.payee_weights = self._zipf(len(self.payees))
+        self.counts["vendors"] += len(vendors)
+
+    # -- transactions --------------------------------------------------------
+
+    def _ledger_row(self, kind, when, account, batch):
+        category = self.rng.choice(self.leaf_categories[kind])
+        if kind == "income":
+            vendor = self._pick(self.payers, self.payer_weights)
+        else:
+            vendor = self._pick(self.payees, self.payee_weights)
+        amount = self._amount(kind)
+        return Transaction(
+            date=when,
+            account=account,
+            amount=amount if kind == "income" else -amount,
+            kind=kind,
+            vendor=vendor,
+            category=category,
+            description=f"{vendor.name} {category.name}",
+            is_imported=batch is not None,
+            import_batch=batch,
+            source="csv" if batch is not None else "manual",
+        )
+
+    def _write_transactions(self, count):
+        kinds = [kind for kind, _ in KIND_MIX]
+        kind_weights = list(accumulate(share for _, share in KIND_MIX))
+        for chunk_no, start in enumerate(range(0, count, self.chunk_size), 1):
+            size = min(self.chunk_size, count - start)
+            with write_transaction():
+                batches = ImportBatch.objects.bulk_create(
+                    [
+                        ImportBatch(filename=f"{self.label}-{account.id}-{chunk_no:04d}.csv", account=account, status="imported")
+                        for account in self.leaf_accounts
+                    ]
+                )
+                batch_for = {batch.account_id: batch for batch in batches}
+                rows = []
+                transfers = []
+                budget = size
+                for when in self._dates(size):
+                    if budget <= 0:
+                        break
+                    kind = self.rng.choices(kinds, cum_weights=kind_weights, k=1)[0]
+                    account = self.rng.choice(self.leaf_accounts)
+                    if kind == "transfer" and budget >= 2:
+                        transfers.append((when, account))
+                        budget -= 2
+                        continue
+                    if kind == "transfer":
+                        kind = "expense"
+                    budget -= 1
+                    batch = batch_for[account.id] if self.rng.random() < IMPORTED_SHARE else None
+                    rows.append(self._ledger_row(kind, when, account, batch))
+
+                groups = TransferGroup.objects.bulk_create([TransferGroup(reference=self._uuid()) for _ in transfers])
+                for group, (when, source) in zip(groups, transfers):
+                    target = self.rng.choice([account for account in self.leaf_accounts if account != source])
+                    amount = self._amount("transfer")
+                    for account, signed in ((source, -amount), (target, amount)):
+                        rows.append(
+                            Transaction(
+                                date=when,
+                                account=account,
+                                amount=signed,
+                                kind="transfer",
+                                transfer_group=group,
+                                is_locked=True,
+                                description=f"Transfer {group.reference[:8]}",
+                            )
+                        )
+                bulk_insert(Transaction, rows, batch_size=1000)
+
+                imported = Counter(row.import_batch_id for row in rows if row.import_batch_id)
+                for batch in batches:
+                    batch.committed_count = imported[batch.id]
+                ImportBatch.objects.bulk_update(batches, ["committed_count"])
+            self.counts["transactions"] += len(rows)
+            self.counts["transfer_groups"] += len(groups)
+            self.counts["import_batches"] += len(batches)
+
+    # -- documents -----------------------------------------------------------
+
+    def _paid_amount(self, total, statuses):
+        """Pick a status from ``statuses`` (status -> weight) and the amount already paid."""
+        status = self.rng.choices(list(statuses), weights=list(statuses.values()), k=1)[0]
+        if status == "paid":
+            return status, total
+        if status == "partially_paid":
+            return status, (total * Decimal(str(self.rng.uniform(0.2, 0.8)))).quantize(CENT)
+        return status, Decimal("0.00")
+
+    def _payment(self, document, amount, counterparty, category, kind):
+        when = min(self.end, document.date + timedelta(days=self.rng.randint(0, 45)))
+        return Transaction(
+            date=when,
+            account=self.operating,
+            amount=amount if kind == "income" else -amount,
+            kind=kind,
+            vendor=counterparty,
+            category=category,
+            description=f"{counterparty.name} payment",
+            is_invoice_matched=kind == "income",
+            is_bill_matched=kind != "income",
+        )
+
+    def _write_documents(self, count, name, build):
+        """
+        Write ``count`` invoices or bills. ``build(number, when)`` returns
+        ``(document, items, paid_amount, payment_txn_or_None)``.
+        """
+        model, item_model, payment_model, parent_field = {
+            "invoice": (Invoice, InvoiceItem, InvoicePayment, "invoice"),
+            "bill": (Bill, BillItem, BillPayment, "bill"),
+        }[name]
+        for start in range(0, count, self.chunk_size):
+            size = min(self.chunk_size, count - start)
+            numbers = DocumentSequence.allocate(name, size)
+            built = [build(number, when) for number, when in zip(numbers, self._dates(size))]
+            with write_transaction():
+                documents = model.objects.bulk_create([document for document, _, _, _ in built], batch_size=1000)
+                items = []
+                for document, (_, lines, _, _) in zip(documents, built):
+                    for line in lines:
+                        setattr(line, parent_field, document)
+                        items.append(line)
+                item_model.objects.bulk_create(items, batch_size=1000)
+                paid = [(document, amount, txn) for document, (_, _, amount, txn) in zip(documents, built) if txn]
+                Transaction.objects.bulk_create([txn for _, _, txn in paid], batch_size=1000)
+                payment_model.objects.bulk_create(
+                    [payment_model(**{parent_field: document}, transaction=txn, amount=amount) for document, amount, txn in paid],
+                    batch_size=1000,
+                )
+            self.counts[f"{name}s"] += len(documents)
+            self.counts[f"{name}_items"] += len(items)
+            self.counts[f"{name}_payments"] += len(paid)
+            self.counts["transactions"] += len(paid)
+
+    def _build_invoice(self, number, when):
+        customer = self._pick(self.payers, self.payer_weights)
+        rate = self.rng.choice(TAX_RATES)
+        invoice = Invoice(
+            number=number,
+            customer=customer,
+            account=self.operating,
+            date=when,
+            due_date=when + timedelta(days=30),
+            tax_rate=rate,
+        )
+        items = []
+        for _ in range(self.rng.randint(1, 4)):
+            amount = self._amount("income")
+            exempt = self.rng.random() < 0.1
+            tax = Decimal("0.00") if exempt else (amount * rate / 100).quantize(CENT)
+            category = self.rng.choice(self.leaf_categories["income"])
+            items.append(InvoiceItem(category=category, amount=amount, tax_exempt=exempt, tax=tax, total=amount + tax))
+        invoice.subtotal = sum(item.amount for item in items)
+        invoice.tax_total = sum(item.tax for item in items)
+        invoice.total = invoice.subtotal + invoice.tax_total
+        invoice.status, paid = self._paid_amount(
+            invoice.total, {"paid": 60, "partially_paid": 15, "sent": 18, "draft": 4, "void": 3}
+        )
+        txn = self._payment(invoice, paid, customer, items[0].category, "income") if paid else None
+        return invoice, items, paid, txn
+
+    def _build_bill(self, number, when):
+        vendor = self._pick(self.payees, self.payee_weights)
+        bill = Bill(number=number, vendor=vendor, account=self.operating, date=when)
+        categories = self.leaf_categories["expense"] + self.leaf_categories["cogs"]
+        items = []
+        for _ in range(self.rng.randint(1, 3)):
+            amount = self._amount("expense")
+            items.append(BillItem(category=self.rng.choice(categories), amount=amount, total=amount))
+        bill.subtotal = bill.total = sum(item.amount for item in items)
+        bill.status, paid = self._paid_amount(
+            bill.total, {"paid": 55, "partially_paid": 15, "received": 22, "draft": 5, "void": 3}
+        )
+        txn = self._payment(bill, paid, vendor, items[0].category, items[0].category.kind) if paid else None
+        return bill, items, paid, txn
+
+    # -- entry point ---------------------------------------------------------
+
+    def run(self):
+        self._cum_days = self._day_weights()
+        with write_transaction():
+            self._build_accounts()
+            self._build_categories()
+            self._build_vendors()
+        self._write_transactions(self.transactions)
+        self._write_documents(self.invoices, "invoice", self._build_invoice)
+        self._write_documents(self.bills, "bill", self._build_bill)
+        return self.counts
+
+
+def generate_ledger(**options):
+    """Generate a synthetic ledger; see ``LedgerGenerator`` for options. Returns row counts by table."""
+    return LedgerGenerator(**options).run()
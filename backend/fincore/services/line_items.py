@@ -0,0 +1,60 @@
+"""
+Keyed-diff persistence for invoice and bill line items.
+
+Submitted lines carry the id of the item they were rendered from (blank for
+lines added in the form). Saving compares them to the parent's current items
+and writes only the difference: one ``bulk_update`` for changed lines, one
+``bulk_create`` for new lines and one filtered ``delete`` for removed lines,
+so unchanged items keep their primary keys and a save costs the same number
+of queries whatever the line count.
+"""
+
+MAX_LINE_ITEMS = 500
+# Invoice lines post id, category, description, amount and tax-exempt; bill
+# lines post the first four. DATA_UPLOAD_MAX_NUMBER_FIELDS is sized from these.
+FIELDS_PER_LINE = 5
+
+
+def parse_item_id(value):
+    value = (value or "").strip()
+    return int(value) if value.isdigit() else None
+
+
+def sync_line_items(model, parent_field, parent, lines, fields, existing=None):
+    """
+    Make ``parent``'s ``model`` items match ``lines``.
+
+    ``lines`` are dicts holding every name in ``fields`` plus an optional
+    ``"id"``. An id that does not belong to ``parent`` (or repeats an earlier
+    line's id) is treated as a new line. ``existing`` may pass the parent's
+    already-loaded items to save a query. Returns ``(created, updated, deleted)``.
+    """
+    if existing is None:
+        existing = model.objects.filter(**{parent_field: parent})
+    current = {item.id: item for item in existing}
+
+    to_create = []
+    to_update = []
+    kept = set()
+    for line in lines:
+        item = current.get(line.get("id"))
+        if item is None or item.id in kept:
+            to_create.append(model(**{parent_field: parent}, **{field: line[field] for field in fields}))
+            continue
+        kept.add(item.id)
+        changed = False
+        for field in fields:
+            if getattr(item, field) != line[field]:
+                setattr(item, field, line[field])
+                changed = True
+        if changed:
+            to_update.append(item)
+
+    removed = [item_id for item_id in current if item_id not in kept]
+    if removed:
+        model.objects.filter(**{parent_field: parent}, id__in=removed).delete()
+    if to_update:
+        model.objects.bulk_update(to_update, fields)
+    if to_create:
+        model.objects.bulk_create(to_create)
+    return len(to_create), len(to_update), len(removed)
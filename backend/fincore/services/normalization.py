@@ -0,0 +1,272 @@
+"""
+Columnar normalization for staged CSV imports.
+
+Each mapped column is processed as a whole chunk: the conventions it uses
+(currency symbols, thousands separators, parenthesised negatives, date format)
+are inferred once from a sample, then every value is converted in bulk to
+integer cents or a date ordinal. Errors are keyed by row index so callers can
+attach them to the staged rows.
+"""
+
+import re
+from datetime import date, datetime
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y")
+CURRENCY_SYMBOLS = "$€£¥"
+SAMPLE_SIZE = 200
+
+_DATE_PATTERNS = {
+    "%Y-%m-%d": (re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$"), ("y", "m", "d")),
+    "%m/%d/%Y": (re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$"), ("m", "d", "y")),
+    "%m/%d/%y": (re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{2})$"), ("m", "d", "yy")),
+}
+_PLAIN_AMOUNT = re.compile(r"^([+-]?)(\d+)(?:\.(\d{0,2}))?$")
+_CENT = Decimal("0.01")
+
+
+def cents_to_decimal(cents):
+    """Convert integer cents back into a two-place Decimal."""
+    return Decimal(cents).scaleb(-2).quantize(_CENT)
+
+
+def format_cents(cents):
+    """Render integer cents as a plain signed string (e.g. ``-44.20``)."""
+    sign = "-" if cents < 0 else ""
+    whole, frac = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{frac:02d}"
+
+
+def _sample(values, sample_size):
+    sample = []
+    for value in values:
+        if value:
+            sample.append(value)
+            if len(sample) >= sample_size:
+                break
+    return sample
+
+
+class AmountConventions:
+    """Characters to strip and sign conventions shared by a batch's amount columns."""
+
+    def __init__(self, strip_chars=",$", parentheses=True):
+        self.strip_chars = strip_chars
+        self.parentheses = parentheses
+        self._table = str.maketrans("", "", strip_chars)
+        self._cache = {}
+
+    def __repr__(self):
+        return f"AmountConventions(strip_chars={self.strip_chars!r}, parentheses={self.parentheses})"
+
+    def to_cents(self, raw):
+        """
+        Parse one stripped, non-empty value into integer cents.
+        Raises InvalidOperation for values the legacy Decimal parser would reject.
+        """
+        cached = self._cache.get(raw)
+        if cached is not None:
+            return cached
+        text = raw.translate(self._table)
+        if self.parentheses and text.startswith("(") and text.endswith(")"):
+            text = f"-{text[1:-1]}"
+        match = _PLAIN_AMOUNT.match(text)
+        if match:
+            sign, whole, frac = match.groups()
+            cents = int(whole) * 100 + int((frac or "").ljust(2, "0"))
+            if sign == "-":
+                cents = -cents
+        else:
+            try:
+                value = Decimal(text)
+            except ValueError:
+                raise InvalidOperation(raw)
+            if not value.is_finite():
+                raise InvalidOperation(raw)
+            cents = int(value.quantize(_CENT, rounding=ROUND_HALF_EVEN).scaleb(2))
+        self._cache[raw] = cents
+        return cents
+
+
+def infer_amount_conventions(*columns, sample_size=SAMPLE_SIZE):
+    """
+    Inspect a sample of every amount column and decide which characters to strip.
+    Commas and dollar signs are always treated as formatting (legacy behaviour);
+    other currency symbols are stripped only when they appear in the sample.
+    """
+    strip = {",", "$"}
+    for column in columns:
+        for value in _sample(column, sample_size):
+            for char in CURRENCY_SYMBOLS:
+                if char in value:
+                    strip.add(char)
+    return AmountConventions(strip_chars="".join(sorted(strip)), parentheses=True)
+
+
+def _normalize_text(value):
+    return str(value or "").strip()
+
+
+def normalize_amount_columns(
+    columns, amount_strategy, indicator_credit="", indicator_debit="", conventions=None
+):
+    """
+    Convert the amount-related columns of a batch into signed integer cents.
+
+    ``columns`` maps a target ("amount", "indicator", "debit", "credit") to the
+    list of raw values for that column. Returns ``(cents, errors)`` where
+    ``cents`` has one entry per row (None on error) and ``errors`` maps row index
+    to a list of messages. Messages match the per-row validator used before.
+    """
+    row_count = max((len(values) for values in columns.values()), default=0)
+    cents = [None] * row_count
+    errors = {}
+
+    def column(name):
+        values = columns.get(name)
+        if values is None:
+            return [""] * row_count
+        return [_normalize_text(value) for value in values]
+
+    if amount_strategy == "signed":
+        amounts = column("amount")
+        conventions = conventions or infer_amount_conventions(amounts)
+        for idx, raw in enumerate(amounts):
+            if not raw:
+                errors[idx] = ["Missing amount value."]
+                continue
+            try:
+                cents[idx] = conventions.to_cents(raw)
+            except InvalidOperation:
+                errors[idx] = ["Invalid amount value."]
+
+    elif amount_strategy == "indicator":
+        amounts = column("amount")
+        indicators = column("indicator")
+        conventions = conventions or infer_amount_conventions(amounts)
+        credit_lower = (indicator_credit or "").strip().lower()
+        debit_lower = (indicator_debit or "").strip().lower()
+        for idx, (raw_amount, raw_indicator) in enumerate(zip(amounts, indicators)):
+            row_errors = []
+            if not raw_amount:
+                row_errors.append("Missing amount value.")
+            if not raw_indicator:
+                row_errors.append("Missing indicator value.")
+            if row_errors:
+                errors[idx] = row_errors
+                continue
+            try:
+                unsigned = abs(conventions.to_cents(raw_amount))
+            except InvalidOperation:
+                errors[idx] = ["Invalid amount value."]
+                continue
+            ind_lower = raw_indicator.lower()
+            if credit_lower and ind_lower == credit_lower:
+                cents[idx] = unsigned
+            elif debit_lower and ind_lower == debit_lower:
+                cents[idx] = -unsigned
+            else:
+                errors[idx] = [f"Unknown indicator '{raw_indicator}'."]
+
+    elif amount_strategy == "split_columns":
+        debits = column("debit")
+        credits = column("credit")
+        conventions = conventions or infer_amount_conventions(debits, credits)
+        for idx, (raw_debit, raw_credit) in enumerate(zip(debits, credits)):
+            if raw_debit and raw_credit:
+                errors[idx] = ["Both debit and credit populated."]
+                continue
+            if not raw_debit and not raw_credit:
+                errors[idx] = ["Both debit and credit empty."]
+                continue
+            try:
+                if raw_debit:
+                    cents[idx] = -abs(conventions.to_cents(raw_debit))
+                else:
+                    cents[idx] = abs(conventions.to_cents(raw_credit))
+            except InvalidOperation:
+                errors[idx] = ["Invalid amount value."]
+
+    else:
+        for idx in range(row_count):
+            errors[idx] = ["Unknown amount strategy."]
+
+    return cents, errors
+
+
+def _fast_date_parser(fmt):
+    pattern, order = _DATE_PATTERNS[fmt]
+
+    def parse(raw):
+        match = pattern.match(raw)
+        if not match:
+            return None
+        parts = dict(zip(order, match.groups()))
+        if "yy" in parts:
+            short_year = int(parts["yy"])
+            year = 2000 + short_year if short_year < 69 else 1900 + short_year
+        else:
+            year = int(parts["y"])
+        try:
+            return date(year, int(parts["m"]), int(parts["d"]))
+        except ValueError:
+            return None
+
+    return parse
+
+
+def parse_date_any(raw):
+    """Try every supported format in order (the per-row fallback path)."""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def infer_date_format(values, sample_size=SAMPLE_SIZE):
+    """Return the supported format that parses the most sampled values, or None."""
+    sample = [_normalize_text(value) for value in _sample(values, sample_size)]
+    best_format = None
+    best_hits = 0
+    for fmt in DATE_FORMATS:
+        parse = _fast_date_parser(fmt)
+        hits = sum(1 for value in sample if parse(value))
+        if hits > best_hits:
+            best_format, best_hits = fmt, hits
+            if hits == len(sample):
+                break
+    return best_format
+
+
+def normalize_date_column(values, date_format=None):
+    """
+    Convert a raw date column into date ordinals.
+
+    Returns ``(ordinals, errors, date_format)``. The inferred format is applied to
+    every value; values it cannot read fall back to trying all supported formats
+    so mixed-format files keep working.
+    """
+    date_format = date_format or infer_date_format(values)
+    fast_parse = _fast_date_parser(date_format) if date_format in _DATE_PATTERNS else None
+    ordinals = [None] * len(values)
+    errors = {}
+    cache = {}
+    for idx, value in enumerate(values):
+        raw = _normalize_text(value)
+        if not raw:
+            errors[idx] = ["Missing date value."]
+            continue
+        ordinal = cache.get(raw)
+        if ordinal is None:
+            parsed = fast_parse(raw) if fast_parse else None
+            if parsed is None:
+                parsed = parse_date_any(raw)
+            ordinal = parsed.toordinal() if parsed else 0
+            cache[raw] = ordinal
+        if ordinal:
+            ordinals[idx] = ordinal
+        else:
+            errors[idx] = ["Invalid date value."]
+    return ordinals, errors, date_format
@@ -0,0 +1,186 @@
+"""
+Recurring invoice and bill generation.
+
+A run loads every active template due on or before the run date (with its
+items) up front, expands each into the periods it has missed, and writes the
+documents in chunks of templates. Each chunk is one short transaction: skip
+periods that already have a document, reserve a block of numbers from the
+``DocumentSequence``, ``bulk_create`` the headers and then the items, and
+move the templates' ``next_run_date`` forward. A (template, period) pair is
+unique on both documents, so re-running a period creates nothing.
+"""
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+from fincore.db.writes import write_transaction
+from fincore.models import Bill, BillItem, DocumentSequence, Invoice, InvoiceItem, RecurringTemplate
+
+DEFAULT_CHUNK_SIZE = 500
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+
+
+@dataclass
+class RecurringRunResult:
+    invoices: int = 0
+    bills: int = 0
+    skipped: int = 0
+    templates: int = 0
+    periods: list = field(default_factory=list)
+
+
+def due_templates(run_date, kind=None):
+    queryset = (
+        RecurringTemplate.objects.filter(is_active=True, next_run_date__lte=run_date)
+        .select_related("counterparty", "account")
+        .prefetch_related("items")
+        .order_by("id")
+    )
+    if kind:
+        queryset = queryset.filter(kind=kind)
+    return list(queryset)
+
+
+def due_periods(template, run_date):
+    """Period dates from ``next_run_date`` up to ``run_date`` (catching up missed runs)."""
+    periods = []
+    period = template.next_run_date
+    while period <= run_date and template.is_open_for(period):
+        periods.append(period)
+        period = template.period_after(period)
+    return periods, period
+
+
+def _invoice_document(template, period, number):
+    items = []
+    subtotal = tax_total = ZERO
+    for line in template.items.all():
+        if template.tax_exclude or line.tax_exempt:
+            tax = ZERO
+        else:
+            tax = (line.amount * (template.tax_rate / Decimal("100"))).quantize(CENT)
+        items.append(
+            InvoiceItem(
+                category_id=line.category_id,
+                description=line.description,
+                amount=line.amount,
+                tax_exempt=line.tax_exempt,
+                tax=tax,
+                total=(line.amount + tax).quantize(CENT),
+            )
+        )
+        subtotal += line.amount
+        tax_total += tax
+    header = Invoice(
+        number=number,
+        customer_id=template.counterparty_id,
+        account_id=template.account_id,
+        date=period,
+        due_date=period + timedelta(days=template.due_days),
+        status="draft",
+        subtotal=subtotal,
+        tax_rate=template.tax_rate,
+        tax_exclude=template.tax_exclude,
+        tax_total=tax_total,
+        total=subtotal + tax_total,
+        notes=template.notes,
+        recurring_template=template,
+        recurring_period=period,
+    )
+    return header, items
+
+
+def _bill_document(template, period, number):
+    items = [
+        BillItem(
+            category_id=line.category_id,
+            description=line.description,
+            amount=line.amount,
+            total=line.amount.quantize(CENT),
+        )
+        for line in template.items.all()
+    ]
+    subtotal = sum((item.amount for item in items), ZERO)
+    header = Bill(
+        number=number,
+        vendor_id=template.counterparty_id,
+        account_id=template.account_id,
+        date=period,
+        status="draft",
+        subtotal=subtotal,
+        total=subtotal,
+        notes=template.notes,
+        recurring_template=template,
+        recurring_period=period,
+    )
+    return header, items
+
+
+DOCUMENTS = {
+    "invoice": (Invoice, InvoiceItem, "invoice", _invoice_document),
+    "bill": (Bill, BillItem, "bill", _bill_document),
+}
+
+
+def _write_documents(kind, occurrences):
+    """Create one document per ``(template, period)``; returns how many were created."""
+    model, item_model, parent_field, build = DOCUMENTS[kind]
+    numbers = DocumentSequence.allocate(kind, len(occurrences))
+    headers = []
+    lines = []
+    for (template, period), number in zip(occurrences, numbers):
+        header, items = build(template, period, number)
+        headers.append(header)
+        lines.append(items)
+    model.objects.bulk_create(headers)
+    if headers and headers[0].pk is None:
+        ids = dict(model.objects.filter(number__in=numbers).values_list("number", "id"))
+        for header in headers:
+            header.pk = ids[header.number]
+    for header, items in zip(headers, lines):
+        for item in items:
+            setattr(item, parent_field, header)
+    item_model.objects.bulk_create([item for items in lines for item in items])
+    return len(headers)
+
+
+def generate_recurring(run_date, kind=None, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """Generate every document due on or before ``run_date``."""
+    result = RecurringRunResult()
+    templates = due_templates(run_date, kind)
+    result.templates = len(templates)
+    for start in range(0, len(templates), chunk_size):
+        chunk = templates[start : start + chunk_size]
+        planned = {"invoice": [], "bill": []}
+        for template in chunk:
+            periods, next_period = due_periods(template, run_date)
+            template.next_run_date = next_period
+            planned[template.kind].extend((template, period) for period in periods)
+        if dry_run:
+            result.periods.extend(planned["invoice"] + planned["bill"])
+            continue
+
+        with write_transaction():
+            for doc_kind, occurrences in planned.items():
+                if not occurrences:
+                    continue
+                model = DOCUMENTS[doc_kind][0]
+                existing = set(
+                    model.objects.filter(
+                        recurring_template_id__in={template.id for template, _ in occurrences},
+                        recurring_period__in={period for _, period in occurrences},
+                    ).values_list("recurring_template_id", "recurring_period")
+                )
+                fresh = [(template, period) for template, period in occurrences if (template.id, period) not in existing]
+                result.skipped += len(occurrences) - len(fresh)
+                if not fresh:
+                    continue
+                created = _write_documents(doc_kind, fresh)
+                if doc_kind == "invoice":
+                    result.invoices += created
+                else:
+                    result.bills += created
+            RecurringTemplate.objects.bulk_update(chunk, ["next_run_date"])
+    return result
@@ -0,0 +1,101 @@
+"""
+Sales tax liability from invoice line items.
+
+Both bases are a single grouped aggregate over ``InvoiceItem``:
+
+* accrual: lines of non-void invoices dated in the range, by invoice date;
+* cash: the same lines joined to each ``InvoicePayment`` whose transaction is
+  dated in the range, every amount scaled by ``payment / invoice total`` so a
+  partial payment collects the same share of each line's tax. Grouped by the
+  payment's transaction date.
+
+A line is exempt when it is marked ``tax_exempt`` or its invoice has
+``tax_exclude``; everything else is taxable.
+"""
+
+from decimal import Decimal
+
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, TruncMonth, TruncQuarter
+
+from fincore.models import InvoiceItem
+
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+
+BASES = [("accrual", "Accrual (invoiced)"), ("cash", "Cash (received)")]
+PERIODS = [("month", "Month"), ("quarter", "Quarter")]
+GROUPS = [("rate", "Tax rate"), ("customer", "Customer")]
+_TRUNC = {"month": TruncMonth, "quarter": TruncQuarter}
+
+
+def _money():
+    return DecimalField(max_digits=14, decimal_places=4)
+
+
+def _sum(expression, condition=None):
+    if condition is not None:
+        expression = Case(When(condition, then=expression), default=Value(ZERO), output_field=_money())
+    return Coalesce(Sum(expression, output_field=_money()), Value(ZERO), output_field=_money())
+
+
+def sales_tax_summary(start_date=None, end_date=None, basis="accrual", period="month", group_by="rate"):
+    """
+    Rows of ``period``, ``rate`` or ``customer_id``/``customer``, ``taxable``,
+    ``exempt``, ``tax`` and ``invoices``, ordered by period. Returns
+    ``(rows, totals)``.
+    """
+    items = InvoiceItem.objects.exclude(invoice__status="void")
+    if basis == "cash":
+        date_field = "invoice__payments__transaction__date"
+        bounds = {"invoice__total__gt": 0}
+        if start_date:
+            bounds[f"{date_field}__gte"] = start_date
+        if end_date:
+            bounds[f"{date_field}__lte"] = end_date
+        # One filter() call, so the range and the annotations below share the payments join.
+        items = items.filter(invoice__payments__isnull=False, **bounds)
+        payment = F("invoice__payments__amount")
+    else:
+        date_field = "invoice__date"
+        if start_date:
+            items = items.filter(invoice__date__gte=start_date)
+        if end_date:
+            items = items.filter(invoice__date__lte=end_date)
+        payment = None
+
+    def scaled(field_name):
+        if payment is None:
+            return F(field_name)
+        # Multiply before dividing, and divide by a float so SQLite does not
+        # truncate to an integer when both sides are whole amounts.
+        return ExpressionWrapper(
+            F(field_name) * payment / Cast("invoice__total", FloatField()), output_field=_money()
+        )
+
+    exempt = Q(tax_exempt=True) | Q(invoice__tax_exclude=True)
+    keys = {"rate": F("invoice__tax_rate")}
+    if group_by == "customer":
+        keys = {"customer_id": F("invoice__customer_id"), "customer": F("invoice__customer__name")}
+    rows = list(
+        items.annotate(period=_TRUNC[period](date_field))
+        .values("period", **keys)
+        .annotate(
+            taxable=_sum(scaled("amount"), ~exempt),
+            exempt=_sum(scaled("amount"), exempt),
+            tax=_sum(scaled("tax")),
+            invoices=Count("invoice", distinct=True),
+        )
+        .order_by("period", *keys)
+    )
+    for row in rows:
+        for field in ("taxable", "exempt", "tax"):
+            row[field] = Decimal(row[field]).quantize(CENT)
+    totals = {field: sum((row[field] for row in rows), ZERO) for field in ("taxable", "exempt", "tax")}
+    return rows, totals
+
+
+def period_label(value, period):
+    if period == "quarter":
+        return f"Q{(value.month - 1) // 3 + 1} {value.year}"
+    return value.strftime("%b %Y")
@@ -0,0 +1,339 @@
+"""
+Streaming parsers for bank statement files (OFX/QFX and ISO 20022 CAMT.053).
+
+Both parsers read the upload incrementally and yield one entry per statement
+line, so memory stays flat on multi-year files. Entries are plain dicts:
+
+    {"external_id", "date", "cents", "description", "payee", "raw"}
+
+``date`` is a ``datetime.date`` (or None), ``cents`` signed integer cents (or
+None) and ``raw`` the source fields as strings for ``ImportRow.raw_row``. The
+bank's own transaction id (OFX FITID, CAMT AcctSvcrRef) is carried through as
+``external_id`` so re-imports can be de-duplicated exactly.
+
+No Django imports here, matching ``csv_staging``.
+"""
+
+import html
+import io
+import re
+import xml.etree.ElementTree as ET
+from datetime import date
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+
+from .normalization import format_cents
+
+CHUNK_SIZE = 64 * 1024
+SNIFF_SIZE = 4096
+MAX_TEXT_LENGTH = 255
+
+_OFX_TOKEN = re.compile(r"<(/?)([A-Za-z0-9._]+)[^>]*>|([^<]+)")
+_OFX_DATE = re.compile(r"^(\d{4})(\d{2})(\d{2})")
+_CENT = Decimal("0.01")
+
+
+class StatementParseError(Exception):
+    """Raised when a statement file cannot be read."""
+
+
+def detect_format(head, filename=""):
+    """Return "ofx", "camt053" or "" from the first bytes of a file (and its name)."""
+    sample = head[:SNIFF_SIZE].decode("latin-1", errors="replace")
+    upper = sample.upper()
+    if "OFXHEADER" in upper or "<OFX>" in upper:
+        return "ofx"
+    if "camt.053" in sample or "<BkToCstmrStmt" in sample:
+        return "camt053"
+    lower_name = filename.lower()
+    if lower_name.endswith((".ofx", ".qfx")):
+        return "ofx"
+    return ""
+
+
+def _amount_to_cents(text):
+    text = (text or "").strip().replace(" ", "")
+    if text.rfind(",") > text.rfind("."):
+        # Decimal comma (e.g. "1.000,50" or "12,50").
+        text = text.replace(".", "").replace(",", ".")
+    else:
+        text = text.replace(",", "")
+    try:
+        value = Decimal(text)
+    except (InvalidOperation, ValueError):
+        return None
+    if not value.is_finite():
+        return None
+    return int(value.quantize(_CENT, rounding=ROUND_HALF_EVEN).scaleb(2))
+
+
+def _clip(text):
+    return " ".join((text or "").split())[:MAX_TEXT_LENGTH]
+
+
+# ── OFX / QFX ────────────────────────────────────────────────────────────────
+
+
+def _ofx_encoding(head):
+    """OFX 1.x (SGML) files are usually Windows-1252; OFX 2.x is XML/UTF-8."""
+    header = head[:SNIFF_SIZE].upper()
+    if b"<?XML" in header or b"ENCODING:UTF-8" in header or b"CHARSET:UTF-8" in header:
+        return "utf-8"
+    return "cp1252"
+
+
+def _ofx_tokens(text_stream, chunk_size=CHUNK_SIZE):
+    """
+    Yield ("start" | "end", TAG) and ("text", value) tokens. Tolerates SGML
+    leaf elements without closing tags; a partial tag at a chunk boundary is
+    carried over to the next read.
+    """
+    buffer = ""
+    while True:
+        chunk = text_stream.read(chunk_size)
+        buffer += chunk
+        if chunk:
+            cut = buffer.rfind("<")
+            if cut <= 0:
+                continue
+            ready, buffer = buffer[:cut], buffer[cut:]
+        else:
+            ready, buffer = buffer, ""
+        for match in _OFX_TOKEN.finditer(ready):
+            closing, tag, text = match.groups()
+            if tag:
+                yield ("end" if closing else "start"), tag.upper()
+            else:
+                text = text.strip()
+                if text:
+                    yield "text", html.unescape(text)
+        if not chunk:
+            break
+
+
+def _ofx_entry(fields):
+    match = _OFX_DATE.match(fields.get("DTPOSTED", ""))
+    posted = None
+    if match:
+        try:
+            posted = date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            posted = None
+    name = fields.get("NAME", "")
+    memo = fields.get("MEMO", "")
+    description = name if not memo or memo == name else f"{name} {memo}".strip()
+    return {
+        "external_id": fields.get("FITID", "").strip(),
+        "date": posted,
+        "cents": _amount_to_cents(fields.get("TRNAMT", "")),
+        "description": _clip(description),
+        "payee": _clip(name),
+        "raw": fields,
+    }
+
+
+def iter_ofx_entries(binary_stream):
+    """Stream STMTTRN records from an OFX 1.x (SGML) or 2.x (XML) file."""
+    head = binary_stream.read(SNIFF_SIZE)
+    encoding = _ofx_encoding(head)
+    stream = io.TextIOWrapper(
+        io.BufferedReader(_Prefixed(head, binary_stream)), encoding=encoding, errors="replace"
+    )
+
+    fields = None
+    leaf = None
+    for kind, value in _ofx_tokens(stream):
+        if kind == "start":
+            if value == "STMTTRN":
+                fields = {}
+                leaf = None
+            else:
+                leaf = value
+        elif kind == "text":
+            if fields is not None and leaf:
+                fields.setdefault(leaf, value)
+        else:
+            if value == "STMTTRN" and fields is not None:
+                yield _ofx_entry(fields)
+                fields = None
+            leaf = None
+    if fields:
+        # Truncated file: keep the last complete-looking record.
+        yield _ofx_entry(fields)
+
+
+class _Prefixed(io.RawIOBase):
+    """Re-attach sniffed bytes to the front of a non-seekable stream."""
+
+    def __init__(self, head, stream):
+        self._head = head
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._head:
+            size = min(len(buffer), len(self._head))
+            buffer[:size] = self._head[:size]
+            self._head = self._head[size:]
+            return size
+        data = self._stream.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        return size
+
+
+# ── CAMT.053 ─────────────────────────────────────────────────────────────────
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child(elem, *path):
+    """Follow ``path`` by local tag name, ignoring namespaces. Returns None if missing."""
+    for name in path:
+        if elem is None:
+            return None
+        elem = next((child for child in elem if _local(child.tag) == name), None)
+    return elem
+
+
+def _text(elem, *path):
+    found = _child(elem, *path)
+    return (found.text or "").strip() if found is not None else ""
+
+
+def _party_name(details, role):
+    # camt.053.001.02 uses RltdPties/Cdtr/Nm; later versions nest it in Pty.
+    return _text(details, "RltdPties", role, "Nm") or _text(details, "RltdPties", role, "Pty", "Nm")
+
+
+def _camt_entry(entry):
+    status = _text(entry, "Sts") or _text(entry, "Sts", "Cd")
+    indicator = _text(entry, "CdtDbtInd")
+    amount = _child(entry, "Amt")
+    cents = _amount_to_cents(amount.text if amount is not None else "")
+    if cents is not None and indicator == "DBIT":
+        cents = -abs(cents)
+    elif cents is not None:
+        cents = abs(cents)
+
+    booked = _text(entry, "BookgDt", "Dt") or _text(entry, "BookgDt", "DtTm")[:10]
+    value_date = _text(entry, "ValDt", "Dt") or _text(entry, "ValDt", "DtTm")[:10]
+    posted = None
+    for candidate in (booked, value_date):
+        try:
+            posted = date.fromisoformat(candidate)
+            break
+        except ValueError:
+            continue
+
+    details = _child(entry, "NtryDtls", "TxDtls")
+    end_to_end = _text(details, "Refs", "EndToEndId")
+    if end_to_end == "NOTPROVIDED":
+        end_to_end = ""
+    # Only the bank's own reference identifies an entry. EndToEndId is chosen by
+    # the payer and repeats across recurring and batch payments, and NtryRef is
+    # unique only within one statement; without AcctSvcrRef the row is staged
+    # like a CSV row.
+    external_id = _text(entry, "AcctSvcrRef") or _text(details, "Refs", "AcctSvcrRef")
+
+    remittance = ""
+    if details is not None:
+        remittance_info = _child(details, "RmtInf")
+        if remittance_info is not None:
+            remittance = " ".join(
+                (child.text or "").strip() for child in remittance_info if _local(child.tag) == "Ustrd"
+            )
+    description = remittance or _text(details, "AddtlTxInf") or _text(entry, "AddtlNtryInf")
+    payee = _party_name(details, "Cdtr" if indicator == "DBIT" else "Dbtr") if details is not None else ""
+
+    raw = {
+        "Amt": amount.text.strip() if amount is not None and amount.text else "",
+        "Ccy": amount.get("Ccy", "") if amount is not None else "",
+        "CdtDbtInd": indicator,
+        "Sts": status,
+        "BookgDt": booked,
+        "ValDt": value_date,
+        "AcctSvcrRef": _text(entry, "AcctSvcrRef"),
+        "EndToEndId": end_to_end,
+        "Counterparty": payee,
+        "Description": description,
+    }
+    return status, {
+        "external_id": external_id,
+        "date": posted,
+        "cents": cents,
+        "description": _clip(description or payee),
+        "payee": _clip(payee),
+        "raw": raw,
+    }
+
+
+def iter_camt053_entries(binary_stream):
+    """
+    Stream booked ``Ntry`` elements from a CAMT.053 file with ``iterparse``.
+    Processed entries are removed from their parent statement so the tree
+    never grows; pending (PDNG) entries are skipped until the bank books them.
+    """
+    statement = None
+    try:
+        for event, elem in ET.iterparse(binary_stream, events=("start", "end")):
+            name = _local(elem.tag)
+            if event == "start":
+                if name == "Stmt":
+                    statement = elem
+                continue
+            if name != "Ntry":
+                continue
+            status, entry = _camt_entry(elem)
+            if statement is not None:
+                statement.remove(elem)
+            else:
+                elem.clear()
+            if status == "PDNG":
+                continue
+            yield entry
+    except ET.ParseError as exc:
+        raise StatementParseError(f"Could not parse CAMT.053 XML: {exc}") from exc
+
+
+# ── Staging rows ─────────────────────────────────────────────────────────────
+
+
+def statement_rows(entries):
+    """
+    Convert parsed entries into ``(raw_row, mapped, errors)`` tuples using the
+    same mapped keys as CSV staging (plus ``payee`` and ``external_id``).
+    """
+    for entry in entries:
+        errors = []
+        mapped = {
+            "description": entry["description"],
+            "payee": entry["payee"],
+            "external_id": entry["external_id"],
+        }
+        if entry["date"] is None:
+            errors.append("Invalid date value.")
+        else:
+            mapped["date"] = entry["date"].isoformat()
+            mapped["date_ordinal"] = entry["date"].toordinal()
+        if entry["cents"] is None:
+            errors.append("Invalid amount value.")
+        else:
+            mapped["amount_cents"] = entry["cents"]
+            mapped["signed_amount"] = format_cents(entry["cents"])
+        yield entry["raw"], mapped, errors
+
+
+def iter_statement_rows(binary_stream, filename=""):
+    """Detect the file format and stream staging rows. Returns ``(format, rows)``."""
+    head = binary_stream.read(SNIFF_SIZE)
+    statement_format = detect_format(head, filename)
+    stream = io.BufferedReader(_Prefixed(head, binary_stream))
+    if statement_format == "ofx":
+        return statement_format, statement_rows(iter_ofx_entries(stream))
+    if statement_format == "camt053":
+        return statement_format, statement_rows(iter_camt053_entries(stream))
+    raise StatementParseError("Unrecognised statement file. Upload an OFX/QFX or CAMT.053 XML file.")
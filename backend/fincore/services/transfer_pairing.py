@@ -0,0 +1,165 @@
+"""
+Ledger-wide transfer pairing.
+
+Unpaired, unlocked transactions are loaded once and bucketed by absolute
+amount in integer cents. Within a bucket, outflows are matched to inflows in
+other accounts no more than ``window_days`` apart, taken greedily in a fixed
+order (nearest date, then most similar description, then lowest ids), so the
+same ledger always pairs the same way.
+
+Pairing writes happen in chunks, each chunk one short transaction that
+bulk-creates its ``TransferGroup`` rows and re-checks that both sides are
+still unpaired.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from uuid import uuid4
+
+from fincore.db.writes import write_transaction
+from fincore.models import Transaction, TransferGroup
+
+DEFAULT_WINDOW_DAYS = 30
+DEFAULT_CHUNK_SIZE = 1000
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+@dataclass(frozen=True)
+class TransferCandidate:
+    id: int
+    account_id: int
+    date: date
+    cents: int
+    description: str
+
+
+@dataclass(frozen=True)
+class TransferPair:
+    outflow: TransferCandidate
+    inflow: TransferCandidate
+    days_apart: int
+    similarity: float
+
+
+def _tokens(text):
+    return set(_WORD.findall((text or "").lower()))
+
+
+def load_candidates(account_ids=None):
+    """Unpaired, unlocked, non-zero transactions not already matched to an invoice or bill."""
+    queryset = (
+        Transaction.objects.reportable()
+        .filter(transfer_group__isnull=True, is_locked=False)
+        .exclude(amount=0)
+        .filter(is_invoice_matched=False, is_bill_matched=False)
+    )
+    if account_ids:
+        queryset = queryset.filter(account_id__in=account_ids)
+    return [
+        TransferCandidate(txn_id, account_id, txn_date, int((amount * 100).to_integral_value()), description or "")
+        for txn_id, account_id, txn_date, amount, description in queryset.values_list(
+            "id", "account_id", "date", "amount", "description"
+        ).iterator(chunk_size=5000)
+    ]
+
+
+def _pair_bucket(outflows, inflows, window_days, tokens):
+    """
+    Greedy pairing for one amount bucket, nearest date first. Day distances
+    are visited in increasing order (0, 1, 2, ...), and at each distance only
+    still-unused rows are looked up by date, so dense buckets (a recurring
+    sweep amount) never build the full cross product.
+    """
+    inflows_by_date = {}
+    for inflow in inflows:
+        inflows_by_date.setdefault(inflow.date, []).append(inflow)
+    open_outflows = sorted(outflows, key=lambda item: (item.date, item.id))
+    used = set()
+    pairs = []
+    for distance in range(window_days + 1):
+        if not open_outflows:
+            break
+        offsets = (timedelta(days=distance), timedelta(days=-distance)) if distance else (timedelta(0),)
+        options = []
+        for outflow in open_outflows:
+            for offset in offsets:
+                for inflow in inflows_by_date.get(outflow.date + offset, ()):
+                    if inflow.id in used or inflow.account_id == outflow.account_id:
+                        continue
+                    # Jaccard overlap of the two descriptions' words.
+                    left, right = tokens[outflow.id], tokens[inflow.id]
+                    similarity = len(left & right) / len(left | right) if left and right else 0.0
+                    options.append((-similarity, outflow.id, inflow.id, outflow, inflow))
+        if not options:
+            continue
+        options.sort(key=lambda option: option[:3])
+        for negative_similarity, _, _, outflow, inflow in options:
+            if outflow.id in used or inflow.id in used:
+                continue
+            used.add(outflow.id)
+            used.add(inflow.id)
+            pairs.append(TransferPair(outflow, inflow, distance, -negative_similarity))
+        open_outflows = [outflow for outflow in open_outflows if outflow.id not in used]
+    return pairs
+
+
+def propose_transfer_pairs(candidates, window_days=DEFAULT_WINDOW_DAYS):
+    """Resolve candidates into disjoint pairs, deterministically."""
+    buckets = {}
+    for candidate in candidates:
+        outflows, inflows = buckets.setdefault(abs(candidate.cents), ([], []))
+        (outflows if candidate.cents < 0 else inflows).append(candidate)
+
+    proposals = []
+    for outflows, inflows in buckets.values():
+        if not outflows or not inflows:
+            continue
+        tokens = {item.id: _tokens(item.description) for item in outflows + inflows}
+        proposals.extend(_pair_bucket(outflows, inflows, window_days, tokens))
+    proposals.sort(key=lambda pair: (pair.outflow.date, pair.outflow.id))
+    return proposals
+
+
+def create_transfer_groups(pairs, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Pair ``pairs`` in chunks. A pair is skipped when either side was paired,
+    locked, matched to an invoice or bill, or deleted after it was proposed. Returns ``(paired, skipped)``.
+    """
+    paired = skipped = 0
+    for start in range(0, len(pairs), chunk_size):
+        chunk = pairs[start : start + chunk_size]
+        ids = [txn_id for pair in chunk for txn_id in (pair.outflow.id, pair.inflow.id)]
+        with write_transaction():
+            still_open = set(
+                Transaction.objects.select_for_update()
+                .filter(
+                    id__in=ids,
+                    transfer_group__isnull=True,
+                    is_locked=False,
+                    is_invoice_matched=False,
+                    is_bill_matched=False,
+                )
+                .values_list("id", flat=True)
+            )
+            ready = [pair for pair in chunk if pair.outflow.id in still_open and pair.inflow.id in still_open]
+            skipped += len(chunk) - len(ready)
+            if not ready:
+                continue
+            references = [str(uuid4()) for _ in ready]
+            TransferGroup.objects.bulk_create([TransferGroup(reference=reference) for reference in references])
+            group_ids = dict(
+                TransferGroup.objects.filter(reference__in=references).values_list("reference", "id")
+            )
+            updates = []
+            for pair, reference in zip(ready, references):
+                group_id = group_ids[reference]
+                updates.append(Transaction(id=pair.outflow.id, transfer_group_id=group_id))
+                updates.append(Transaction(id=pair.inflow.id, transfer_group_id=group_id))
+            Transaction.objects.bulk_update(updates, ["transfer_group"], batch_size=500)
+            Transaction.objects.filter(id__in=[txn.id for txn in updates]).update(
+                kind="transfer", category=None, is_locked=True
+            )
+            paired += len(ready)
+    return paired, skipped
@@ -7,16 +7,26 @@ from django.conf import settings
 register = template.Library()
 
 
-def _load_manifest():
+# path -> (mtime_ns, parsed manifest); re-read only when the file changes.
+_manifest_cache = {}
+
+
+def load_manifest():
     manifest_root = Path(settings.BASE_DIR / "static" / "app")
     manifest_paths = [
         manifest_root / "manifest.json",
         manifest_root / ".vite" / "manifest.json",
     ]
     for manifest_path in manifest_paths:
-        if manifest_path.exists():
+        try:
+            mtime = manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+        cached = _manifest_cache.get(manifest_path)
+        if cached is None or cached[0] != mtime:
             with manifest_path.open() as manifest_file:
-                return json.load(manifest_file)
+                cached = _manifest_cache[manifest_path] = (mtime, json.load(manifest_file))
+        return cached[1]
     return {}
 
 
@@ -26,7 +36,7 @@ def vite_asset(entry: str, asset_type: str = "script") -> str:
     Resolve a built asset from Vite's manifest.
     Returns an empty string if the manifest has not been generated yet.
     """
-    manifest = _load_manifest()
+    manifest = load_manifest()
     if not manifest:
         return ""
 
@@ -0,0 +1,99 @@
+import io
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from fincore.models import Account, Bill, Invoice, InvoicePayment, Transaction, Vendor
+from fincore.services.aging import aging_detail, aging_summary
+
+AS_OF = date(2024, 6, 30)
+
+
+class AgingReportTests(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(name="Checking")
+        self.acme = Vendor.objects.create(name="Acme", kind="payer")
+        self.globex = Vendor.objects.create(name="Globex", kind="payer")
+        self.supplier = Vendor.objects.create(name="Supplier", kind="payee")
+
+    def _invoice(self, number, customer, due_date, total, status="sent", invoice_date=date(2024, 1, 1)):
+        return Invoice.objects.create(
+            number=number, customer=customer, account=self.account, date=invoice_date, due_date=due_date,
+            status=status, total=Decimal(total),
+        )
+
+    def _pay(self, invoice, amount, paid_on):
+        txn = Transaction.objects.create(
+            date=paid_on, account=self.account, amount=Decimal(amount), kind="income",
+            description="Deposit", is_imported=True,
+        )
+        InvoicePayment.objects.create(invoice=invoice, transaction=txn, amount=Decimal(amount))
+
+    def test_summary_buckets_outstanding_balances(self):
+        self._invoice("INV-1", self.acme, date(2024, 7, 15), "100.00")  # current
+        self._invoice("INV-2", self.acme, date(2024, 6, 1), "200.00")  # 29 days
+        self._invoice("INV-3", self.acme, date(2024, 4, 15), "300.00")  # 76 days
+        partial = self._invoice("INV-4", self.globex, date(2024, 2, 1), "400.00", status="partially_paid")
+        self._pay(partial, "150.00", date(2024, 3, 1))
+        self._invoice("INV-5", self.globex, None, "50.00", invoice_date=date(2024, 5, 1))  # 60 days, falls back to date
+        self._invoice("INV-6", self.globex, date(2024, 6, 1), "75.00", status="void")
+
+        with CaptureQueriesContext(connection) as queries:
+            rows, totals = aging_summary("receivables", AS_OF)
+        self.assertEqual(len(queries), 1)
+
+        acme, globex = rows
+        self.assertEqual(acme["name"], "Acme")
+        self.assertEqual(acme["current"], Decimal("100.00"))
+        self.assertEqual(acme["days_1_30"], Decimal("200.00"))
+        self.assertEqual(acme["days_61_90"], Decimal("300.00"))
+        self.assertEqual(acme["total"], Decimal("600.00"))
+        self.assertEqual(globex["days_31_60"], Decimal("50.00"))
+        self.assertEqual(globex["days_90_plus"], Decimal("250.00"))
+        self.assertEqual(globex["count"], 2)
+        self.assertEqual(totals["total"], Decimal("900.00"))
+
+    def test_as_of_ignores_later_payments_and_documents(self):
+        paid = self._invoice("INV-1", self.acme, date(2024, 5, 1), "100.00", status="paid")
+        self._pay(paid, "100.00", date(2024, 7, 10))
+        self._invoice("INV-2", self.acme, date(2024, 8, 1), "500.00", invoice_date=date(2024, 7, 1))
+
+        rows, totals = aging_summary("receivables", AS_OF)
+        self.assertEqual(totals["total"], Decimal("100.00"))
+        self.assertEqual(rows[0]["days_31_60"], Decimal("100.00"))
+
+        rows, totals = aging_summary("receivables", date(2024, 7, 31))
+        self.assertEqual(totals["total"], Decimal("500.00"))
+
+    def test_payables_use_bill_date_and_detail_filters_bucket(self):
+        Bill.objects.create(number="B-1", vendor=self.supplier, account=self.account, date=date(2024, 6, 20), total=Decimal("40.00"))
+        Bill.objects.create(number="B-2", vendor=self.supplier, account=self.account, date=date(2024, 1, 5), total=Decimal("60.00"))
+
+        rows, _ = aging_summary("payables", AS_OF)
+        self.assertEqual(rows[0]["days_1_30"], Decimal("40.00"))
+        self.assertEqual(rows[0]["days_90_plus"], Decimal("60.00"))
+
+        documents = aging_detail("payables", self.supplier.id, AS_OF, bucket="days_90_plus")
+        self.assertEqual([document.number for document in documents], ["B-2"])
+        self.assertEqual(documents[0].days_past_due, 177)
+
+    def test_report_views_render_and_export(self):
+        self._invoice("INV-1", self.acme, date(2024, 6, 1), "200.00")
+        query = {"kind": "receivables", "as_of": "2024-06-30"}
+
+        response = self.client.get(reverse("fincore:aging_report"), query)
+        self.assertContains(response, "Acme")
+        response = self.client.get(reverse("fincore:aging_detail", args=["receivables", self.acme.id]), {"as_of": "2024-06-30"})
+        self.assertContains(response, "INV-1")
+
+        response = self.client.get(reverse("fincore:aging_export_xlsx"), query)
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(response.content)) as workbook:
+            sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+        self.assertIn("Acme", sheet)
+        self.assertIn("<v>200.0</v>", sheet)
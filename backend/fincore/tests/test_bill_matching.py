@@ -0,0 +1,116 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from fincore.models import Account, Bill, BillItem, BillPayment, Category, Transaction, Vendor
+from fincore.services.bill_matching import find_subset_sum, split_payment_suggestions
+
+
+class SubsetSumTests(SimpleTestCase):
+    def test_prefers_fewest_items(self):
+        amounts = [100, 250, 400, 150, 500]
+        picked = find_subset_sum(500, amounts)
+        self.assertEqual(picked, [4])
+        picked = find_subset_sum(650, amounts)
+        self.assertEqual(sorted(amounts[i] for i in picked), [150, 500])
+
+    def test_respects_item_bound_and_missing_sum(self):
+        self.assertIsNone(find_subset_sum(600, [100] * 10, max_items=5))
+        self.assertIsNone(find_subset_sum(999, [100, 200, 300]))
+        self.assertEqual(len(find_subset_sum(500, [100] * 10, max_items=5)), 5)
+
+    def test_time_budget_bounds_search(self):
+        # No subset of even numbers sums to an odd target: the search must give up.
+        self.assertIsNone(find_subset_sum(10_001, [2 * n for n in range(1, 200)], max_items=10, time_budget=0.05))
+
+
+class BillSplitMatchTests(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(name="Checking")
+        self.vendor = Vendor.objects.create(name="Landlord", kind="payee")
+        self.rent = Category.objects.create(name="Rent", kind="expense")
+
+    def _bill(self, number, total, day=1):
+        bill = Bill.objects.create(
+            number=number, vendor=self.vendor, account=self.account, date=date(2024, 5, day),
+            status="received", subtotal=Decimal(total), total=Decimal(total),
+        )
+        BillItem.objects.create(bill=bill, category=self.rent, amount=Decimal(total), total=Decimal(total))
+        return bill
+
+    def _debit(self, amount, day):
+        return Transaction.objects.create(
+            date=date(2024, 5, day), account=self.account, amount=-Decimal(amount), kind="expense",
+            description="Debit", is_imported=True,
+        )
+
+    def test_instalments_sum_to_remaining(self):
+        bill = self._bill("B-1", "1000.00")
+        first = self._debit("400.00", 2)
+        second = self._debit("600.00", 9)
+        self._debit("123.45", 5)
+        suggestions = split_payment_suggestions(bill)
+        self.assertEqual(suggestions["instalments"], [first, second])
+
+    def test_one_debit_settles_several_bills(self):
+        bill = self._bill("B-1", "300.00")
+        other = self._bill("B-2", "200.00", day=3)
+        debit = self._debit("500.00", 10)
+        suggestions = split_payment_suggestions(bill)
+        self.assertEqual(suggestions["combined_bills"], [{"transaction": debit, "bills": [other]}])
+
+        response = self.client.post(
+            reverse("fincore:bill_match_apply_group"),
+            {"transaction_id": debit.id, "bill_ids": [bill.id, other.id]},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(BillPayment.objects.values_list("amount", flat=True)), [Decimal("200.00"), Decimal("300.00")]
+        )
+        bill.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((bill.status, other.status), ("paid", "paid"))
+
+    def test_group_match_rejects_bills_that_are_not_open(self):
+        bill = self._bill("B-1", "200.00")
+        void = self._bill("B-2", "300.00")
+        Bill.objects.filter(pk=void.pk).update(status="void")
+        debit = self._debit("500.00", 4)
+
+        response = self.client.post(
+            reverse("fincore:bill_match_apply_group"),
+            {"transaction_id": debit.id, "bill_ids": [bill.id, void.id]},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(BillPayment.objects.exists())
+
+    def test_match_over_bill_remaining_writes_nothing(self):
+        bill = self._bill("B-1", "200.00")
+        first = self._debit("150.00", 3)
+        second = self._debit("150.00", 4)
+        self.client.post(reverse("fincore:bill_match_apply"), {"bill_id": bill.id, f"match_txn_{first.id}": "150.00"})
+
+        response = self.client.post(
+            reverse("fincore:bill_match_apply"), {"bill_id": bill.id, f"match_txn_{second.id}": "150.00"}
+        )
+        self.assertContains(response, "exceeds bill remaining 50.00")
+        self.assertEqual(BillPayment.objects.filter(transaction=second).count(), 0)
+
+    def test_partially_allocated_transaction_can_pay_another_bill(self):
+        first = self._bill("B-1", "300.00")
+        second = self._bill("B-2", "200.00")
+        debit = self._debit("500.00", 4)
+        BillPayment.objects.create(bill=first, transaction=debit, amount=Decimal("300.00"))
+
+        response = self.client.post(
+            reverse("fincore:bill_match_apply"), {"bill_id": second.id, f"match_txn_{debit.id}": "200.00"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(BillPayment.objects.filter(transaction=debit).count(), 2)
+
+        response = self.client.post(
+            reverse("fincore:bill_match_apply"), {"bill_id": self._bill("B-3", "50.00").id, f"match_txn_{debit.id}": "50.00"}
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,106 @@
+import io
+import json
+import zipfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from fincore.models import Account, ImportBatch, ImportProfile
+from fincore.services.csv_staging import header_fingerprint
+
+CHECKING_CSV = "Date,Description,Amount\n2024-01-31,Coffee,-4.50\n2024-02-01,Payroll,\"2,000.00\"\n"
+CARD_CSV = "Trans Date,Memo,Debit,Credit\n01/05/2024,Fuel,40.00,\n01/06/2024,Refund,,12.00\n"
+
+
+class HeaderFingerprintTests(SimpleTestCase):
+    def test_ignores_case_order_and_whitespace(self):
+        self.assertEqual(
+            header_fingerprint(["Date", "Description", "Amount"]),
+            header_fingerprint([" amount", "DATE", "description "]),
+        )
+        self.assertNotEqual(
+            header_fingerprint(["Date", "Amount"]),
+            header_fingerprint(["Date", "Debit", "Credit"]),
+        )
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        self.checking = Account.objects.create(name="Checking")
+        self.card = Account.objects.create(name="Card")
+
+    def _stage(self, account, filename, content, mapping, amount_strategy):
+        return self.client.post(
+            reverse("fincore:import_stage"),
+            {
+                "csv_file": SimpleUploadedFile(filename, content.encode("utf-8")),
+                "account_id": account.id,
+                "mapping": json.dumps(mapping),
+                "amount_strategy": amount_strategy,
+            },
+        )
+
+    def _zip(self, files):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for name, content in files.items():
+                archive.writestr(name, content)
+        return SimpleUploadedFile("statements.zip", buffer.getvalue(), content_type="application/zip")
+
+    def test_stage_saves_profile(self):
+        self._stage(
+            self.checking,
+            "checking-jan.csv",
+            CHECKING_CSV,
+            {"Date": "date", "Description": "description", "Amount": "amount"},
+            "signed",
+        )
+        profile = ImportProfile.objects.get()
+        self.assertEqual(profile.account, self.checking)
+        self.assertEqual(profile.header_fingerprint, header_fingerprint(["Date", "Description", "Amount"]))
+        self.assertEqual(profile.date_format, "%Y-%m-%d")
+
+    @override_settings(FINCORE_IMPORT_WORKERS=2)
+    def test_bulk_upload_routes_files_by_profile(self):
+        self._stage(
+            self.checking,
+            "checking-jan.csv",
+            CHECKING_CSV,
+            {"Date": "date", "Description": "description", "Amount": "amount"},
+            "signed",
+        )
+        self._stage(
+            self.card,
+            "card-jan.csv",
+            CARD_CSV,
+            {"Trans Date": "date", "Memo": "description", "Debit": "debit", "Credit": "credit"},
+            "split_columns",
+        )
+        ImportBatch.objects.all().delete()
+
+        response = self.client.post(
+            reverse("fincore:import_bulk"),
+            {
+                "csv_files": [
+                    self._zip({"checking-feb.csv": CHECKING_CSV, "card-feb.csv": CARD_CSV}),
+                    SimpleUploadedFile("unknown.csv", b"Foo,Bar\n1,2\n"),
+                ]
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        results = {result["filename"]: result for result in response.context["results"]}
+        self.assertEqual(results["checking-feb.csv"]["status"], "staged")
+        self.assertEqual(results["card-feb.csv"]["status"], "staged")
+        self.assertEqual(results["unknown.csv"]["status"], "failed")
+        self.assertIn("No saved import profile", results["unknown.csv"]["message"])
+
+        batches = {batch.filename: batch for batch in ImportBatch.objects.all()}
+        self.assertEqual(set(batches), {"checking-feb.csv", "card-feb.csv"})
+        self.assertEqual(batches["card-feb.csv"].account, self.card)
+        self.assertEqual(batches["card-feb.csv"].status, "validated")
+        self.assertEqual(
+            [row.mapped["amount_cents"] for row in batches["card-feb.csv"].rows.all()],
+            [-4000, 1200],
+        )
+        self.assertEqual(batches["checking-feb.csv"].account, self.checking)
@@ -0,0 +1,133 @@
+import json
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from fincore.models import Account, CategorizationRule, Category, ImportBatch, Transaction, Vendor
+from fincore.services.categorization import AhoCorasick, RuleMatcher, required_literal
+
+
+def _rule(rule_id, pattern, match_type="contains", field="description", priority=100, **extra):
+    values = {
+        "id": rule_id,
+        "pattern": pattern,
+        "match_type": match_type,
+        "field": field,
+        "priority": priority,
+        "is_active": True,
+        "account_id": None,
+        "amount_min": None,
+        "amount_max": None,
+    }
+    values.update(extra)
+    return SimpleNamespace(**values)
+
+
+class AhoCorasickTests(SimpleTestCase):
+    def test_finds_overlapping_patterns(self):
+        automaton = AhoCorasick(["he", "she", "his", "hers"])
+        found = sorted((start, automaton.patterns[index]) for start, index in automaton.search("ushers"))
+        self.assertEqual(found, [(1, "she"), (2, "he"), (2, "hers")])
+
+
+class RequiredLiteralTests(SimpleTestCase):
+    def test_extracts_conservative_literals(self):
+        self.assertEqual(required_literal(r"^AMZN\s+Mktp"), "amzn")
+        self.assertEqual(required_literal(r"[a-z]+corp\.com"), "corp.com")
+        self.assertEqual(required_literal(r"ab?cde"), "cde")
+        self.assertEqual(required_literal(r"foo|bar"), "")
+        self.assertEqual(required_literal(r"(?x) a b c"), "")
+
+
+class RuleMatcherTests(SimpleTestCase):
+    def test_priority_and_match_types(self):
+        matcher = RuleMatcher(
+            [
+                _rule(1, "coffee"),
+                _rule(2, "STARBUCKS", match_type="startswith", priority=10),
+                _rule(3, r"^amzn\s+mktp", match_type="regex", priority=5),
+                _rule(4, "acme", field="payee"),
+            ]
+        )
+        self.assertEqual(matcher.match("Starbucks coffee #12", "", Decimal("-5"), 1).id, 2)
+        self.assertEqual(matcher.match("Coffee at Starbucks", "", Decimal("-5"), 1).id, 1)
+        self.assertEqual(matcher.match("AMZN  Mktp US", "", Decimal("-20"), 1).id, 3)
+        self.assertEqual(matcher.match("Wire", "ACME Corp", Decimal("100"), 1).id, 4)
+        self.assertIsNone(matcher.match("Groceries", "", Decimal("-5"), 1))
+
+    def test_amount_range_and_account_scope(self):
+        matcher = RuleMatcher(
+            [
+                _rule(1, "transfer", priority=1, account_id=7),
+                _rule(2, "transfer", priority=2, amount_min=Decimal("-100"), amount_max=Decimal("-10")),
+                _rule(3, "transfer", priority=3),
+            ]
+        )
+        self.assertEqual(matcher.match("Online transfer", "", Decimal("-50"), 7).id, 1)
+        self.assertEqual(matcher.match("Online transfer", "", Decimal("-50"), 8).id, 2)
+        self.assertEqual(matcher.match("Online transfer", "", Decimal("-500"), 8).id, 3)
+
+    def test_back_references_are_not_combined_into_the_prefilter(self):
+        matcher = RuleMatcher(
+            [
+                _rule(1, r"^(a)x", match_type="regex"),
+                _rule(2, r"(\w)\1z", match_type="regex"),
+                _rule(3, r"(?P<c>\d)(?P=c)$", match_type="regex"),
+            ]
+        )
+        self.assertEqual(matcher.match("bbz", "", Decimal("-5"), 1).id, 2)
+        self.assertEqual(matcher.match("ref 77", "", Decimal("-5"), 1).id, 3)
+        self.assertEqual(matcher.match("axe", "", Decimal("-5"), 1).id, 1)
+
+
+class CategorizationRuleCommitTests(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(name="Checking")
+        self.software = Category.objects.create(name="Software", kind="expense")
+        self.vendor = Vendor.objects.create(name="GitHub", kind="payee")
+        CategorizationRule.objects.create(pattern="github", category=self.software, vendor=self.vendor)
+
+    def test_commit_applies_rules(self):
+        content = "Date,Description,Amount\n2024-03-01,GITHUB.COM SPONSORS,-10.00\n2024-03-02,Lunch,-12.00\n"
+        self.client.post(
+            reverse("fincore:import_stage"),
+            {
+                "csv_file": SimpleUploadedFile("bank.csv", content.encode("utf-8")),
+                "account_id": self.account.id,
+                "mapping": json.dumps({"Date": "date", "Description": "description", "Amount": "amount"}),
+                "amount_strategy": "signed",
+            },
+        )
+        batch = ImportBatch.objects.get()
+        self.client.post(reverse("fincore:import_commit", args=[batch.id]))
+
+        github = Transaction.objects.get(description="GITHUB.COM SPONSORS")
+        self.assertEqual(github.category, self.software)
+        self.assertEqual(github.vendor, self.vendor)
+        self.assertEqual(github.kind, "expense")
+        lunch = Transaction.objects.get(description="Lunch")
+        self.assertEqual(lunch.category.name, "Uncategorized Expense")
+        self.assertIsNone(lunch.vendor)
+
+    def test_command_processes_existing_transactions(self):
+        uncategorized = Category.objects.get(name="Uncategorized Expense", is_protected=True)
+        for idx in range(5):
+            Transaction.objects.create(
+                date=date(2024, 1, 1),
+                account=self.account,
+                amount=Decimal("-9.00"),
+                kind="expense",
+                category=uncategorized,
+                description=f"GitHub invoice {idx}" if idx % 2 == 0 else "Rent",
+                is_imported=True,
+            )
+        out = StringIO()
+        call_command("apply_categorization_rules", "--chunk-size", "2", stdout=out)
+        self.assertIn("Categorized 3 of 5", out.getvalue())
+        self.assertEqual(Transaction.objects.filter(category=self.software, vendor=self.vendor).count(), 3)
@@ -0,0 +1,112 @@
+import fcntl
+import os
+import tempfile
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from fincore import metrics
+from fincore.db import writes
+from fincore.models import Account
+
+
+class WriteLockTests(SimpleTestCase):
+    def setUp(self):
+        metrics.reset()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.connection = SimpleNamespace(
+            alias="default", settings_dict={"NAME": os.path.join(self.tmpdir.name, "db.sqlite3")}
+        )
+
+    def test_waits_for_another_process_holding_the_file_lock(self):
+        with open(writes.lock_path(self.connection), "a+b") as other:
+            fcntl.flock(other, fcntl.LOCK_EX)
+            with self.assertRaises(writes.WriteLockTimeout):
+                with writes.write_lock(self.connection, timeout=0.05):
+                    pass
+            self.assertEqual(writes.lock_timeouts.value(alias="default"), 1)
+
+            threading.Timer(0.05, fcntl.flock, (other, fcntl.LOCK_UN)).start()
+            with writes.write_lock(self.connection, timeout=2):
+                pass
+        series = writes.lock_wait_seconds.series(alias="default")
+        self.assertEqual(series["count"], 1)
+        self.assertGreater(series["sum"], 0.04)
+
+    def test_threads_take_turns(self):
+        inside = []
+        overlap = []
+
+        def writer():
+            with writes.write_lock(self.connection, timeout=2):
+                if inside:
+                    overlap.append(True)
+                inside.append(True)
+                threading.Event().wait(0.01)
+                inside.pop()
+
+        threads = [threading.Thread(target=writer) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(overlap, [])
+        self.assertEqual(writes.lock_wait_seconds.series(alias="default")["count"], 5)
+
+
+class WriteTransactionTests(TransactionTestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_commits_and_rolls_back_like_atomic(self):
+        with writes.write_transaction():
+            Account.objects.create(name="Checking")
+        with self.assertRaises(ValueError):
+            with writes.write_transaction():
+                Account.objects.create(name="Savings")
+                raise ValueError
+        self.assertEqual(list(Account.objects.values_list("name", flat=True)), ["Checking"])
+
+    def test_busy_begin_is_retried_with_backoff(self):
+        real_atomic = writes.transaction.atomic
+        failures = [OperationalError("database is locked")] * 2
+
+        def flaky_atomic(*args, **kwargs):
+            block = real_atomic(*args, **kwargs)
+            if failures:
+                block.__enter__ = mock.Mock(side_effect=failures.pop())
+            return block
+
+        with mock.patch.object(writes.transaction, "atomic", side_effect=flaky_atomic), mock.patch.object(
+            writes.time, "sleep"
+        ) as sleep:
+            with writes.write_transaction():
+                Account.objects.create(name="Checking")
+
+        self.assertEqual(writes.write_retries.value(alias="default"), 2)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertTrue(Account.objects.filter(name="Checking").exists())
+
+    @override_settings(FINCORE_WRITE_LOCK_TIMEOUT=0.5)
+    def test_retries_stop_at_the_shared_deadline(self):
+        busy = mock.Mock(side_effect=OperationalError("database is locked"))
+        with mock.patch.object(writes.transaction, "atomic", return_value=mock.Mock(__enter__=busy)), mock.patch.object(
+            writes.random, "uniform", return_value=1.0
+        ), mock.patch.object(writes.time, "sleep") as sleep:
+            with self.assertRaises(writes.WriteLockTimeout):
+                with writes.write_transaction(attempts=5):
+                    pass
+        self.assertEqual(busy.call_count, 1)
+        sleep.assert_not_called()
+        self.assertEqual(writes.lock_timeouts.value(alias="default"), 1)
+
+    def test_other_errors_are_not_retried(self):
+        with mock.patch.object(writes.transaction, "atomic", side_effect=OperationalError("no such table")):
+            with self.assertRaises(OperationalError):
+                with writes.write_transaction():
+                    pass
+        self.assertEqual(writes.write_retries.value(alias="default"), 0)
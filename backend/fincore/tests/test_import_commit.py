@@ -0,0 +1,78 @@
+import json
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from fincore.models import Account, ImportBatch, ImportRow, Transaction
+
+CSV = "Date,Description,Amount\n" + "".join(f"2024-01-{day:02d},Row {day},-{day}.00\n" for day in range(1, 6))
+
+
+class ChunkedCommitTests(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(name="Checking")
+        self.client.post(
+            reverse("fincore:import_stage"),
+            {
+                "csv_file": SimpleUploadedFile("bank.csv", CSV.encode("utf-8")),
+                "account_id": self.account.id,
+                "mapping": json.dumps({"Date": "date", "Description": "description", "Amount": "amount"}),
+                "amount_strategy": "signed",
+            },
+        )
+        self.batch = ImportBatch.objects.get()
+
+    @mock.patch("fincore.views.import_views.COMMIT_CHUNK_SIZE", 2)
+    def test_commit_in_chunks_updates_checkpoint(self):
+        self.client.post(reverse("fincore:import_commit", args=[self.batch.id]))
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.status, "imported")
+        self.assertEqual(self.batch.committed_count, 5)
+        self.assertEqual(self.batch.committed_through_row, self.batch.rows.last().id)
+        self.assertEqual(Transaction.objects.filter(import_batch=self.batch).count(), 5)
+
+    def _interrupt_after_first_row(self):
+        first_row = self.batch.rows.first()
+        Transaction.objects.create(
+            date=date(2024, 1, 1),
+            account=self.account,
+            amount=Decimal("-1.00"),
+            kind="expense",
+            is_imported=True,
+            import_batch=self.batch,
+            description="Row 1",
+            source="csv",
+        )
+        ImportBatch.objects.filter(pk=self.batch.pk).update(
+            status="committing", committed_through_row=first_row.id, committed_count=1
+        )
+
+    def test_interrupted_commit_is_hidden_and_resumes(self):
+        self._interrupt_after_first_row()
+        self.assertFalse(Transaction.objects.reportable().exists())
+
+        self.client.post(reverse("fincore:import_commit", args=[self.batch.id]))
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.status, "imported")
+        self.assertEqual(self.batch.committed_count, 5)
+        self.assertEqual(
+            sorted(Transaction.objects.reportable().values_list("description", flat=True)),
+            [f"Row {day}" for day in range(1, 6)],
+        )
+
+    @mock.patch("fincore.views.import_views.COMMIT_CHUNK_SIZE", 2)
+    def test_interrupted_commit_rolls_back_cleanly(self):
+        self._interrupt_after_first_row()
+        self.client.post(reverse("fincore:import_rollback", args=[self.batch.id]))
+        self.assertFalse(ImportBatch.objects.exists())
+        self.assertFalse(ImportRow.objects.exists())
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_balance_sheet_renders(self):
+        self.client.post(reverse("fincore:import_commit", args=[self.batch.id]))
+        response = self.client.get(reverse("fincore:balance_sheet_content"))
+        self.assertEqual(response.status_code, 200)
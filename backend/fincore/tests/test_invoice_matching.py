@@ -0,0 +1,228 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from fincore.models import Account, Category, Invoice, InvoiceItem, InvoicePayment, Transaction, Vendor
+from fincore.services.invoice_matching import (
+    allocate_invoice_payments,
+    allocate_lump_sum,
+    apply_invoice_matches,
+    parse_allocation_rows,
+    propose_invoice_matches,
+)
+
+
+class InvoiceAutoMatchTests(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(name="Checking")
+        self.sales = Category.objects.create(name="Sales", kind="income")
+        self.acme = Vendor.objects.create(name="Acme Corp", kind="payer")
+        self.globex = Vendor.objects.create(name="Globex", kind="payer")
+
+    def _invoice(self, number, customer, total, day):
+        invoice = Invoice.objects.create(
+            number=number, customer=customer, account=self.account, date=date(2024, 3, day),
+            status="sent", subtotal=Decimal(total), total=Decimal(total),
+        )
+        InvoiceItem.objects.create(invoice=invoice, category=self.sales, amount=Decimal(total), total=Decimal(total))
+        return invoice
+
+    def _deposit(self, amount, day, payee=""):
+        return Transaction.objects.create(
+            date=date(2024, 3, day), account=self.account, amount=Decimal(amount), kind="income",
+            payee=payee, description=f"Deposit {payee}".strip(), is_imported=True,
+        )
+
+    def test_proposals_are_one_to_one_and_prefer_best_score(self):
+        acme_invoice = self._invoice("INV-1", self.acme, "100.00", 1)
+        globex_invoice = self._invoice("INV-2", self.globex, "100.00", 1)
+        acme_deposit = self._deposit("100.00", 5, payee="ACME CORP")
+        globex_deposit = self._deposit("100.00", 3, payee="Globex")
+        self._deposit("500.00", 2)
+
+        proposals = {p.invoice.id: p for p in propose_invoice_matches()}
+        self.assertEqual(proposals[acme_invoice.id].transaction, acme_deposit)
+        self.assertEqual(proposals[globex_invoice.id].transaction, globex_deposit)
+        self.assertTrue(proposals[acme_invoice.id].auto_accept)
+
+    def test_tolerance_and_window(self):
+        invoice = self._invoice("INV-1", self.acme, "100.00", 1)
+        self._deposit("97.50", 2)
+        fee_deposit = self._deposit("98.50", 2)
+        proposals = propose_invoice_matches()
+        self.assertEqual([p.transaction for p in proposals], [fee_deposit])
+        self.assertEqual(proposals[0].amount, Decimal("98.50"))
+        self.assertEqual(proposals[0].invoice, invoice)
+
+    def test_bulk_apply_creates_payments_in_one_post(self):
+        first = self._invoice("INV-1", self.acme, "100.00", 1)
+        second = self._invoice("INV-2", self.globex, "40.00", 2)
+        d1 = self._deposit("100.00", 4, payee="Acme")
+        d2 = self._deposit("40.00", 4, payee="Globex")
+
+        response = self.client.post(
+            reverse("fincore:sales_invoice_auto_match"),
+            {"accept": [f"{first.id}:{d1.id}", f"{second.id}:{d2.id}"]},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(InvoicePayment.objects.count(), 2)
+        first.refresh_from_db()
+        d1.refresh_from_db()
+        self.assertEqual(first.status, "paid")
+        self.assertEqual(d1.vendor, self.acme)
+        self.assertEqual(d1.category, self.sales)
+
+        # Re-applying the same pair is skipped: the deposit is already matched.
+        self.assertEqual(apply_invoice_matches([(first.id, d1.id)]), (0, 1))
+        self.assertEqual(propose_invoice_matches(), [])
+
+    def test_review_page_lists_proposals(self):
+        self._invoice("INV-9", self.acme, "10.00", 1)
+        self._deposit("10.00", 1, payee="Acme")
+        response = self.client.get(reverse("fincore:sales_invoice_auto_match"))
+        self.assertContains(response, "INV-9")
+
+
+class BulkAllocationTests(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(name="Checking")
+        self.sales = Category.objects.create(name="Sales", kind="income")
+        self.customer = Vendor.objects.create(name="Acme", kind="payer")
+
+    def _invoice(self, number, total):
+        invoice = Invoice.objects.create(
+            number=number, customer=self.customer, account=self.account, date=date(2024, 4, 1),
+            status="sent", subtotal=Decimal(total), total=Decimal(total),
+        )
+        InvoiceItem.objects.create(invoice=invoice, category=self.sales, amount=Decimal(total), total=Decimal(total))
+        return invoice
+
+    def _deposit(self, amount):
+        return Transaction.objects.create(
+            date=date(2024, 4, 5), account=self.account, amount=Decimal(amount), kind="income",
+            description="Remittance", is_imported=True,
+        )
+
+    def test_json_allocations_use_a_fixed_number_of_queries(self):
+        invoices = [self._invoice(f"INV-{n}", "10.00") for n in range(60)]
+        deposit = self._deposit("600.00")
+        payload = {
+            "allocations": [
+                {"invoice_number": invoice.number, "transaction_id": deposit.id, "amount": "10.00"}
+                for invoice in invoices
+            ]
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("fincore:sales_invoice_allocate"), json.dumps(payload), content_type="application/json"
+            )
+        self.assertEqual(response.json(), {"applied": 60, "errors": []})
+        self.assertLess(len(queries), 20)
+        self.assertEqual(Invoice.objects.filter(status="paid").count(), 60)
+        deposit.refresh_from_db()
+        self.assertEqual(deposit.category, self.sales)
+
+    def test_csv_allocations_are_all_or_nothing(self):
+        invoice = self._invoice("INV-1", "100.00")
+        deposit = self._deposit("80.00")
+        csv_text = f"invoice_number,transaction_id,amount\nINV-1,{deposit.id},50.00\nINV-1,{deposit.id},40.00\nINV-X,{deposit.id},1\n"
+        response = self.client.post(reverse("fincore:sales_invoice_allocate"), {"allocations_text": csv_text})
+        self.assertEqual(response.status_code, 400)
+        self.assertContains(response, "invoice INV-X not found", status_code=400)
+
+        csv_text = f"invoice_number,transaction_id,amount\nINV-1,{deposit.id},50.00\n"
+        response = self.client.post(reverse("fincore:sales_invoice_allocate"), {"allocations_text": csv_text})
+        self.assertContains(response, "Applied 1 allocation.")
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.status, "partially_paid")
+
+    def test_out_of_range_amounts_are_rejected(self):
+        rows = [
+            {"invoice_id": "1", "transaction_id": "2", "amount": "1e30"},
+            {"invoice_id": "1", "transaction_id": "2", "amount": "10000000000.00"},
+            {"invoice_id": "1", "transaction_id": "2", "amount": "Infinity"},
+            {"invoice_id": "1", "transaction_id": "2", "amount": "9,999,999,999.994"},
+        ]
+        allocations, errors = parse_allocation_rows(rows)
+        self.assertEqual(allocations, [(1, 2, Decimal("9999999999.99"))])
+        self.assertEqual(
+            errors, [f"Allocation {line}: amount is not a number or is out of range." for line in (1, 2, 3)]
+        )
+
+    def test_split_deposit_cannot_exceed_available(self):
+        first = self._invoice("INV-1", "100.00")
+        second = self._invoice("INV-2", "100.00")
+        deposit = self._deposit("150.00")
+        applied, errors = allocate_invoice_payments(
+            [(first.id, deposit.id, Decimal("100.00")), (second.id, deposit.id, Decimal("60.00"))]
+        )
+        self.assertEqual(applied, 0)
+        self.assertIn("exceeds available 50.00", errors[0])
+        self.assertFalse(InvoicePayment.objects.exists())
+
+    def test_single_invoice_match_uses_bulk_path(self):
+        invoice = self._invoice("INV-1", "100.00")
+        deposit = self._deposit("100.00")
+        url = reverse("fincore:sales_invoice_match_apply")
+        response = self.client.post(url, {"invoice_id": invoice.id, f"match_{deposit.id}": "120.00"})
+        self.assertContains(response, "Transaction", status_code=400)
+        response = self.client.post(url, {"invoice_id": invoice.id, f"match_{deposit.id}": "100.00"})
+        self.assertEqual(response.status_code, 200)
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.status, "paid")
+
+
+class LumpSumAllocationTests(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(name="Checking")
+        self.sales = Category.objects.create(name="Sales", kind="income")
+        self.customer = Vendor.objects.create(name="Acme", kind="payer")
+
+    def _invoice(self, number, total, day, due_day=None):
+        invoice = Invoice.objects.create(
+            number=number, customer=self.customer, account=self.account, date=date(2024, 6, day),
+            due_date=date(2024, 7, due_day) if due_day else None,
+            status="sent", subtotal=Decimal(total), total=Decimal(total),
+        )
+        InvoiceItem.objects.create(invoice=invoice, category=self.sales, amount=Decimal(total), total=Decimal(total))
+        return invoice
+
+    def _deposit(self, amount):
+        return Transaction.objects.create(
+            date=date(2024, 6, 20), account=self.account, amount=Decimal(amount), kind="income",
+            description="Lump sum", is_imported=True,
+        )
+
+    def test_fifo_by_invoice_date(self):
+        newest = self._invoice("INV-3", "100.00", 15)
+        oldest = self._invoice("INV-1", "100.00", 1)
+        middle = self._invoice("INV-2", "100.00", 8)
+        deposit = self._deposit("250.00")
+
+        created, allocated, errors = allocate_lump_sum(deposit.id, self.customer.id)
+        self.assertEqual((created, allocated, errors), (3, Decimal("250.00"), []))
+        statuses = dict(Invoice.objects.values_list("number", "status"))
+        self.assertEqual(statuses, {"INV-1": "paid", "INV-2": "paid", "INV-3": "partially_paid"})
+        self.assertEqual(InvoicePayment.objects.get(invoice=newest).amount, Decimal("50.00"))
+        self.assertEqual(InvoicePayment.objects.filter(invoice__in=[oldest, middle]).count(), 2)
+
+    def test_due_date_order_and_view(self):
+        late_due = self._invoice("INV-1", "100.00", 1, due_day=30)
+        early_due = self._invoice("INV-2", "100.00", 5, due_day=2)
+        deposit = self._deposit("100.00")
+        response = self.client.post(
+            reverse("fincore:sales_invoice_lump_sum"),
+            {"invoice_id": late_due.id, "transaction_id": deposit.id, "order": "due_date"},
+        )
+        self.assertContains(response, "across 1 invoice for Acme")
+        early_due.refresh_from_db()
+        late_due.refresh_from_db()
+        self.assertEqual((early_due.status, late_due.status), ("paid", "sent"))
+
+        _, _, errors = allocate_lump_sum(deposit.id, self.customer.id)
+        self.assertEqual(errors, [f"Transaction {deposit.id} is already fully allocated."])
@@ -0,0 +1,55 @@
+from datetime import date
+
+from django.db import transaction
+from django.test import TestCase
+
+from fincore.benchmarks import BenchmarkSuite, Result, compare
+from fincore.models import Account, Bill, ImportBatch, Invoice, Transaction, TransferGroup
+from fincore.services.ledger_generator import generate_ledger
+
+
+class LedgerGeneratorTests(TestCase):
+    def test_generates_requested_volume_of_linked_data(self):
+        counts = generate_ledger(transactions=400, seed=7, years=1, end=date(2026, 6, 30), chunk_size=100)
+
+        # Invoice and bill payments add their own ledger rows on top of the 400.
+        self.assertEqual(Transaction.objects.count(), counts["transactions"])
+        self.assertEqual(Transaction.objects.filter(invoice_payments=None, bill_payments=None).count(), 400)
+        self.assertTrue(Account.objects.filter(name__startswith="S7 ", parent__isnull=False).exists())
+        self.assertTrue(TransferGroup.objects.exists())
+        self.assertTrue(ImportBatch.objects.filter(status="imported").exists())
+        self.assertTrue(Invoice.objects.filter(status="partially_paid").exists())
+        self.assertTrue(Bill.objects.exists())
+        self.assertFalse(Transaction.objects.filter(date__gt=date(2026, 6, 30)).exists())
+
+    def test_same_seed_gives_same_ledger(self):
+        def generate():
+            with transaction.atomic():
+                generate_ledger(transactions=150, seed=3, years=1, end=date(2026, 6, 30))
+                rows = list(Transaction.objects.order_by("id").values_list("date", "amount", "kind"))
+                transaction.set_rollback(True)
+            return rows
+
+        self.assertEqual(generate(), generate())
+
+
+class BenchmarkSuiteTests(TestCase):
+    def test_runs_cases_and_leaves_data_unchanged(self):
+        generate_ledger(transactions=200, seed=5, years=1, end=date(2026, 6, 30))
+        before = Transaction.objects.count()
+
+        results = BenchmarkSuite(repeat=1, import_rows=20).run(
+            only={"transaction_table", "cashflow_context", "import_commit"}
+        )
+
+        self.assertEqual([result.name for result in results], ["transaction_table", "cashflow_context", "import_commit"])
+        self.assertTrue(all(result.queries > 0 for result in results))
+        self.assertEqual(Transaction.objects.count(), before)
+        self.assertFalse(ImportBatch.objects.filter(filename="benchmark.csv").exclude(status="rolled_back").exists())
+
+    def test_compare_flags_slower_or_chattier_cases(self):
+        baseline = {"a": {"median_ms": 10.0, "queries": 3}, "b": {"median_ms": 10.0, "queries": 3}}
+        rows = compare(
+            [Result("a", 12.0, 11.0, 3), Result("b", 9.0, 8.0, 4), Result("c", 1.0, 1.0, 1)], baseline, 0.25
+        )
+        self.assertEqual([row[3] for row in rows], [False, True, False])
@@ -0,0 +1,131 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from fincore.models import Account, Bill, BillItem, Category, Invoice, InvoiceItem, Vendor
+from fincore.services.line_items import MAX_LINE_ITEMS
+
+
+class LineItemPersistenceTests(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(name="Checking")
+        self.sales = Category.objects.create(name="Sales", kind="income")
+        self.supplies = Category.objects.create(name="Supplies", kind="expense")
+        self.customer = Vendor.objects.create(name="Acme", kind="payer")
+        self.supplier = Vendor.objects.create(name="Supplier", kind="payee")
+
+    def _invoice(self, lines):
+        invoice = Invoice.objects.create(
+            number="INV-1", customer=self.customer, account=self.account, date=date(2024, 1, 1),
+            status="draft", tax_rate=Decimal("0"), subtotal=Decimal("0"), total=Decimal("0"),
+        )
+        InvoiceItem.objects.bulk_create(
+            InvoiceItem(invoice=invoice, category=self.sales, description=f"Line {n}", amount=Decimal("10"), total=Decimal("10"))
+            for n in range(lines)
+        )
+        return invoice
+
+    def _invoice_post(self, items):
+        data = {
+            "customer_id": self.customer.id,
+            "account_id": self.account.id,
+            "date": "2024-01-01",
+            "tax_rate": "0",
+            "item_count": len(items),
+        }
+        for idx, (item_id, description, amount) in enumerate(items, start=1):
+            data[f"item_id_{idx}"] = item_id or ""
+            data[f"item_category_{idx}"] = self.sales.id
+            data[f"item_description_{idx}"] = description
+            data[f"item_amount_{idx}"] = amount
+            data[f"item_tax_exempt_{idx}"] = ""
+        return data
+
+    def test_invoice_edit_keeps_unchanged_items(self):
+        invoice = self._invoice(3)
+        first, second, third = invoice.items.all()
+        data = self._invoice_post(
+            [(first.id, "Line 0", "10.00"), (third.id, "Changed", "25.00"), (None, "New", "5.00")]
+        )
+        response = self.client.post(reverse("fincore:sales_invoice_edit", args=[invoice.id]), data)
+
+        self.assertEqual(response.status_code, 302)
+        items = list(invoice.items.all())
+        self.assertEqual([item.description for item in items], ["Line 0", "Changed", "New"])
+        self.assertEqual(items[0].id, first.id)
+        self.assertEqual(items[1].id, third.id)
+        self.assertFalse(InvoiceItem.objects.filter(id=second.id).exists())
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.total, Decimal("40.00"))
+
+    def test_invoice_edit_ignores_foreign_item_ids(self):
+        invoice = self._invoice(1)
+        other = Invoice.objects.create(
+            number="INV-2", customer=self.customer, account=self.account, date=date(2024, 1, 1),
+            subtotal=Decimal("10"), total=Decimal("10"),
+        )
+        foreign = InvoiceItem.objects.create(invoice=other, category=self.sales, amount=Decimal("10"), total=Decimal("10"))
+        data = self._invoice_post([(foreign.id, "Hijack", "1.00")])
+        self.client.post(reverse("fincore:sales_invoice_edit", args=[invoice.id]), data)
+
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.invoice_id, other.id)
+        self.assertEqual(list(invoice.items.values_list("description", flat=True)), ["Hijack"])
+
+    def test_invoice_edit_query_count_does_not_grow_with_lines(self):
+        counts = []
+        for lines in (3, 60):
+            Invoice.objects.all().delete()
+            invoice = self._invoice(lines)
+            items = [(item.id, "Updated", "12.00") for item in invoice.items.all()]
+            data = self._invoice_post(items + [(None, "New", "1.00")] * lines)
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(reverse("fincore:sales_invoice_edit", args=[invoice.id]), data)
+            counts.append(len(queries))
+            self.assertEqual(invoice.items.count(), lines * 2)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_invoice_create_accepts_max_line_items(self):
+        data = self._invoice_post([(None, f"Line {n}", "1.00") for n in range(MAX_LINE_ITEMS)])
+        response = self.client.post(reverse("fincore:sales_invoice_create"), data)
+
+        self.assertEqual(response.status_code, 302)
+        invoice = Invoice.objects.get()
+        self.assertEqual(invoice.items.count(), MAX_LINE_ITEMS)
+        self.assertEqual(invoice.total, Decimal(MAX_LINE_ITEMS))
+
+    def test_bill_edit_diffs_items(self):
+        bill = Bill.objects.create(
+            number="B-1", vendor=self.supplier, account=self.account, date=date(2024, 1, 1),
+            subtotal=Decimal("30"), total=Decimal("30"),
+        )
+        BillItem.objects.bulk_create(
+            BillItem(bill=bill, category=self.supplies, description=name, amount=Decimal("15"), total=Decimal("15"))
+            for name in ("Paper", "Ink")
+        )
+        kept, dropped = bill.items.all()
+        data = {
+            "vendor_id": self.supplier.id,
+            "account_id": self.account.id,
+            "date": "2024-01-01",
+            "item_count": 2,
+            "item_id_1": kept.id,
+            "item_category_1": self.supplies.id,
+            "item_description_1": "Paper",
+            "item_amount_1": "15.00",
+            "item_category_2": self.supplies.id,
+            "item_description_2": "Toner",
+            "item_amount_2": "40.00",
+        }
+        response = self.client.post(reverse("fincore:bill_edit", args=[bill.id]), data)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(bill.items.values_list("description", flat=True)), ["Paper", "Toner"])
+        self.assertEqual(bill.items.first().id, kept.id)
+        self.assertFalse(BillItem.objects.filter(id=dropped.id).exists())
+        bill.refresh_from_db()
+        self.assertEqual(bill.total, Decimal("55.00"))
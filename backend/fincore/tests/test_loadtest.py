@@ -0,0 +1,85 @@
+import time
+from datetime import date
+
+from django.test import LiveServerTestCase, SimpleTestCase
+from django.urls import reverse
+
+from fincore.loadtest import Bookkeeper, LoadTest, Response, Stats, Targets, percentile
+from fincore.models import ImportBatch, InvoicePayment, Transaction
+from fincore.services.ledger_generator import generate_ledger
+
+
+class StatsTests(SimpleTestCase):
+    def test_percentiles_and_error_counts(self):
+        ordered = [n / 1000 for n in range(1, 101)]
+        self.assertEqual(percentile(ordered, 50), 0.05)
+        self.assertEqual(percentile(ordered, 99), 0.099)
+
+        stats = Stats()
+        stats.record("table", 0.01, 200)
+        stats.record("table", 0.02, 500, locked=True)
+        stats.record("table", 0.03, None)
+        stats.record("table", 0.04, 400)
+        row = stats.summary(elapsed=2)[0]
+        self.assertEqual((row["requests"], row["errors"], row["client_errors"], row["locked"]), (4, 2, 1, 1))
+        self.assertEqual(row["rps"], 2)
+
+
+class InvoiceLedger:
+    """Stands in for the server: one invoice that another bookkeeper matches at the same time."""
+
+    def __init__(self):
+        self.payments = {7}
+        self.deleted = []
+
+    def get(self, label, path, params=None, htmx=True):
+        if label == "sales_invoice_matches":
+            return Response(200, {}, '<input name="match_42">')
+        links = "".join(f'<a href="/sales/transactions/payment/{pk}/delete/">' for pk in sorted(self.payments))
+        return Response(200, {}, links)
+
+    def post(self, label, path, data=None, files=None):
+        if label == "sales_invoice_match_apply":
+            self.payments |= {8, 9}  # ours, and a concurrent one with a higher id
+        else:
+            pk = int(path.rstrip("/").split("/")[-2])
+            self.deleted.append(pk)
+            self.payments.discard(pk)
+        return Response(200, {}, "")
+
+
+class MatchScenarioTests(SimpleTestCase):
+    def test_undo_removes_every_payment_added_since_the_apply(self):
+        targets = Targets(accounts=[1], categories=[], search_terms=[], invoices=[5], first_date=None, last_date=None)
+        loadtest = LoadTest("http://testserver", targets, think=(0, 0))
+        bookkeeper = Bookkeeper(loadtest, 0, Stats())
+        bookkeeper.session = ledger = InvoiceLedger()
+        bookkeeper.scenario_match(deadline=time.monotonic() + 1)
+        self.assertEqual(ledger.deleted, [8, 9])
+        self.assertEqual(ledger.payments, {7})
+
+
+class LoadTestRunTests(LiveServerTestCase):
+    def test_scenarios_run_cleanly_and_leave_the_ledger_unchanged(self):
+        generate_ledger(transactions=300, seed=9, years=1, end=date(2026, 6, 30))
+        transactions, payments = Transaction.objects.count(), InvoicePayment.objects.count()
+        # One bookkeeper: the live server shares the in-memory test database connection across threads.
+        loadtest = LoadTest(
+            self.live_server_url, Targets.discover(), concurrency=1, duration=0.5, think=(0, 0), import_rows=10
+        )
+
+        stats = Stats()
+        bookkeeper = Bookkeeper(loadtest, 0, stats)
+        bookkeeper.session.get("transaction_list", reverse("fincore:transaction_list"), htmx=False)
+        for scenario in ("filter", "report", "import", "match"):
+            getattr(bookkeeper, f"scenario_{scenario}")(deadline=time.monotonic() + 60)
+        timed, _elapsed = loadtest.run()
+
+        rows = {row["endpoint"]: row for row in stats.summary(1) + timed.summary(1)}
+        self.assertTrue(
+            {"transaction_table", "profit_loss_content", "import_stage", "import_commit", "import_rollback"} <= set(rows)
+        )
+        self.assertEqual(sum(row["errors"] for row in rows.values()), 0)
+        self.assertEqual(Transaction.objects.count(), transactions)
+        self.assertEqual(InvoicePayment.objects.count(), payments)
+        self.assertFalse(ImportBatch.objects.filter(filename="loadtest.csv", status="imported").exists())
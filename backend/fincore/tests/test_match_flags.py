@@ -0,0 +1,67 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from fincore.models import Account, Bill, BillPayment, Category, Invoice, InvoiceItem, InvoicePayment, Transaction, Vendor
+from fincore.services.invoice_matching import allocate_invoice_payments
+
+
+class MatchFlagTests(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(name="Checking")
+        self.sales = Category.objects.create(name="Sales", kind="income")
+        self.customer = Vendor.objects.create(name="Acme", kind="payer")
+        self.supplier = Vendor.objects.create(name="Supplier", kind="payee")
+        self.invoice = Invoice.objects.create(
+            number="INV-1", customer=self.customer, account=self.account, date=date(2024, 1, 1),
+            status="sent", subtotal=Decimal("50.00"), total=Decimal("50.00"),
+        )
+        InvoiceItem.objects.create(invoice=self.invoice, category=self.sales, amount=Decimal("50"), total=Decimal("50"))
+        self.deposit = Transaction.objects.create(
+            date=date(2024, 1, 3), account=self.account, amount=Decimal("50.00"), kind="income",
+            description="Deposit", is_imported=True,
+        )
+
+    def test_flags_follow_invoice_match_and_unmatch(self):
+        allocate_invoice_payments([(self.invoice.id, self.deposit.id, Decimal("50.00"))])
+        self.deposit.refresh_from_db()
+        self.assertTrue(self.deposit.is_invoice_matched)
+
+        payment = InvoicePayment.objects.get()
+        self.client.post(reverse("fincore:sales_invoice_payment_delete", args=[payment.id]))
+        self.deposit.refresh_from_db()
+        self.assertFalse(self.deposit.is_invoice_matched)
+
+    def test_flags_follow_bill_match_and_unmatch(self):
+        bill = Bill.objects.create(
+            number="B-1", vendor=self.supplier, account=self.account, date=date(2024, 1, 1),
+            status="received", total=Decimal("20.00"),
+        )
+        debit = Transaction.objects.create(
+            date=date(2024, 1, 2), account=self.account, amount=Decimal("-20.00"), kind="expense",
+            description="Debit", is_imported=True,
+        )
+        self.client.post(reverse("fincore:bill_match_apply"), {"bill_id": bill.id, f"match_txn_{debit.id}": "20.00"})
+        debit.refresh_from_db()
+        self.assertTrue(debit.is_bill_matched)
+
+        self.client.post(reverse("fincore:bill_payment_delete", args=[BillPayment.objects.get().id]))
+        debit.refresh_from_db()
+        self.assertFalse(debit.is_bill_matched)
+
+    def test_repair_command_fixes_drift(self):
+        InvoicePayment.objects.create(invoice=self.invoice, transaction=self.deposit, amount=Decimal("50.00"))
+        stdout = StringIO()
+        call_command("repair_match_flags", "--dry-run", stdout=stdout)
+        self.assertIn("1 transactions have stale match flags", stdout.getvalue())
+
+        call_command("repair_match_flags", stdout=StringIO())
+        self.deposit.refresh_from_db()
+        self.assertTrue(self.deposit.is_invoice_matched)
+        stdout = StringIO()
+        call_command("repair_match_flags", "--dry-run", stdout=stdout)
+        self.assertIn("0 transactions", stdout.getvalue())
@@ -0,0 +1,117 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from fincore.models import Account, ImportBatch, Transaction
+from fincore.services.normalization import (
+    format_cents,
+    infer_date_format,
+    normalize_amount_columns,
+    normalize_date_column,
+)
+
+
+class AmountNormalizationTests(SimpleTestCase):
+    def test_signed_strategy(self):
+        cents, errors = normalize_amount_columns(
+            {"amount": ["-44.22", "$1,828.7", "(12.50)", "", "abc", "1.005"]}, "signed"
+        )
+        self.assertEqual(cents, [-4422, 182870, -1250, None, None, 100])
+        self.assertEqual(errors, {3: ["Missing amount value."], 4: ["Invalid amount value."]})
+
+    def test_indicator_strategy(self):
+        cents, errors = normalize_amount_columns(
+            {
+                "amount": ["10.00", "-5", "7", "", "3"],
+                "indicator": ["credit", "Debit", "other", "", "Credit"],
+            },
+            "indicator",
+            "Credit",
+            "Debit",
+        )
+        self.assertEqual(cents, [1000, -500, None, None, 300])
+        self.assertEqual(
+            errors,
+            {
+                2: ["Unknown indicator 'other'."],
+                3: ["Missing amount value.", "Missing indicator value."],
+            },
+        )
+
+    def test_split_columns_strategy(self):
+        cents, errors = normalize_amount_columns(
+            {"debit": ["12.00", "", "1", "", "x"], "credit": ["", "€3.10", "2", "", ""]},
+            "split_columns",
+        )
+        self.assertEqual(cents, [-1200, 310, None, None, None])
+        self.assertEqual(
+            errors,
+            {
+                2: ["Both debit and credit populated."],
+                3: ["Both debit and credit empty."],
+                4: ["Invalid amount value."],
+            },
+        )
+
+    def test_format_cents(self):
+        self.assertEqual(format_cents(-4420), "-44.20")
+        self.assertEqual(format_cents(5), "0.05")
+
+
+class DateNormalizationTests(SimpleTestCase):
+    def test_infers_format_once_and_reports_by_index(self):
+        values = ["01/31/2024", "2/1/2024", "", "13/40/2024", "2024-02-03"]
+        self.assertEqual(infer_date_format(values), "%m/%d/%Y")
+        ordinals, errors, fmt = normalize_date_column(values)
+        self.assertEqual(fmt, "%m/%d/%Y")
+        self.assertEqual(ordinals[0], date(2024, 1, 31).toordinal())
+        self.assertEqual(ordinals[1], date(2024, 2, 1).toordinal())
+        # Mixed formats still fall back to the other supported layouts.
+        self.assertEqual(ordinals[4], date(2024, 2, 3).toordinal())
+        self.assertEqual(errors, {2: ["Missing date value."], 3: ["Invalid date value."]})
+
+    def test_two_digit_years_follow_strptime(self):
+        ordinals, errors, fmt = normalize_date_column(["12/31/68", "01/01/69"])
+        self.assertEqual(fmt, "%m/%d/%y")
+        self.assertEqual(date.fromordinal(ordinals[0]), date(2068, 12, 31))
+        self.assertEqual(date.fromordinal(ordinals[1]), date(1969, 1, 1))
+        self.assertEqual(errors, {})
+
+
+class ImportStageCommitTests(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(name="Checking")
+
+    def test_stage_and_commit_split_columns(self):
+        content = "Posting Date,Details,Debit,Credit\n01/05/2024,Coffee,4.50,\n01/06/2024,Refund,,\"1,200.00\"\n"
+        response = self.client.post(
+            reverse("fincore:import_stage"),
+            {
+                "csv_file": SimpleUploadedFile("bank.csv", content.encode("utf-8")),
+                "account_id": self.account.id,
+                "mapping": json.dumps(
+                    {
+                        "Posting Date": "date",
+                        "Details": "description",
+                        "Debit": "debit",
+                        "Credit": "credit",
+                    }
+                ),
+                "amount_strategy": "split_columns",
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        batch = ImportBatch.objects.get()
+        self.assertEqual(batch.status, "validated")
+        self.assertEqual(batch.date_format, "%m/%d/%Y")
+
+        self.client.post(reverse("fincore:import_commit", args=[batch.id]))
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, "imported")
+        amounts = dict(Transaction.objects.values_list("description", "amount"))
+        self.assertEqual(amounts, {"Coffee": Decimal("-4.50"), "Refund": Decimal("1200.00")})
+        self.assertEqual(Transaction.objects.get(description="Coffee").date, date(2024, 1, 5))
@@ -0,0 +1,134 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from fincore.db import postgres
+from fincore.models import Account, Category, ImportBatch, ImportRow, Transaction, Vendor
+
+
+class LedgerMixin:
+    def setUp(self):
+        self.checking = Account.objects.create(name="Checking")
+        self.savings = Account.objects.create(name="Harbor Savings")
+        self.office = Category.objects.create(name="Office", kind="expense")
+        self.sales = Category.objects.create(name="Sales", kind="income")
+        self.vendor = Vendor.objects.create(name="Paper Co")
+        self.txn(date(2024, 1, 5), self.checking, self.office, "-10.00", description="Paper", vendor=self.vendor)
+        self.txn(date(2024, 1, 20), self.checking, self.office, "-5.50", payee="Staples")
+        self.txn(date(2024, 2, 3), self.savings, self.sales, "120.00", description="Client A")
+
+    def txn(self, when, account, category, amount, **extra):
+        return Transaction.objects.create(
+            date=when, account=account, category=category, amount=Decimal(amount), kind=category.kind, **extra
+        )
+
+
+class PortableFallbackTests(LedgerMixin, TestCase):
+    def test_bulk_insert_uses_the_orm_off_postgres(self):
+        if connection.vendor == "postgresql":
+            self.skipTest("COPY path is covered by PostgresFastPathTests")
+        batch = ImportBatch.objects.create(account=self.checking, filename="a.csv")
+        rows = [ImportRow(batch=batch, raw_row={"n": n}, mapped={"amount": n}) for n in range(3)]
+        self.assertEqual(postgres.bulk_insert(ImportRow, rows), 3)
+        self.assertEqual(postgres.bulk_insert(ImportRow, []), 0)
+        self.assertEqual(sorted(batch.rows.values_list("mapped__amount", flat=True)), [0, 1, 2])
+        self.assertIsNone(postgres.monthly_category_totals(["expense"], date(2024, 1, 1), date(2024, 12, 31)))
+
+    def test_search_matches_account_names(self):
+        User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.login(username="admin", password="pw")
+        url = reverse("fincore:transaction_table")
+        response = self.client.get(url, {"account_id": self.savings.id, "q": "harbor"}, HTTP_HX_REQUEST="true")
+        self.assertContains(response, "Client A")
+        response = self.client.get(url, {"account_id": self.checking.id, "q": "harbor"}, HTTP_HX_REQUEST="true")
+        self.assertNotContains(response, "Paper")
+        response = self.client.get(url, {"account_id": self.checking.id, "q": "paper"}, HTTP_HX_REQUEST="true")
+        self.assertContains(response, "Paper")
+        self.assertNotContains(response, "Staples")
+
+
+@skipUnless(connection.vendor == "postgresql", "PostgreSQL fast paths")
+class PostgresFastPathTests(LedgerMixin, TestCase):
+    def orm_totals(self, kinds):
+        rows = (
+            Transaction.objects.reportable()
+            .filter(category__isnull=False, kind__in=kinds, is_invoice_matched=False)
+            .annotate(period=TruncMonth("date"))
+            .values("category_id", "period")
+            .annotate(total=Sum("amount"))
+        )
+        return {(row["category_id"], row["period"]): row["total"] for row in rows}
+
+    def view_totals(self, kinds, **filters):
+        rows = postgres.monthly_category_totals(kinds, date(2024, 1, 1), date(2024, 12, 31), **filters)
+        return {(row["category_id"], row["period"]): row["total"] for row in rows}
+
+    def test_copy_round_trips_awkward_values(self):
+        batch = ImportBatch.objects.create(account=self.checking, filename="a.csv")
+        mapped = {"description": "tab\there", "note": "back\\slash\nnewline", "amount": None}
+        postgres.copy_rows(ImportRow, [ImportRow(batch=batch, raw_row=["a", "b"], mapped=mapped)])
+        postgres.copy_rows(
+            Transaction,
+            [
+                Transaction(
+                    date=date(2024, 3, 1), account=self.checking, category=self.office, amount=Decimal("-1.25"),
+                    kind="expense", description="Line\\one\r\ntwo", is_imported=True,
+                )
+            ],
+        )
+        row = batch.rows.get()
+        self.assertEqual((row.raw_row, row.mapped, row.errors), (["a", "b"], mapped, []))
+        self.assertIsNotNone(row.created_at)
+        txn = Transaction.objects.get(date=date(2024, 3, 1))
+        self.assertEqual((txn.description, txn.amount, txn.vendor_id), ("Line\\one\r\ntwo", Decimal("-1.25"), None))
+        self.assertTrue(txn.is_imported)
+
+    def test_view_is_used_only_while_current(self):
+        self.assertTrue(postgres.refresh_report_views())
+        self.assertEqual(self.view_totals(["expense"]), self.orm_totals(["expense"]))
+        self.assertEqual(self.view_totals(["income"], account_id=self.checking.id), {})
+        self.assertEqual(
+            self.view_totals(["expense"], vendor_id=self.vendor.id), {(self.office.id, date(2024, 1, 1)): Decimal("-10.00")}
+        )
+        self.assertIsNone(postgres.monthly_category_totals(["expense"], date(2024, 1, 15), date(2024, 12, 31)))
+
+        self.txn(date(2024, 2, 9), self.checking, self.office, "-3.00")
+        with mock.patch.object(postgres, "schedule_refresh") as schedule:
+            self.assertIsNone(postgres.monthly_category_totals(["expense"], date(2024, 1, 1), date(2024, 12, 31)))
+        schedule.assert_called_once()
+
+        self.assertTrue(postgres.refresh_report_views())
+        self.assertFalse(postgres.refresh_report_views())
+        self.assertEqual(self.view_totals(["expense"]), self.orm_totals(["expense"]))
+
+    def test_in_flight_batches_are_left_out(self):
+        batch = ImportBatch.objects.create(account=self.checking, filename="a.csv", status="imported")
+        self.txn(date(2024, 1, 9), self.checking, self.office, "-99.00", import_batch=batch, is_imported=True)
+        ImportBatch.objects.filter(pk=batch.pk).update(status="rolling_back")
+        postgres.refresh_report_views()
+        self.assertEqual(self.view_totals(["expense"]), self.orm_totals(["expense"]))
+
+    def test_profit_and_loss_matches_the_live_query(self):
+        User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.login(username="admin", password="pw")
+        postgres.refresh_report_views()
+        query = {"date_range": "custom", "date_from": "2024-01-01", "date_to": "2024-12-31", "display_by": "months"}
+        url = reverse("fincore:profit_loss_content")
+        fast = self.client.get(url, query, HTTP_HX_REQUEST="true")
+        with override_settings(FINCORE_POSTGRES_FAST_PATHS=False):
+            live = self.client.get(url, query, HTTP_HX_REQUEST="true")
+        for key in ("income_rows", "cogs_rows", "payroll_rows", "expense_rows"):
+            self.assertEqual(fast.context[key], live.context[key], key)
+
+    def test_indexes_exist(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'fincore_transaction'")
+            names = {name for (name,) in cursor.fetchall()}
+        self.assertLessEqual({"fincore_txn_date_brin", "fincore_txn_payee_trgm", "fincore_txn_description_trgm"}, names)
@@ -0,0 +1,117 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from fincore.models import (
+    Account,
+    Bill,
+    Category,
+    DocumentSequence,
+    Invoice,
+    RecurringTemplate,
+    RecurringTemplateItem,
+    Vendor,
+)
+from fincore.services.recurring import generate_recurring
+
+
+class RecurringGenerationTests(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(name="Checking")
+        self.income = Category.objects.create(name="Retainers", kind="income")
+        self.rent = Category.objects.create(name="Rent", kind="expense")
+        self.landlord = Vendor.objects.create(name="Landlord", kind="payee")
+
+    def _invoice_template(self, customer, start=date(2024, 1, 31), **extra):
+        template = RecurringTemplate.objects.create(
+            name=f"Retainer {customer.name}", kind="invoice", counterparty=customer, account=self.account,
+            start_date=start, tax_rate=Decimal("10"), due_days=15, **extra,
+        )
+        RecurringTemplateItem.objects.create(template=template, category=self.income, description="Retainer", amount=Decimal("100.00"))
+        RecurringTemplateItem.objects.create(
+            template=template, category=self.income, description="Filing fee", amount=Decimal("20.00"), tax_exempt=True
+        )
+        return template
+
+    def test_generates_invoices_and_bills_once_per_period(self):
+        template = self._invoice_template(Vendor.objects.create(name="Acme", kind="payer"))
+        bill_template = RecurringTemplate.objects.create(
+            name="Office rent", kind="bill", counterparty=self.landlord, account=self.account,
+            frequency="quarterly", start_date=date(2024, 1, 1),
+        )
+        RecurringTemplateItem.objects.create(template=bill_template, category=self.rent, amount=Decimal("900.00"))
+
+        result = generate_recurring(date(2024, 3, 31))
+
+        self.assertEqual((result.invoices, result.bills), (3, 1))
+        invoices = list(Invoice.objects.order_by("date"))
+        self.assertEqual([invoice.date for invoice in invoices], [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)])
+        self.assertEqual(invoices[0].due_date, date(2024, 2, 15))
+        self.assertEqual(invoices[0].total, Decimal("130.00"))
+        self.assertEqual(invoices[0].items.count(), 2)
+        self.assertEqual(sorted(invoice.number for invoice in invoices), ["INV-000001", "INV-000002", "INV-000003"])
+        self.assertEqual(Bill.objects.get().total, Decimal("900.00"))
+        template.refresh_from_db()
+        self.assertEqual(template.next_run_date, date(2024, 4, 30))
+
+        # Rewinding a template does not duplicate periods that already have a document.
+        RecurringTemplate.objects.filter(pk=template.pk).update(next_run_date=date(2024, 1, 31))
+        result = generate_recurring(date(2024, 3, 31))
+        self.assertEqual((result.invoices, result.skipped), (0, 3))
+        self.assertEqual(Invoice.objects.count(), 3)
+
+    def test_end_date_and_inactive_templates_are_respected(self):
+        self._invoice_template(Vendor.objects.create(name="Short", kind="payer"), end_date=date(2024, 2, 15))
+        self._invoice_template(Vendor.objects.create(name="Paused", kind="payer"), is_active=False)
+
+        result = generate_recurring(date(2024, 6, 30))
+        self.assertEqual(result.invoices, 1)
+
+    def test_run_query_count_does_not_grow_with_templates(self):
+        DocumentSequence.objects.create(name="invoice", prefix="INV-")
+        counts = []
+        for batch in range(2):
+            customers = Vendor.objects.bulk_create(
+                Vendor(name=f"Customer {batch}-{n}", kind="payer") for n in range(3 if batch == 0 else 40)
+            )
+            for customer in customers:
+                self._invoice_template(customer, start=date(2024, 1 + batch, 1))
+            with CaptureQueriesContext(connection) as queries:
+                generate_recurring(date(2024, 1 + batch, 1))
+            counts.append(len(queries))
+        self.assertEqual(Invoice.objects.count(), 3 + 3 + 40)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_command_dry_run_writes_nothing(self):
+        self._invoice_template(Vendor.objects.create(name="Acme", kind="payer"))
+        stdout = StringIO()
+        call_command("generate_recurring", "--date", "2024-02-29", "--dry-run", stdout=stdout)
+        self.assertIn("Would generate 2 documents", stdout.getvalue())
+        self.assertFalse(Invoice.objects.exists())
+
+        call_command("generate_recurring", "--date", "2024-02-29", stdout=stdout)
+        self.assertIn("Generated 2 invoices and 0 bills", stdout.getvalue())
+
+    def test_sequence_numbers_manual_documents(self):
+        DocumentSequence.allocate("invoice", 4)
+        customer = Vendor.objects.create(name="Acme", kind="payer")
+        response = self.client.post(
+            reverse("fincore:sales_invoice_create"),
+            {
+                "customer_id": customer.id,
+                "account_id": self.account.id,
+                "date": "2024-01-01",
+                "tax_rate": "0",
+                "item_count": 1,
+                "item_category_1": self.income.id,
+                "item_amount_1": "10.00",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Invoice.objects.get().number, "INV-000005")
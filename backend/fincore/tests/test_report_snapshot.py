@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from fincore.db.reports import REPORTS_ALIAS, refresh_snapshot, reports_database
+from fincore.db.routers import ReportsRouter
+from fincore.models import Transaction
+
+
+class RefreshSnapshotTests(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.source = os.path.join(self.tmpdir.name, "live.sqlite3")
+        self.target = os.path.join(self.tmpdir.name, "reports.sqlite3")
+        live = sqlite3.connect(self.source)
+        live.execute("PRAGMA journal_mode = WAL")
+        live.execute("CREATE TABLE t (n INTEGER)")
+        live.executemany("INSERT INTO t VALUES (?)", [(n,) for n in range(100)])
+        live.commit()
+        self.live = live
+        self.addCleanup(live.close)
+
+    def _count(self):
+        snapshot = sqlite3.connect(f"file:{self.target}?mode=ro&immutable=1", uri=True)
+        try:
+            return snapshot.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+        finally:
+            snapshot.close()
+
+    def test_copies_committed_rows_and_replaces_previous_snapshot(self):
+        refresh_snapshot(source=self.source, target=self.target)
+        self.assertEqual(self._count(), 100)
+
+        self.live.execute("INSERT INTO t VALUES (100)")
+        self.live.commit()
+        refresh_snapshot(source=self.source, target=self.target)
+        self.assertEqual(self._count(), 101)
+        self.assertFalse(os.path.exists(f"{self.target}.tmp"))
+
+    def test_writer_is_not_blocked_while_copying(self):
+        self.live.execute("BEGIN IMMEDIATE")
+        self.live.execute("INSERT INTO t VALUES (-1)")
+        refresh_snapshot(source=self.source, target=self.target)
+        self.live.commit()
+        self.assertEqual(self._count(), 100)
+
+
+class ReportsRoutingTests(TestCase):
+    def setUp(self):
+        handle, self.snapshot = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.remove, self.snapshot)
+        self.databases_with_reports = {**settings.DATABASES, REPORTS_ALIAS: settings.DATABASES["default"]}
+        self.router = ReportsRouter()
+
+    def test_reads_use_snapshot_only_when_fresh_enough(self):
+        with override_settings(
+            DATABASES=self.databases_with_reports,
+            FINCORE_REPORTS_SNAPSHOT=self.snapshot,
+            FINCORE_REPORTS_MAX_STALENESS=60,
+        ):
+            self.assertIsNone(self.router.db_for_read(Transaction))
+            with reports_database() as alias:
+                self.assertEqual(alias, REPORTS_ALIAS)
+                self.assertEqual(self.router.db_for_read(Transaction), REPORTS_ALIAS)
+                self.assertIsNone(self.router.db_for_read(User))
+                self.assertIsNone(self.router.db_for_write(Transaction))
+            with reports_database(fresh=True) as alias:
+                self.assertIsNone(alias)
+
+            stale = time.time() - 120
+            os.utime(self.snapshot, (stale, stale))
+            with reports_database() as alias:
+                self.assertIsNone(alias)
+
+    def test_report_view_reads_live_without_snapshot(self):
+        response = self.client.get(reverse("fincore:sales_tax_report"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Fincore-Report-Source"], "live")
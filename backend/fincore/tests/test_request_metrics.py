@@ -0,0 +1,85 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from fincore import metrics
+from fincore.middleware import (
+    LOCKED_HEADER,
+    RequestMetricsMiddleware,
+    duplicate_queries,
+    locked_errors,
+    query_count,
+    request_seconds,
+    template_seconds,
+)
+from fincore.models import Account, Category, Transaction
+
+VIEW = "fincore:transaction_table"
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        account = Account.objects.create(name="Checking")
+        category = Category.objects.create(name="Office", kind="expense")
+        Transaction.objects.create(
+            date=date(2024, 1, 1), account=account, category=category, amount=Decimal("-10.00"),
+            kind="expense", description="Paper", is_imported=True,
+        )
+
+    def test_server_timing_header_and_histograms(self):
+        response = self.client.get(reverse(VIEW), HTTP_HX_REQUEST="true")
+        self.assertEqual(response.status_code, 200)
+
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r"^app;dur=[\d.]+, db;dur=[\d.]+;desc=\"\d+ queries, \d+ repeated\", tpl;dur=[\d.]+$")
+
+        self.assertEqual(request_seconds.series(view=VIEW)["count"], 1)
+        self.assertGreater(query_count.series(view=VIEW)["sum"], 0)
+        self.assertGreater(template_seconds.series(view=VIEW)["sum"], 0)
+        self.assertEqual(metrics.counter("fincore_requests_total").value(view=VIEW, status=200), 1)
+
+    @override_settings(FINCORE_DUPLICATE_QUERY_THRESHOLD=3)
+    def test_repeated_statements_are_flagged(self):
+        def n_plus_one_view(request):
+            for pk in range(4):
+                Category.objects.filter(pk=pk).exists()
+            return HttpResponse("ok")
+
+        request = RequestFactory().get("/")
+        request.resolver_match = resolve(reverse(VIEW))
+        with self.assertLogs("fincore.middleware", "WARNING") as logs:
+            response = RequestMetricsMiddleware(n_plus_one_view)(request)
+        self.assertIn('desc="4 queries, 3 repeated"', response["Server-Timing"])
+        self.assertEqual(duplicate_queries.value(view=VIEW), 3)
+        self.assertIn("statement ran 4 times", logs.output[0])
+
+    def test_locked_database_errors_are_labelled(self):
+        self.client.raise_request_exception = False
+        with mock.patch(
+            "fincore.views.transaction_views._profit_loss_context",
+            side_effect=OperationalError("database is locked"),
+        ):
+            response = self.client.get(reverse("fincore:profit_loss_report"))
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response[LOCKED_HEADER], "1")
+        self.assertEqual(locked_errors.value(view="fincore:profit_loss_report"), 1)
+
+    @override_settings(FINCORE_REQUEST_METRICS=False)
+    def test_disabled_middleware_is_not_loaded(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            RequestMetricsMiddleware(lambda request: HttpResponse())
+
+    @override_settings(FINCORE_METRICS_TOKEN="s3cret")
+    def test_metrics_endpoint_token(self):
+        self.client.get(reverse(VIEW))
+        self.assertEqual(self.client.get(reverse("fincore:metrics")).status_code, 403)
+        response = self.client.get(reverse("fincore:metrics"), HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'fincore_request_queries_count{{view="{VIEW}"}} 1'.encode(), response.content)
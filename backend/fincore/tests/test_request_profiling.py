@@ -0,0 +1,88 @@
+import marshal
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from fincore.models import Account, Category, RequestProfile, Transaction
+from fincore.profiling import PROFILE_HEADER, collapsed_stacks, trim_profiles
+
+
+class CollapsedStacksTests(SimpleTestCase):
+    def test_self_time_is_split_across_callers(self):
+        root, a, b, leaf = ("app.py", 1, "root"), ("app.py", 2, "a"), ("app.py", 3, "b"), ("~", 0, "<built-in sum>")
+        stats = {
+            root: (1, 1, 0.001, 0.010, {}),
+            a: (1, 1, 0.001, 0.004, {root: (1, 1, 0.001, 0.004)}),
+            b: (1, 1, 0.001, 0.005, {root: (1, 1, 0.001, 0.005)}),
+            leaf: (2, 2, 0.006, 0.006, {a: (1, 1, 0.003, 0.003), b: (1, 1, 0.003, 0.004)}),
+        }
+        folded = dict(line.rsplit(" ", 1) for line in collapsed_stacks(stats).splitlines())
+        self.assertEqual(folded["app:root"], "1000")
+        self.assertEqual(folded["app:root;app:a;<built-in_sum>"], "3000")
+        self.assertEqual(folded["app:root;app:b;<built-in_sum>"], "4000")
+
+
+class RequestProfilingTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        account = Account.objects.create(name="Checking")
+        category = Category.objects.create(name="Office", kind="expense")
+        Transaction.objects.create(
+            date=date(2024, 1, 1), account=account, category=category, amount=Decimal("-10.00"),
+            kind="expense", description="Paper", is_imported=True,
+        )
+        self.staff = User.objects.create_superuser("admin", "admin@example.com", "pw")
+
+    def test_flag_is_ignored_for_anonymous_users(self):
+        response = self.client.get(
+            reverse("fincore:transaction_table"), HTTP_X_FINCORE_PROFILE="1", HTTP_HX_REQUEST="true"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header(PROFILE_HEADER))
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_staff_request_is_profiled_and_downloadable(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse("fincore:transaction_table"), {"q": "Paper", "_profile": "1"}, HTTP_HX_REQUEST="true"
+        )
+        profile = RequestProfile.objects.get()
+        self.assertEqual(response[PROFILE_HEADER], str(profile.id))
+        self.assertEqual(profile.view, "fincore:transaction_table")
+        self.assertEqual(profile.query_string, "q=Paper")
+        self.assertEqual(profile.user, self.staff)
+
+        with profile.stats_file.open("rb") as handle:
+            self.assertTrue(any(name == "transaction_table" for _f, _l, name in marshal.load(handle)))
+        with profile.collapsed_file.open("r") as handle:
+            self.assertIn("fincore.views.transaction_views:transaction_table", handle.read())
+        with profile.allocations_file.open("r") as handle:
+            self.assertIn("Peak traced memory", handle.read())
+        self.assertTrue(Path(profile.stats_file.path).is_relative_to(Path(self.media) / "profiles"))
+
+        download = self.client.get(reverse("admin:fincore_requestprofile_download", args=[profile.id, "collapsed"]))
+        self.assertEqual(download.status_code, 200)
+        self.assertIn("attachment", download["Content-Disposition"])
+        change = self.client.get(reverse("admin:fincore_requestprofile_change", args=[profile.id]))
+        self.assertContains(change, "transaction_table")
+
+    @override_settings(FINCORE_PROFILE_KEEP=1)
+    def test_only_newest_profiles_are_kept(self):
+        self.client.force_login(self.staff)
+        for _ in range(2):
+            self.client.get(reverse("fincore:transaction_table"), HTTP_X_FINCORE_PROFILE="1", HTTP_HX_REQUEST="true")
+        self.assertEqual(RequestProfile.objects.count(), 1)
+        self.assertEqual(len(list((Path(self.media) / "profiles").iterdir())), 3)
+        self.assertEqual(trim_profiles(keep=0), 1)
+        self.assertEqual(list((Path(self.media) / "profiles").iterdir()), [])
@@ -0,0 +1,95 @@
+import io
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from fincore.models import Account, Category, Invoice, InvoiceItem, InvoicePayment, Transaction, Vendor
+from fincore.services.sales_tax import sales_tax_summary
+
+YEAR = (date(2024, 1, 1), date(2024, 12, 31))
+
+
+class SalesTaxReportTests(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(name="Checking")
+        self.sales = Category.objects.create(name="Sales", kind="income")
+        self.acme = Vendor.objects.create(name="Acme", kind="payer")
+        self.globex = Vendor.objects.create(name="Globex", kind="payer")
+        # 100 taxable at 10% + 50 exempt = 160 total.
+        self.invoice = self._invoice("INV-1", self.acme, date(2024, 1, 10), "10", [("100", False), ("50", True)])
+
+    def _invoice(self, number, customer, invoice_date, rate, lines, status="sent", tax_exclude=False):
+        rate = Decimal(rate)
+        invoice = Invoice.objects.create(
+            number=number, customer=customer, account=self.account, date=invoice_date, status=status,
+            tax_rate=rate, tax_exclude=tax_exclude,
+        )
+        subtotal = tax_total = Decimal("0.00")
+        for amount, exempt in lines:
+            amount = Decimal(amount)
+            tax = Decimal("0.00") if exempt or tax_exclude else (amount * rate / 100).quantize(Decimal("0.01"))
+            InvoiceItem.objects.create(
+                invoice=invoice, category=self.sales, amount=amount, tax_exempt=exempt, tax=tax, total=amount + tax
+            )
+            subtotal += amount
+            tax_total += tax
+        Invoice.objects.filter(pk=invoice.pk).update(subtotal=subtotal, tax_total=tax_total, total=subtotal + tax_total)
+        invoice.refresh_from_db()
+        return invoice
+
+    def _pay(self, invoice, amount, paid_on):
+        txn = Transaction.objects.create(
+            date=paid_on, account=self.account, amount=Decimal(amount), kind="income",
+            description="Deposit", is_imported=True,
+        )
+        InvoicePayment.objects.create(invoice=invoice, transaction=txn, amount=Decimal(amount))
+
+    def test_accrual_groups_by_period_and_rate_in_one_query(self):
+        self._invoice("INV-2", self.globex, date(2024, 1, 20), "5", [("200", False)])
+        self._invoice("INV-3", self.globex, date(2024, 2, 1), "10", [("40", False)], tax_exclude=True)
+        self._invoice("INV-4", self.globex, date(2024, 2, 2), "10", [("999", False)], status="void")
+
+        with CaptureQueriesContext(connection) as queries:
+            rows, totals = sales_tax_summary(*YEAR)
+        self.assertEqual(len(queries), 1)
+
+        summary = [(row["period"], row["rate"], row["taxable"], row["exempt"], row["tax"]) for row in rows]
+        self.assertEqual(
+            summary,
+            [
+                (date(2024, 1, 1), Decimal("5.00"), Decimal("200.00"), Decimal("0.00"), Decimal("10.00")),
+                (date(2024, 1, 1), Decimal("10.00"), Decimal("100.00"), Decimal("50.00"), Decimal("10.00")),
+                (date(2024, 2, 1), Decimal("10.00"), Decimal("0.00"), Decimal("40.00"), Decimal("0.00")),
+            ],
+        )
+        self.assertEqual(totals["tax"], Decimal("20.00"))
+
+    def test_cash_basis_allocates_tax_in_proportion_to_payments(self):
+        self._pay(self.invoice, "40.00", date(2024, 1, 25))
+        self._pay(self.invoice, "80.00", date(2024, 4, 2))
+
+        rows, totals = sales_tax_summary(*YEAR, basis="cash", period="quarter")
+        self.assertEqual([row["period"] for row in rows], [date(2024, 1, 1), date(2024, 4, 1)])
+        self.assertEqual(rows[0]["tax"], Decimal("2.50"))
+        self.assertEqual(rows[0]["taxable"], Decimal("25.00"))
+        self.assertEqual(rows[1]["tax"], Decimal("5.00"))
+        self.assertEqual(totals["exempt"], Decimal("37.50"))
+
+        rows, _ = sales_tax_summary(date(2024, 4, 1), date(2024, 6, 30), basis="cash", group_by="customer")
+        self.assertEqual([(row["customer"], row["tax"]) for row in rows], [("Acme", Decimal("5.00"))])
+
+    def test_report_renders_and_exports(self):
+        query = {"date_range": "custom", "date_from": "2024-01-01", "date_to": "2024-12-31"}
+        response = self.client.get(reverse("fincore:sales_tax_report"), query)
+        self.assertContains(response, "Jan 2024")
+
+        response = self.client.get(reverse("fincore:sales_tax_export_xlsx"), {**query, "group_by": "customer"})
+        with zipfile.ZipFile(io.BytesIO(response.content)) as workbook:
+            sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+        self.assertIn("Acme", sheet)
+        self.assertIn("<v>10.0</v>", sheet)
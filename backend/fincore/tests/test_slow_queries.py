@@ -0,0 +1,48 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from fincore.db.slow_queries import capture_slow_queries, normalize_sql
+from fincore.models import Account, SlowQuery
+from fincore.services.aging import aging_summary
+
+
+class SlowQueryRecorderTests(TestCase):
+    def test_fingerprint_ignores_literals_and_in_list_length(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id IN (%s, %s, %s) AND  name = 'x' LIMIT 21"),
+            "SELECT * FROM t WHERE id IN (%s, ...) AND name = ? LIMIT ?",
+        )
+        self.assertEqual(normalize_sql("WHERE id IN (%s, %s)"), normalize_sql("WHERE id IN (%s,%s,%s,%s)"))
+
+    def test_captures_call_site_params_and_plan(self):
+        with capture_slow_queries(threshold_ms=0) as recorder:
+            aging_summary("receivables", date(2024, 6, 30))
+        self.assertEqual(recorder.flush(view="fincore:aging_report"), 1)
+
+        query = SlowQuery.objects.get()
+        self.assertTrue(query.call_site.startswith("fincore.services.aging.aging_summary:"))
+        self.assertIn("fincore_invoice", query.sql)
+        self.assertIn("2024-06-30", query.params)
+        self.assertRegex(query.explain, r"SCAN|SEARCH")
+        self.assertEqual(query.view, "fincore:aging_report")
+
+    @override_settings(FINCORE_SLOW_QUERY_KEEP=3)
+    def test_ring_buffer_keeps_newest_rows(self):
+        for name in "abcde":
+            with capture_slow_queries(threshold_ms=0) as recorder:
+                Account.objects.filter(name=name).exists()
+            recorder.flush(view=name)
+        self.assertEqual(list(SlowQuery.objects.values_list("view", flat=True)), ["e", "d", "c"])
+
+    @override_settings(FINCORE_SLOW_QUERY_MS=0.000001)
+    def test_middleware_records_and_admin_groups(self):
+        self.client.get(reverse("fincore:aging_report"))
+        self.assertTrue(SlowQuery.objects.filter(view="fincore:aging_report").exists())
+
+        User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.login(username="admin", password="pw")
+        response = self.client.get(reverse("admin:fincore_slowquery_fingerprints"))
+        self.assertContains(response, "fincore.services.aging.aging_summary")
@@ -0,0 +1,34 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite-specific settings")
+class SqliteConnectionTests(TestCase):
+    def _pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_connection_pragmas_are_applied(self):
+        self.assertEqual(self._pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(self._pragma("temp_store"), 2)  # MEMORY
+        self.assertEqual(self._pragma("busy_timeout"), 5000)
+        self.assertEqual(self._pragma("cache_size"), -20000)
+        self.assertEqual(self._pragma("foreign_keys"), 1)
+
+    def test_write_transactions_begin_immediate(self):
+        self.assertEqual(connection.transaction_mode, "IMMEDIATE")
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite-specific command")
+class SqliteMaintenanceCommandTests(TransactionTestCase):
+    def test_maintenance_runs(self):
+        stdout = StringIO()
+        call_command("sqlite_maintenance", "--analyze", stdout=stdout)
+        output = stdout.getvalue()
+        self.assertIn("ANALYZE done.", output)
+        self.assertIn("Maintenance finished", output)
@@ -0,0 +1,133 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from fincore.models import Account, ImportBatch, Transaction
+from fincore.services.statement_parsers import iter_statement_rows
+
+OFX_SGML = b"""OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+CHARSET:1252
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>USD
+<BANKTRANLIST><DTSTART>20240101
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240105120000[-5:EST]<TRNAMT>-12.50<FITID>A1<NAME>Caf\xe9 &amp; Co<MEMO>POS</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240106<TRNAMT>1000.00<FITID>A2<NAME>Payroll</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+CAMT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02"><BkToCstmrStmt><Stmt>
+<Ntry><Amt Ccy="EUR">25.10</Amt><CdtDbtInd>DBIT</CdtDbtInd><Sts>BOOK</Sts><BookgDt><Dt>2024-02-01</Dt></BookgDt>
+<AcctSvcrRef>REF-1</AcctSvcrRef><NtryDtls><TxDtls><RltdPties><Cdtr><Nm>Stadtwerke</Nm></Cdtr></RltdPties>
+<RmtInf><Ustrd>Strom</Ustrd><Ustrd>Februar</Ustrd></RmtInf></TxDtls></NtryDtls></Ntry>
+<Ntry><Amt Ccy="EUR">5.00</Amt><CdtDbtInd>CRDT</CdtDbtInd><Sts>PDNG</Sts><BookgDt><Dt>2024-02-02</Dt></BookgDt></Ntry>
+<Ntry><Amt Ccy="EUR">100</Amt><CdtDbtInd>CRDT</CdtDbtInd><Sts><Cd>BOOK</Cd></Sts><BookgDt><DtTm>2024-02-03T10:00:00</DtTm></BookgDt>
+<NtryDtls><TxDtls><Refs><EndToEndId>E2E-9</EndToEndId></Refs><RltdPties><Dbtr><Pty><Nm>ACME GmbH</Nm></Pty></Dbtr></RltdPties></TxDtls></NtryDtls></Ntry>
+</Stmt></BkToCstmrStmt></Document>"""
+
+
+class StatementParserTests(SimpleTestCase):
+    def test_ofx_sgml(self):
+        statement_format, rows = iter_statement_rows(io.BytesIO(OFX_SGML), "bank.qfx")
+        rows = list(rows)
+        self.assertEqual(statement_format, "ofx")
+        self.assertEqual([mapped["external_id"] for _, mapped, _ in rows], ["A1", "A2"])
+        _, first, errors = rows[0]
+        self.assertEqual(errors, [])
+        self.assertEqual(first["amount_cents"], -1250)
+        self.assertEqual(first["payee"], "Café & Co")
+        self.assertEqual(first["description"], "Café & Co POS")
+        self.assertEqual(date.fromordinal(first["date_ordinal"]), date(2024, 1, 5))
+
+    def test_ofx_tag_split_across_chunks(self):
+        from fincore.services import statement_parsers
+
+        entries = list(
+            statement_parsers._ofx_tokens(io.StringIO("<STMTTRN><TRNAMT>-1.00<FITID>X</STMTTRN>"), chunk_size=3)
+        )
+        self.assertIn(("start", "FITID"), entries)
+        self.assertIn(("text", "X"), entries)
+
+    def test_camt053(self):
+        statement_format, rows = iter_statement_rows(io.BytesIO(CAMT), "statement.xml")
+        rows = [mapped for _, mapped, _ in rows]
+        self.assertEqual(statement_format, "camt053")
+        self.assertEqual([row["external_id"] for row in rows], ["REF-1", ""])
+        self.assertEqual([row["amount_cents"] for row in rows], [-2510, 10000])
+        self.assertEqual(rows[0]["description"], "Strom Februar")
+        self.assertEqual(rows[0]["payee"], "Stadtwerke")
+        self.assertEqual(rows[1]["payee"], "ACME GmbH")
+
+
+class StatementImportTests(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(name="Checking")
+
+    def _stage(self, content, name="bank.ofx"):
+        return self.client.post(
+            reverse("fincore:import_statement"),
+            {"statement_file": SimpleUploadedFile(name, content), "account_id": self.account.id},
+        )
+
+    def test_reimport_skips_known_fitids(self):
+        self._stage(OFX_SGML)
+        batch = ImportBatch.objects.get()
+        self.assertEqual(batch.status, "validated")
+        self.client.post(reverse("fincore:import_commit", args=[batch.id]))
+        txn = Transaction.objects.get(external_id="A1")
+        self.assertEqual(txn.amount, Decimal("-12.50"))
+        self.assertEqual(txn.payee, "Café & Co")
+        self.assertEqual((batch.source, txn.source), ("ofx", "ofx"))
+
+        self._stage(OFX_SGML)
+        second = ImportBatch.objects.exclude(pk=batch.pk).get()
+        self.assertTrue(all(row.mapped.get("duplicate") for row in second.rows.all()))
+        self.client.post(reverse("fincore:import_commit", args=[second.id]))
+        second.refresh_from_db()
+        self.assertEqual(second.status, "imported")
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    def test_overlapping_statements_skip_fitids_committed_in_between(self):
+        self._stage(OFX_SGML)
+        self._stage(OFX_SGML, name="again.ofx")
+        first, second = ImportBatch.objects.order_by("id")
+        self.assertFalse(any(row.mapped.get("duplicate") for row in second.rows.all()))
+        self.client.post(reverse("fincore:import_commit", args=[first.id]))
+        self.client.post(reverse("fincore:import_commit", args=[second.id]))
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.committed_count), ("imported", 0))
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    def test_camt_rows_are_committed_with_their_source(self):
+        self._stage(CAMT, name="bank.xml")
+        batch = ImportBatch.objects.get()
+        self.client.post(reverse("fincore:import_commit", args=[batch.id]))
+        self.assertEqual(set(Transaction.objects.values_list("source", flat=True)), {"camt"})
+
+    def test_camt_entries_sharing_an_end_to_end_id_are_all_imported(self):
+        entry = (
+            "<Ntry><Amt Ccy=\"EUR\">{amount}</Amt><CdtDbtInd>CRDT</CdtDbtInd><Sts>BOOK</Sts>"
+            "<BookgDt><Dt>2024-03-0{day}</Dt></BookgDt><NtryRef>1</NtryRef>"
+            "<NtryDtls><TxDtls><Refs><EndToEndId>RENT</EndToEndId></Refs></TxDtls></NtryDtls></Ntry>"
+        )
+        entries = "".join(entry.format(amount=amount, day=day) for day, amount in ((1, "800.00"), (2, "650.00")))
+        content = CAMT.replace(b"</Stmt>", entries.encode() + b"</Stmt>")
+        self._stage(content, name="bank.xml")
+        batch = ImportBatch.objects.get()
+        self.assertFalse(any(row.mapped.get("duplicate") for row in batch.rows.all()))
+        self.client.post(reverse("fincore:import_commit", args=[batch.id]))
+        self.assertEqual(
+            sorted(Transaction.objects.filter(external_id="").values_list("amount", flat=True)),
+            [Decimal("100.00"), Decimal("650.00"), Decimal("800.00")],
+        )
+
+    def test_unrecognised_file_is_rejected(self):
+        response = self._stage(b"Date,Amount\n", name="bank.csv")
+        self.assertContains(response, "Unrecognised statement file")
+        self.assertFalse(ImportBatch.objects.exists())
@@ -0,0 +1,89 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from fincore.models import Account, Transaction, TransferGroup
+from fincore.services.transfer_pairing import (
+    TransferCandidate,
+    create_transfer_groups,
+    load_candidates,
+    propose_transfer_pairs,
+)
+
+
+def _candidate(txn_id, account_id, day, cents, description=""):
+    return TransferCandidate(txn_id, account_id, date(2024, 1, day), cents, description)
+
+
+class ProposeTransferPairsTests(SimpleTestCase):
+    def test_nearest_date_then_description_wins(self):
+        candidates = [
+            _candidate(1, 1, 10, -5000, "Payment to card"),
+            _candidate(2, 2, 14, 5000, "Payment received"),
+            _candidate(3, 3, 11, 5000, "Deposit"),
+            _candidate(4, 1, 20, -7000, "Sweep to savings"),
+            _candidate(5, 3, 21, 7000, "Interest"),
+            _candidate(6, 2, 21, 7000, "Sweep from checking"),
+        ]
+        pairs = {pair.outflow.id: pair.inflow.id for pair in propose_transfer_pairs(candidates)}
+        self.assertEqual(pairs, {1: 3, 4: 6})
+
+    def test_same_account_and_window_are_respected(self):
+        candidates = [
+            _candidate(1, 1, 1, -100),
+            _candidate(2, 1, 1, 100),
+            _candidate(3, 2, 31, 100),
+        ]
+        self.assertEqual(propose_transfer_pairs(candidates, window_days=5), [])
+        pairs = propose_transfer_pairs(candidates, window_days=30)
+        self.assertEqual([(pair.outflow.id, pair.inflow.id) for pair in pairs], [(1, 3)])
+
+
+class PairTransfersCommandTests(TestCase):
+    def setUp(self):
+        self.checking = Account.objects.create(name="Checking")
+        self.card = Account.objects.create(name="Card")
+
+    def _txn(self, account, amount, day, **extra):
+        return Transaction.objects.create(
+            date=date(2024, 2, day), account=account, amount=Decimal(amount),
+            kind="income" if Decimal(amount) > 0 else "expense", description="Card payment",
+            is_imported=True, **extra,
+        )
+
+    def test_dry_run_then_pair(self):
+        out = self._txn(self.checking, "-250.00", 3)
+        inflow = self._txn(self.card, "250.00", 4)
+        self._txn(self.card, "99.00", 4)
+        locked = self._txn(self.card, "-99.00", 4, is_locked=True)
+
+        stdout = StringIO()
+        call_command("pair_transfers", "--dry-run", stdout=stdout)
+        self.assertIn("Would pair 1 transfers", stdout.getvalue())
+        self.assertFalse(TransferGroup.objects.exists())
+
+        call_command("pair_transfers", "--chunk-size", "1", stdout=StringIO())
+        out.refresh_from_db()
+        inflow.refresh_from_db()
+        locked.refresh_from_db()
+        self.assertIsNotNone(out.transfer_group_id)
+        self.assertEqual(out.transfer_group_id, inflow.transfer_group_id)
+        self.assertEqual((out.kind, out.is_locked, out.category_id), ("transfer", True, None))
+        self.assertIsNone(locked.transfer_group_id)
+
+        stdout = StringIO()
+        call_command("pair_transfers", stdout=stdout)
+        self.assertIn("Paired 0 transfers", stdout.getvalue())
+
+    def test_rows_matched_after_the_proposal_are_skipped(self):
+        out = self._txn(self.checking, "-250.00", 3)
+        self._txn(self.card, "250.00", 4)
+        pairs = propose_transfer_pairs(load_candidates())
+        Transaction.objects.filter(pk=out.pk).update(is_bill_matched=True)
+
+        self.assertEqual(create_transfer_groups(pairs), (0, 1))
+        out.refresh_from_db()
+        self.assertEqual((out.kind, out.transfer_group_id), ("expense", None))
@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from fincore import warmup
+from fincore.templatetags.vite import load_manifest, vite_asset
+
+
+class PreloadTests(SimpleTestCase):
+    def test_preload_imports_views_and_compiles_every_template(self):
+        report = warmup.preload()
+        self.assertGreater(report["view_modules"], 5)
+        self.assertGreater(report["templates"], 20)
+        self.assertEqual(report["template_failures"], 0)
+
+    def test_manifest_is_parsed_once_until_it_changes(self):
+        with tempfile.TemporaryDirectory() as base, override_settings(BASE_DIR=Path(base)):
+            manifest = Path(base) / "static" / "app" / "manifest.json"
+            manifest.parent.mkdir(parents=True)
+            manifest.write_text(json.dumps({"src/main.js": {"file": "main-1.js"}}))
+            self.assertIs(load_manifest(), load_manifest())
+            self.assertEqual(vite_asset("src/main.js"), "/static/app/main-1.js")
+
+            manifest.write_text(json.dumps({"src/main.js": {"file": "main-2.js"}}))
+            stat = manifest.stat()
+            os.utime(manifest, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            self.assertEqual(vite_asset("src/main.js"), "/static/app/main-2.js")
+
+
+class OpenConnectionsTests(TransactionTestCase):
+    def test_every_pool_thread_gets_a_connection(self):
+        seen = set()
+        original = warmup.connect_thread
+
+        def recording(aliases):
+            original(aliases)
+            seen.add(threading.get_ident())
+
+        with ThreadPoolExecutor(max_workers=3) as pool, mock.patch.object(warmup, "connect_thread", recording):
+            self.assertEqual(warmup.open_connections(pool, threads=3), 3)
+        self.assertEqual(len(seen), 3)
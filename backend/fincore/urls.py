@@ -42,6 +42,9 @@ from .views.sales_views import (
     sales_invoice_match_apply,
     sales_invoice_payment_delete,
     sales_invoice_matches,
+    sales_invoice_auto_match,
+    sales_invoice_allocate,
+    sales_invoice_lump_sum,
 )
 from .views.bill_views import (
     bills_list,
@@ -50,6 +53,7 @@ from .views.bill_views import (
     bill_detail,
     bill_matches,
     bill_match_apply,
+    bill_match_apply_group,
     bill_payment_delete,
 )
 from .views.import_views import (
@@ -57,9 +61,21 @@ from .views.import_views import (
     import_commit,
     import_review,
     import_rollback,
+    import_bulk,
     import_delete,
     import_stage,
+    import_statement,
 )
+from .views.aging_views import (
+    aging_report,
+    aging_detail_view,
+    aging_export_xlsx,
+)
+from .views.tax_views import (
+    sales_tax_report,
+    sales_tax_export_xlsx,
+)
+from .views.metrics_views import metrics_view
 from .views.accounts_views import (
     account_list,
     account_create,
@@ -89,12 +105,21 @@ urlpatterns = [
     path("reports/balance-sheet/content/", balance_sheet_content, name="balance_sheet_content"),
     path("reports/cashflow/", cashflow_report, name="cashflow_report"),
     path("reports/cashflow/content/", cashflow_content, name="cashflow_content"),
+    path("reports/aging/", aging_report, name="aging_report"),
+    path("reports/aging/export.xlsx", aging_export_xlsx, name="aging_export_xlsx"),
+    path("reports/aging/<str:kind>/<int:counterparty_id>/", aging_detail_view, name="aging_detail"),
+    path("reports/sales-tax/", sales_tax_report, name="sales_tax_report"),
+    path("reports/sales-tax/export.xlsx", sales_tax_export_xlsx, name="sales_tax_export_xlsx"),
+    path("metrics", metrics_view, name="metrics"),
     path("sales/transactions/", sales_transactions_list, name="sales_transactions_list"),
     path("sales/transactions/new/", sales_invoice_create, name="sales_invoice_create"),
     path("sales/transactions/<int:invoice_id>/edit/", sales_invoice_edit, name="sales_invoice_edit"),
     path("sales/transactions/<int:invoice_id>/", sales_invoice_detail, name="sales_invoice_detail"),
     path("sales/transactions/matches/", sales_invoice_matches, name="sales_invoice_matches"),
     path("sales/transactions/match/", sales_invoice_match_apply, name="sales_invoice_match_apply"),
+    path("sales/transactions/auto-match/", sales_invoice_auto_match, name="sales_invoice_auto_match"),
+    path("sales/transactions/allocate/", sales_invoice_allocate, name="sales_invoice_allocate"),
+    path("sales/transactions/lump-sum/", sales_invoice_lump_sum, name="sales_invoice_lump_sum"),
     path("sales/transactions/payment/<int:payment_id>/delete/", sales_invoice_payment_delete, name="sales_invoice_payment_delete"),
     path("bills/", bills_list, name="bills_list"),
     path("bills/new/", bill_create, name="bill_create"),
@@ -102,6 +127,7 @@ urlpatterns = [
     path("bills/<int:bill_id>/", bill_detail, name="bill_detail"),
     path("bills/matches/", bill_matches, name="bill_matches"),
     path("bills/match/", bill_match_apply, name="bill_match_apply"),
+    path("bills/match/group/", bill_match_apply_group, name="bill_match_apply_group"),
     path("bills/payment/<int:payment_id>/delete/", bill_payment_delete, name="bill_payment_delete"),
     path("categories/", category_list, name="category_list"),
     path("categories/table/", category_table, name="category_table"),
@@ -116,6 +142,8 @@ urlpatterns = [
     path("vendors/update/", vendor_update, name="vendor_update"),
     path("vendors/<int:pk>/delete/", vendor_delete, name="vendor_delete"),
     path("imports/stage/", import_stage, name="import_stage"),
+    path("imports/bulk/", import_bulk, name="import_bulk"),
+    path("imports/statement/", import_statement, name="import_statement"),
     path("accounts/<int:account_id>/imports/", account_imports, name="account_imports"),
     path("imports/<int:batch_id>/review/", import_review, name="import_review"),
     path("imports/<int:batch_id>/commit/", import_commit, name="import_commit"),
@@ -0,0 +1,87 @@
+from datetime import date
+
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.utils.dateparse import parse_date
+
+from fincore.db.reports import report_view
+from fincore.models import Vendor
+from fincore.services.aging import BUCKETS, SPECS, aging_detail, aging_summary
+from .transaction_views import _build_simple_xlsx
+
+
+def _aging_filters(request):
+    kind = (request.GET.get("kind") or "receivables").strip()
+    if kind not in SPECS:
+        kind = "receivables"
+    as_of_raw = (request.GET.get("as_of") or "").strip()
+    as_of = (parse_date(as_of_raw) if as_of_raw else None) or date.today()
+    return kind, as_of
+
+
+@report_view
+def aging_report(request):
+    kind, as_of = _aging_filters(request)
+    rows, totals = aging_summary(kind, as_of)
+    return render(
+        request,
+        "fincore/reports/aging.html",
+        {
+            "kind": kind,
+            "label": SPECS[kind].label,
+            "as_of": as_of,
+            "buckets": BUCKETS,
+            "rows": [{**row, "cells": [(key, row[key]) for key, _ in BUCKETS]} for row in rows],
+            "totals": totals,
+            "total_cells": [totals[key] for key, _ in BUCKETS],
+            "query_string": request.GET.urlencode(),
+        },
+    )
+
+
+@report_view
+def aging_detail_view(request, kind, counterparty_id):
+    if kind not in SPECS:
+        raise Http404("Unknown aging report.")
+    _, as_of = _aging_filters(request)
+    bucket = (request.GET.get("bucket") or "").strip()
+    if bucket not in dict(BUCKETS):
+        bucket = ""
+    counterparty = get_object_or_404(Vendor, pk=counterparty_id)
+    documents = aging_detail(kind, counterparty_id, as_of, bucket=bucket or None)
+    return render(
+        request,
+        "fincore/reports/aging_detail.html",
+        {
+            "kind": kind,
+            "label": SPECS[kind].label,
+            "as_of": as_of,
+            "bucket": bucket,
+            "bucket_label": dict(BUCKETS).get(bucket, ""),
+            "buckets": BUCKETS,
+            "counterparty": counterparty,
+            "documents": documents,
+            "balance_total": sum(document.balance for document in documents),
+        },
+    )
+
+
+@report_view
+def aging_export_xlsx(request):
+    kind, as_of = _aging_filters(request)
+    rows, totals = aging_summary(kind, as_of)
+    sheet = [
+        [f"{SPECS[kind].label} as of {as_of:%Y-%m-%d}"],
+        ["Name", "Documents"] + [label for _, label in BUCKETS] + ["Total"],
+    ]
+    for row in rows:
+        sheet.append([row["name"], row["count"]] + [float(row[key]) for key, _ in BUCKETS] + [float(row["total"])])
+    sheet.append(["Total", totals["count"]] + [float(totals[key]) for key, _ in BUCKETS] + [float(totals["total"])])
+
+    content = _build_simple_xlsx(sheet, sheet_name=f"{SPECS[kind].label} Aging")
+    response = HttpResponse(
+        content,
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{kind}-aging-{as_of:%Y-%m-%d}.xlsx"'
+    return response
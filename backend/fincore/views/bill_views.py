@@ -1,24 +1,28 @@
 from datetime import timedelta
 from decimal import Decimal, InvalidOperation
-from random import choices
-from string import ascii_uppercase, digits
 
 from django.db import transaction as db_transaction
-from django.http import HttpResponseBadRequest
+from django.db.models import Sum
+from django.http import Http404, HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, redirect, render
-from django.utils.timezone import now
 from django.utils.dateparse import parse_date
 
 from django.core.paginator import Paginator
 
-from fincore.models import Account, Bill, BillItem, BillPayment, Category, Transaction, Vendor
+from fincore.db.writes import write_transaction
+from fincore.models import Account, Bill, BillItem, BillPayment, Category, DocumentSequence, Transaction, Vendor
+from fincore.services.bill_matching import (
+    OPEN_STATUSES,
+    available_amount,
+    outgoing_with_available,
+    split_payment_suggestions,
+)
+from fincore.services.line_items import MAX_LINE_ITEMS, parse_item_id, sync_line_items
 from fincore.views.utils import selectable_accounts
 from .transaction_views import REPORT_RANGE_OPTIONS, _resolve_report_range
 
 
-def _generate_bill_number():
-    suffix = "".join(choices(ascii_uppercase + digits, k=6))
-    return f"BILL{now().strftime('%Y%m%d')}-{suffix}"
+BILL_ITEM_FIELDS = ["category_id", "description", "amount", "total"]
 
 
 def bills_list(request):
@@ -138,7 +142,7 @@ def bill_create(request):
             item_count = int(item_count_raw)
         except (TypeError, ValueError):
             item_count = 1
-        item_count = max(1, min(item_count, 50))
+        item_count = max(1, min(item_count, MAX_LINE_ITEMS))
         item_rows = [
             {"category_id": "", "description": "", "amount": "", "total": ""}
             for _ in range(item_count)
@@ -191,11 +195,8 @@ def bill_create(request):
             vendor = get_object_or_404(Vendor, pk=int(vendor_id), kind="payee")
             account = get_object_or_404(Account, pk=int(account_id))
             with db_transaction.atomic():
-                bill_number = _generate_bill_number()
-                while Bill.objects.filter(number=bill_number).exists():
-                    bill_number = _generate_bill_number()
                 bill = Bill.objects.create(
-                    number=bill_number,
+                    number=DocumentSequence.allocate("bill")[0],
                     vendor=vendor,
                     account=account,
                     date=bill_date,
@@ -204,14 +205,7 @@ def bill_create(request):
                     notes=notes,
                     status="draft",
                 )
-                for item in items:
-                    BillItem.objects.create(
-                        bill=bill,
-                        category_id=item["category_id"],
-                        description=item["description"],
-                        amount=item["amount"],
-                        total=item["total"],
-                    )
+                BillItem.objects.bulk_create(BillItem(bill=bill, **item) for item in items)
             return redirect("fincore:bills_list")
 
     return render(
@@ -240,14 +234,16 @@ def bill_edit(request, bill_id):
     category_ids = {str(cat.id) for cat in categories}
     errors = []
 
+    existing_items = list(bill.items.all())
     item_rows = [
         {
+            "id": item.id,
             "category_id": str(item.category_id),
             "description": item.description,
             "amount": str(item.amount),
             "total": str(item.total),
         }
-        for item in bill.items.all()
+        for item in existing_items
     ]
     if not item_rows:
         item_rows = [
@@ -274,7 +270,7 @@ def bill_edit(request, bill_id):
             item_count = int(item_count_raw)
         except (TypeError, ValueError):
             item_count = 1
-        item_count = max(1, min(item_count, 50))
+        item_count = max(1, min(item_count, MAX_LINE_ITEMS))
         item_rows = [
             {"category_id": "", "description": "", "amount": "", "total": ""}
             for _ in range(item_count)
@@ -286,7 +282,9 @@ def bill_edit(request, bill_id):
             category_field = (request.POST.get(f"item_category_{idx}") or "").strip()
             description = (request.POST.get(f"item_description_{idx}") or "").strip()
             amount_raw = (request.POST.get(f"item_amount_{idx}") or "").strip()
+            item_id = parse_item_id(request.POST.get(f"item_id_{idx}"))
             item_rows[idx - 1] = {
+                "id": item_id,
                 "category_id": category_field,
                 "description": description,
                 "amount": amount_raw,
@@ -313,6 +311,7 @@ def bill_edit(request, bill_id):
             subtotal += amount
             items.append(
                 {
+                    "id": item_id,
                     "category_id": int(category_field),
                     "description": description,
                     "amount": amount,
@@ -334,15 +333,7 @@ def bill_edit(request, bill_id):
                 bill.total = subtotal
                 bill.notes = notes
                 bill.save()
-                bill.items.all().delete()
-                for item in items:
-                    BillItem.objects.create(
-                        bill=bill,
-                        category_id=item["category_id"],
-                        description=item["description"],
-                        amount=item["amount"],
-                        total=item["total"],
-                    )
+                sync_line_items(BillItem, "bill", bill, items, BILL_ITEM_FIELDS, existing=existing_items)
             return redirect("fincore:bills_list")
 
     return render(
@@ -365,35 +356,25 @@ def _build_bill_match_context(bill):
     match_end = bill.date + timedelta(days=30)
     remaining = bill.remaining_balance
 
-    base_qs = (
-        Transaction.objects.select_related("account", "vendor")
-        .filter(date__gte=match_start, date__lte=match_end)
-        .filter(account=bill.account)
-        .filter(amount__lt=0)
-        .exclude(bill_payments__isnull=False)
-    )
+    # Outgoing transactions in the same account with cash not yet allocated to bills
+    candidates = outgoing_with_available(bill.account_id, match_start, match_end)
+    for txn in candidates:
+        txn.abs_amount = abs(txn.amount)
+        txn.available = available_amount(txn)
 
     best_matches = []
     if remaining > 0:
-        best_matches = list(
-            base_qs.filter(amount__lte=-remaining).order_by("-date", "-id")[:10]
-        )
+        best_matches = [txn for txn in candidates if txn.available >= remaining][:10]
 
     best_match_ids = {txn.id for txn in best_matches}
-    other_transactions = list(
-        base_qs.exclude(id__in=best_match_ids).order_by("-date", "-id")[:50]
-    )
-
-    for txn in best_matches:
-        txn.abs_amount = abs(txn.amount)
-    for txn in other_transactions:
-        txn.abs_amount = abs(txn.amount)
+    other_transactions = [txn for txn in candidates if txn.id not in best_match_ids][:50]
 
     return {
         "bill": bill,
         "remaining_balance": remaining,
         "best_matches": best_matches,
         "other_transactions": other_transactions,
+        "split_suggestions": split_payment_suggestions(bill, candidates),
     }
 
 
@@ -446,12 +427,6 @@ def bill_match_apply(request):
         matches.append((txn_id, amount))
         total_matched += amount
 
-    remaining = bill.remaining_balance
-    if total_matched > remaining:
-        errors.append(
-            f"Total matched {total_matched} exceeds bill remaining {remaining}."
-        )
-
     if errors:
         return render(
             request,
@@ -459,46 +434,128 @@ def bill_match_apply(request):
             {**_build_bill_match_context(bill), "form_errors": errors},
         )
 
-    first_item = bill.items.select_related("category").first()
-    bill_category = first_item.category if first_item else None
+    # Lock the bill and the debits before re-reading balances, so concurrent
+    # requests cannot allocate more than a bill or a debit holds.
+    with write_transaction():
+        bill = get_object_or_404(Bill.objects.select_for_update(), pk=bill.pk)
+        transactions = Transaction.objects.select_for_update().in_bulk([txn_id for txn_id, _ in matches])
+        remaining = bill.remaining_balance
+        if total_matched > remaining:
+            errors.append(
+                f"Total matched {total_matched} exceeds bill remaining {remaining}."
+            )
+        else:
+            allocated = dict(
+                BillPayment.objects.filter(transaction_id__in=transactions)
+                .values("transaction_id")
+                .annotate(total=Sum("amount"))
+                .values_list("transaction_id", "total")
+            )
+            paired = set(
+                BillPayment.objects.filter(bill=bill, transaction_id__in=transactions).values_list(
+                    "transaction_id", flat=True
+                )
+            )
+            for txn_id, amount in matches:
+                txn = transactions.get(txn_id)
+                if txn is None:
+                    raise Http404("Transaction not found")
+                if txn.account_id != bill.account_id:
+                    return HttpResponseBadRequest("Account mismatch")
+                if txn.amount >= 0:
+                    return HttpResponseBadRequest("Transaction must be an expense.")
+                if txn_id in paired:
+                    return HttpResponseBadRequest("Transaction already matched to this bill.")
+                if amount + allocated.get(txn_id, Decimal("0.00")) > abs(txn.amount):
+                    return HttpResponseBadRequest("Matched amount exceeds transaction.")
+
+            first_item = bill.items.select_related("category").first()
+            bill_category = first_item.category if first_item else None
+            for txn_id, amount in matches:
+                txn = transactions[txn_id]
+                BillPayment.objects.create(bill=bill, transaction=txn, amount=amount)
+
+                if bill_category and txn.category_id != bill_category.id:
+                    txn.category = bill_category
+                    txn.kind = bill_category.kind
+                if bill.vendor_id and txn.vendor_id != bill.vendor_id:
+                    txn.vendor = bill.vendor
+                txn.is_bill_matched = True
+                txn.save()
+
+            bill.update_status_from_payments()
+            bill.save()
+
+    context = _build_bill_match_context(bill)
+    if errors:
+        context["form_errors"] = errors
+    return render(request, "fincore/bills/transactions/match_list.html", context)
 
-    with db_transaction.atomic():
-        for txn_id, amount in matches:
-            txn = get_object_or_404(Transaction, pk=txn_id)
-            if txn.account_id != bill.account_id:
-                return HttpResponseBadRequest("Account mismatch")
-            if txn.amount >= 0:
-                return HttpResponseBadRequest("Transaction must be an expense.")
-            if BillPayment.objects.filter(transaction=txn).exists():
-                return HttpResponseBadRequest("Transaction already matched.")
-            if amount > abs(txn.amount):
-                return HttpResponseBadRequest("Matched amount exceeds transaction.")
 
-            BillPayment.objects.create(bill=bill, transaction=txn, amount=amount)
+def bill_match_apply_group(request):
+    """Settle several bills from one outgoing transaction, each for its full remaining balance."""
+    if request.method != "POST":
+        return HttpResponseBadRequest("Invalid method")
 
-            if bill_category and txn.category_id != bill_category.id:
-                txn.category = bill_category
-                txn.kind = bill_category.kind
-            if bill.vendor_id and txn.vendor_id != bill.vendor_id:
-                txn.vendor = bill.vendor
-            txn.save()
+    txn_id = (request.POST.get("transaction_id") or "").strip()
+    bill_ids = [value for value in request.POST.getlist("bill_ids") if value.isdigit()]
+    if not txn_id.isdigit() or not bill_ids:
+        return HttpResponseBadRequest("Invalid selection")
+
+    with write_transaction():
+        txn = get_object_or_404(Transaction.objects.select_for_update(), pk=int(txn_id))
+        bills = list(
+            Bill.objects.select_for_update()
+            .filter(pk__in=bill_ids, status__in=OPEN_STATUSES)
+            .order_by("date", "id")
+        )
+        if len(bills) != len(set(bill_ids)):
+            return HttpResponseBadRequest("Only open bills can be matched.")
+        if txn.amount >= 0:
+            return HttpResponseBadRequest("Transaction must be an expense.")
+        if any(bill.account_id != txn.account_id for bill in bills):
+            return HttpResponseBadRequest("Account mismatch")
+        if BillPayment.objects.filter(transaction=txn, bill__in=bills).exists():
+            return HttpResponseBadRequest("Transaction already matched to one of these bills.")
+
+        amounts = [bill.remaining_balance for bill in bills]
+        already_matched = (
+            BillPayment.objects.filter(transaction=txn).aggregate(total=Sum("amount"))["total"]
+            or Decimal("0.00")
+        )
+        if any(amount <= 0 for amount in amounts) or sum(amounts) + already_matched > abs(txn.amount):
+            return HttpResponseBadRequest("Matched amount exceeds transaction.")
 
-        bill.update_status_from_payments()
-        bill.save()
+        for bill, amount in zip(bills, amounts):
+            BillPayment.objects.create(bill=bill, transaction=txn, amount=amount)
+            bill.update_status_from_payments()
+            bill.save()
+
+        primary = next((bill for bill in bills if str(bill.id) == bill_ids[0]), bills[0])
+        first_item = primary.items.select_related("category").first()
+        if first_item and txn.category_id != first_item.category_id:
+            txn.category = first_item.category
+            txn.kind = first_item.category.kind
+        if primary.vendor_id and txn.vendor_id != primary.vendor_id:
+            txn.vendor = primary.vendor
+        txn.is_bill_matched = True
+        txn.save()
 
     return render(
         request,
         "fincore/bills/transactions/match_list.html",
-        _build_bill_match_context(bill),
+        _build_bill_match_context(primary),
     )
 
 
 def bill_payment_delete(request, payment_id):
     payment = get_object_or_404(BillPayment.objects.select_related("bill"), pk=payment_id)
     bill = payment.bill
-    payment.delete()
-    bill.update_status_from_payments()
-    bill.save()
+    with db_transaction.atomic():
+        payment.delete()
+        Transaction.objects.filter(pk=payment.transaction_id).refresh_match_flags()
+        bill.update_status_from_payments()
+        bill.save()
     return redirect("fincore:bill_detail", bill_id=bill.id)
 
 
@@ -107,12 +107,12 @@ def category_table(request):
         bill_item_count=Count("bill_items", distinct=True),
         transaction_unmatched_count=Count(
             "transactions",
-            filter=Q(transactions__invoice_payments__isnull=True),
+            filter=Q(transactions__is_invoice_matched=False),
             distinct=True,
         ),
         transaction_unmatched_bill_count=Count(
             "transactions",
-            filter=Q(transactions__bill_payments__isnull=True),
+            filter=Q(transactions__is_bill_matched=False),
             distinct=True,
         ),
     ).annotate(
@@ -122,7 +122,7 @@ def category_table(request):
                 then=Count("invoice_items", distinct=True)
                 + Count(
                     "transactions",
-                    filter=Q(transactions__invoice_payments__isnull=True),
+                    filter=Q(transactions__is_invoice_matched=False),
                     distinct=True,
                 ),
             ),
@@ -131,7 +131,7 @@ def category_table(request):
                 then=Count("bill_items", distinct=True)
                 + Count(
                     "transactions",
-                    filter=Q(transactions__bill_payments__isnull=True),
+                    filter=Q(transactions__is_bill_matched=False),
                     distinct=True,
                 ),
             ),
@@ -1,21 +1,43 @@
 import calendar
-import csv
-import io
 import json
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
 
+from django.conf import settings
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db import transaction as db_transaction
+from django.db.models import F, Q
 from django.http import HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from fincore.models import Account, Category, ImportBatch, ImportRow, Transaction
+from fincore.db.postgres import bulk_insert
+from fincore.db.writes import write_transaction
+from fincore.models import Account, Category, ImportBatch, ImportProfile, ImportRow, Transaction
+from fincore.services.categorization import load_rule_matcher
+from fincore.services.csv_staging import (
+    CSVParseError,
+    decode_csv,
+    header_fingerprint,
+    parse_csv,
+    parse_csv_job,
+    read_headers,
+)
+from fincore.services.normalization import cents_to_decimal, parse_date_any
+from fincore.services.statement_parsers import StatementParseError, iter_statement_rows
+from fincore.views.utils import selectable_accounts
 
 
 ALLOWED_MAP_VALUES = {"ignore", "date", "description", "amount", "indicator", "debit", "credit"}
 VALID_STRATEGIES = {"signed", "indicator", "split_columns"}
+COMMIT_CHUNK_SIZE = 2000
+STAGE_CHUNK_SIZE = 500
+MAX_BULK_FILES = 50
+MAX_BULK_FILE_BYTES = 20 * 1024 * 1024
 
 
 def _parse_numeric(raw):
@@ -64,59 +86,98 @@ def _validate_mapping(mapping, amount_strategy):
     return errors
 
 
-def _normalize_row_amount(mapped, amount_strategy, indicator_credit, indicator_debit):
-    """Normalize amount to signed Decimal. Returns (value_or_none, error_list)."""
-    if amount_strategy == "signed":
-        raw = str(mapped.get("amount", "") or "").strip()
-        if not raw:
-            return None, ["Missing amount value."]
-        try:
-            return _parse_numeric(raw), []
-        except (InvalidOperation, ValueError):
-            return None, ["Invalid amount value."]
-
-    elif amount_strategy == "indicator":
-        raw_amount = str(mapped.get("amount", "") or "").strip()
-        raw_indicator = str(mapped.get("indicator", "") or "").strip()
-        errs = []
-        if not raw_amount:
-            errs.append("Missing amount value.")
-        if not raw_indicator:
-            errs.append("Missing indicator value.")
-        if errs:
-            return None, errs
-        try:
-            unsigned = _parse_numeric(raw_amount)
-        except (InvalidOperation, ValueError):
-            return None, ["Invalid amount value."]
-        ind_lower = raw_indicator.lower()
-        credit_lower = (indicator_credit or "").strip().lower()
-        debit_lower = (indicator_debit or "").strip().lower()
-        if credit_lower and ind_lower == credit_lower:
-            return abs(unsigned), []
-        elif debit_lower and ind_lower == debit_lower:
-            return -abs(unsigned), []
+def _flag_duplicates(account, chunk, seen):
+    """
+    Mark rows whose bank ``external_id`` already exists on the account, or
+    appeared earlier in the same file. Returns the number flagged.
+    """
+    external_ids = {mapped["external_id"] for _, mapped, _ in chunk if mapped.get("external_id")}
+    if not external_ids:
+        return 0
+    existing = set(
+        Transaction.objects.filter(account=account, external_id__in=external_ids).values_list(
+            "external_id", flat=True
+        )
+    )
+    flagged = 0
+    for _, mapped, _ in chunk:
+        external_id = mapped.get("external_id")
+        if not external_id:
+            continue
+        if external_id in existing or external_id in seen:
+            mapped["duplicate"] = True
+            flagged += 1
         else:
-            return None, [f"Unknown indicator '{raw_indicator}'."]
+            seen.add(external_id)
+    return flagged
 
-    elif amount_strategy == "split_columns":
-        raw_debit = str(mapped.get("debit", "") or "").strip()
-        raw_credit = str(mapped.get("credit", "") or "").strip()
-        has_debit = bool(raw_debit)
-        has_credit = bool(raw_credit)
-        if has_debit and has_credit:
-            return None, ["Both debit and credit populated."]
-        if not has_debit and not has_credit:
-            return None, ["Both debit and credit empty."]
-        try:
-            if has_debit:
-                return -abs(_parse_numeric(raw_debit)), []
-            else:
-                return abs(_parse_numeric(raw_credit)), []
-        except (InvalidOperation, ValueError):
-            return None, ["Invalid amount value."]
 
-    return None, ["Unknown amount strategy."]
+def _write_staged_batch(account, filename, rows, options, date_format="", source="csv"):
+    """
+    Create the ImportBatch and stream its staged rows in chunks. The batch
+    stays "pending" until every row is written, so a file that fails halfway
+    can never be committed. Returns ``(batch, duplicate_count)``.
+    """
+    batch = ImportBatch.objects.create(
+        filename=filename,
+        account=account,
+        status="pending",
+        amount_strategy=options["amount_strategy"],
+        indicator_credit_value=options["indicator_credit"],
+        indicator_debit_value=options["indicator_debit"],
+        date_format=date_format,
+        source=source,
+    )
+    row_errors = 0
+    duplicates = 0
+    seen = set()
+    chunk = []
+
+    def flush():
+        nonlocal duplicates
+        duplicates += _flag_duplicates(account, chunk, seen)
+        bulk_insert(
+            ImportRow,
+            [ImportRow(batch=batch, raw_row=raw_row, mapped=mapped, errors=errors) for raw_row, mapped, errors in chunk],
+        )
+        chunk.clear()
+
+    try:
+        for row in rows:
+            if row[2]:
+                row_errors += 1
+            chunk.append(row)
+            if len(chunk) >= STAGE_CHUNK_SIZE:
+                flush()
+        if chunk:
+            flush()
+    except Exception as exc:
+        batch.status = "failed"
+        batch.error_message = f"Staging stopped: {exc}"
+        batch.save(update_fields=["status", "error_message"])
+        raise
+
+    batch.status = "failed" if row_errors else "validated"
+    batch.error_message = f"{row_errors} row(s) have validation errors." if row_errors else ""
+    batch.save(update_fields=["status", "error_message"])
+    return batch, duplicates
+
+
+def _remember_profile(account, filename, parsed, options):
+    """Save the mapping used for this header layout so bulk uploads can reuse it."""
+    ImportProfile.objects.update_or_create(
+        account=account,
+        header_fingerprint=parsed["fingerprint"],
+        defaults={
+            "headers": parsed["headers"],
+            "mapping": options["mapping"],
+            "amount_strategy": options["amount_strategy"],
+            "indicator_credit_value": options["indicator_credit"],
+            "indicator_debit_value": options["indicator_debit"],
+            "date_format": parsed["date_format"],
+            "last_filename": filename,
+        },
+    )
 
 
 def import_stage(request):
@@ -182,67 +243,31 @@ def import_stage(request):
             status=200,
         )
 
-    batch = ImportBatch.objects.create(
-        filename=upload.name,
-        account=account,
-        status="pending",
-        amount_strategy=amount_strategy,
-        indicator_credit_value=indicator_credit,
-        indicator_debit_value=indicator_debit,
-    )
-
-    file_text = upload.read().decode("utf-8-sig")
-    reader = csv.DictReader(io.StringIO(file_text))
-    row_errors = 0
-    total_rows = 0
-
-    for row in reader:
-        total_rows += 1
-        normalized_row = {}
-        for key, value in row.items():
-            if key is None:
-                continue
-            key_clean = str(key).strip().lower()
-            if isinstance(value, list):
-                value_clean = " ".join(str(item).strip() for item in value if item is not None)
-            else:
-                value_clean = (value or "").strip()
-            normalized_row[key_clean] = value_clean
-        mapped = {}
-        row_error_list = []
-        for column, target in mapping.items():
-            if target == "ignore":
-                continue
-            normalized_column = str(column).strip().lower()
-            mapped[target] = normalized_row.get(normalized_column, "")
-
-        # Date is always required
-        if not mapped.get("date"):
-            row_error_list.append("Missing date value.")
-
-        # Normalize amount to signed_amount
-        signed_amount, amount_errors = _normalize_row_amount(
-            mapped, amount_strategy, indicator_credit, indicator_debit
+    try:
+        parsed = parse_csv(
+            decode_csv(upload.read()),
+            mapping,
+            amount_strategy,
+            indicator_credit,
+            indicator_debit,
         )
-        row_error_list.extend(amount_errors)
-
-        if signed_amount is not None:
-            mapped["signed_amount"] = str(signed_amount)
-
-        if row_error_list:
-            row_errors += 1
-
-        ImportRow.objects.create(
-            batch=batch,
-            raw_row=row,
-            mapped=mapped,
-            errors=row_error_list,
+    except CSVParseError as exc:
+        return render(
+            request,
+            "fincore/transactions/import_errors.html",
+            {"form_errors": [str(exc)]},
+            status=200,
         )
-
-    if row_errors:
-        batch.status = "failed"
-        batch.error_message = f"{row_errors} row(s) have validation errors."
-        batch.save(update_fields=["status", "error_message"])
+    total_rows = parsed["total_rows"]
+    options = {
+        "mapping": mapping,
+        "amount_strategy": amount_strategy,
+        "indicator_credit": indicator_credit,
+        "indicator_debit": indicator_debit,
+    }
+    batch, _duplicates = _write_staged_batch(account, upload.name, parsed["rows"], options, parsed["date_format"])
+
+    if batch.status == "failed":
         return render(
             request,
             "fincore/transactions/import_errors.html",
@@ -250,8 +275,7 @@ def import_stage(request):
             status=200,
         )
 
-    batch.status = "validated"
-    batch.save(update_fields=["status"])
+    _remember_profile(account, upload.name, parsed, options)
 
     response = render(
         request,
@@ -266,6 +290,216 @@ def import_stage(request):
     return response
 
 
+def _collect_bulk_files(uploads):
+    """
+    Expand the uploaded files (plain CSVs or zips of CSVs) into
+    ``(name, content, error)`` entries, in upload order.
+    """
+    entries = []
+
+    def add(name, content=None, error=""):
+        if len(entries) >= MAX_BULK_FILES:
+            error = f"Skipped: at most {MAX_BULK_FILES} files per upload."
+            content = None
+        entries.append((name, content, error))
+
+    for upload in uploads:
+        name = os.path.basename(upload.name or "")
+        lower = name.lower()
+        if lower.endswith(".zip"):
+            try:
+                archive = zipfile.ZipFile(upload)
+            except zipfile.BadZipFile:
+                add(name, error="File is not a valid zip archive.")
+                continue
+            with archive:
+                for info in archive.infolist():
+                    member = os.path.basename(info.filename)
+                    if (
+                        info.is_dir()
+                        or info.filename.startswith("__MACOSX/")
+                        or member.startswith(".")
+                        or not member.lower().endswith(".csv")
+                    ):
+                        continue
+                    if info.file_size > MAX_BULK_FILE_BYTES:
+                        add(member, error="File is too large.")
+                        continue
+                    add(member, archive.read(info))
+        elif lower.endswith(".csv"):
+            if upload.size > MAX_BULK_FILE_BYTES:
+                add(name, error="File is too large.")
+                continue
+            add(name, upload.read())
+        else:
+            add(name, error="Only .csv or .zip files are supported.")
+    return entries
+
+
+def _match_profile(candidates, filename):
+    """
+    Pick the saved profile for a file. When the same layout is saved for more
+    than one account, prefer the profile whose last filename shares the longest
+    prefix with this one; a tie is reported rather than guessed.
+    """
+    if not candidates:
+        return None, (
+            "No saved import profile matches these headers. "
+            "Import one file with this layout through the CSV wizard first."
+        )
+    if len(candidates) == 1:
+        return candidates[0], ""
+    lower = filename.lower()
+    scored = sorted(
+        ((len(os.path.commonprefix([lower, profile.last_filename.lower()])), profile) for profile in candidates),
+        key=lambda item: item[0],
+        reverse=True,
+    )
+    if scored[0][0] > scored[1][0]:
+        return scored[0][1], ""
+    names = ", ".join(sorted(profile.account.name for profile in candidates))
+    return None, f"Headers match profiles for several accounts ({names}). Upload this file through the CSV wizard."
+
+
+def _import_workers(job_count):
+    configured = getattr(settings, "FINCORE_IMPORT_WORKERS", 0) or os.cpu_count() or 1
+    return max(1, min(configured, job_count))
+
+
+def _run_parse_jobs(jobs):
+    """
+    Parse files across a process pool and yield ``(entry, parsed)`` as each
+    finishes. Workers never touch the database; the caller writes every batch
+    from this thread so SQLite keeps a single writer.
+    """
+    workers = _import_workers(len(jobs))
+    if workers <= 1:
+        for entry, job in jobs:
+            yield entry, parse_csv_job(job)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {pool.submit(parse_csv_job, job): (entry, job) for entry, job in jobs}
+        for future in as_completed(futures):
+            entry, job = futures[future]
+            try:
+                parsed = future.result()
+            except BrokenProcessPool:
+                parsed = {"name": job["name"], "error": "Parser process failed."}
+            yield entry, parsed
+
+
+def import_bulk(request):
+    if request.method != "POST":
+        return render(request, "fincore/imports/bulk_upload.html", {"max_files": MAX_BULK_FILES})
+
+    uploads = request.FILES.getlist("csv_files")
+    if not uploads:
+        return render(
+            request,
+            "fincore/imports/bulk_upload.html",
+            {"max_files": MAX_BULK_FILES, "form_errors": ["Select at least one .csv or .zip file."]},
+        )
+
+    profiles_by_fingerprint = {}
+    for profile in ImportProfile.objects.filter(account__is_active=True).select_related("account"):
+        profiles_by_fingerprint.setdefault(profile.header_fingerprint, []).append(profile)
+
+    results = []
+    jobs = []
+    for name, content, error in _collect_bulk_files(uploads):
+        result = {"filename": name, "status": "failed", "message": error, "account": None, "batch": None, "total_rows": 0}
+        results.append(result)
+        if error:
+            continue
+        try:
+            text = decode_csv(content)
+            headers = read_headers(text)
+        except CSVParseError as exc:
+            result["message"] = str(exc)
+            continue
+        profile, message = _match_profile(profiles_by_fingerprint.get(header_fingerprint(headers), []), name)
+        if profile is None:
+            result["message"] = message
+            continue
+        result["account"] = profile.account
+        options = {
+            "mapping": profile.mapping,
+            "amount_strategy": profile.amount_strategy,
+            "indicator_credit": profile.indicator_credit_value,
+            "indicator_debit": profile.indicator_debit_value,
+        }
+        jobs.append(((result, profile, options), {"name": name, "text": text, **options}))
+
+    for (result, profile, options), parsed in _run_parse_jobs(jobs):
+        if "error" in parsed:
+            result["message"] = parsed["error"]
+            continue
+        batch, _duplicates = _write_staged_batch(
+            profile.account, result["filename"], parsed["rows"], options, parsed["date_format"]
+        )
+        result["batch"] = batch
+        result["total_rows"] = parsed["total_rows"]
+        if batch.status == "failed":
+            result["message"] = batch.error_message
+            continue
+        result["status"] = "staged"
+        _remember_profile(profile.account, result["filename"], parsed, options)
+
+    staged = sum(1 for result in results if result["status"] == "staged")
+    return render(
+        request,
+        "fincore/imports/bulk_upload.html",
+        {
+            "max_files": MAX_BULK_FILES,
+            "results": results,
+            "staged_count": staged,
+            "failed_count": len(results) - staged,
+        },
+    )
+
+
+def import_statement(request):
+    context = {"accounts": selectable_accounts()}
+    if request.method != "POST":
+        return render(request, "fincore/imports/statement_upload.html", context)
+
+    upload = request.FILES.get("statement_file")
+    errors = []
+    if not upload:
+        errors.append("Statement file is required.")
+    account = None
+    try:
+        account_id = int(request.POST.get("account_id") or 0)
+    except (TypeError, ValueError):
+        account_id = 0
+    if not account_id:
+        errors.append("Account selection is required.")
+    else:
+        account = Account.objects.filter(pk=account_id, is_active=True).first()
+        if account is None:
+            errors.append("Selected account is not available.")
+    if errors:
+        return render(request, "fincore/imports/statement_upload.html", {**context, "form_errors": errors})
+
+    options = {"amount_strategy": "signed", "indicator_credit": "", "indicator_debit": ""}
+    try:
+        statement_format, rows = iter_statement_rows(upload, upload.name)
+        source = "ofx" if statement_format == "ofx" else "camt"
+        batch, duplicates = _write_staged_batch(account, upload.name, rows, options, source=source)
+    except StatementParseError as exc:
+        return render(request, "fincore/imports/statement_upload.html", {**context, "form_errors": [str(exc)]})
+
+    if batch.status == "failed":
+        messages.error(request, batch.error_message)
+    else:
+        label = "OFX" if statement_format == "ofx" else "CAMT.053"
+        note = f" {duplicates} already imported and will be skipped." if duplicates else ""
+        messages.success(request, f"{label} statement staged.{note}")
+    return redirect(reverse("fincore:import_review", args=[batch.id]))
+
+
 def import_review(request, batch_id):
     batch = get_object_or_404(ImportBatch, pk=batch_id)
     rows = list(batch.rows.all())
@@ -405,6 +639,54 @@ def account_imports(request, account_id):
     )
 
 
+def _commit_item(mapped):
+    """Build the transaction values for one staged row. Returns ``(item, errors)``."""
+    errors = []
+
+    # Batches staged by the columnar engine carry ordinals and cents;
+    # older batches are re-parsed from their raw strings.
+    date_ordinal = mapped.get("date_ordinal")
+    if date_ordinal:
+        parsed_date = date.fromordinal(date_ordinal)
+    else:
+        parsed_date = parse_date_any(str(mapped.get("date", "") or "").strip())
+    if not parsed_date:
+        errors.append("Invalid date value.")
+
+    amount_cents = mapped.get("amount_cents")
+    raw_signed = str(mapped.get("signed_amount", "") or "").strip()
+    if amount_cents is not None:
+        parsed_amount = cents_to_decimal(amount_cents)
+    elif raw_signed:
+        try:
+            parsed_amount = Decimal(raw_signed)
+        except (InvalidOperation, ValueError):
+            errors.append("Invalid signed amount value.")
+            parsed_amount = None
+    else:
+        raw_amount = str(mapped.get("amount", "") or "").strip()
+        try:
+            parsed_amount = _parse_numeric(raw_amount)
+        except (InvalidOperation, ValueError):
+            errors.append("Invalid amount value.")
+            parsed_amount = None
+
+    if errors:
+        return None, errors
+    return {
+        "date": parsed_date,
+        "amount": parsed_amount,
+        "description": str(mapped.get("description", "")).strip(),
+        "payee": str(mapped.get("payee", "") or "").strip(),
+        "external_id": str(mapped.get("external_id", "") or "").strip(),
+        "kind": "expense" if parsed_amount < 0 else "income",
+    }, []
+
+
+class _CheckpointMoved(Exception):
+    """Another request advanced the batch checkpoint while this one was committing."""
+
+
 def import_commit(request, batch_id):
     if request.method != "POST":
         return HttpResponseBadRequest("Invalid method")
@@ -413,82 +695,49 @@ def import_commit(request, batch_id):
     if batch.status == "imported":
         messages.info(request, "This import batch is already committed.")
         return redirect(reverse("fincore:import_review", args=[batch.id]))
-    if batch.status != "validated":
+    if batch.status not in {"validated", "committing"}:
         messages.error(request, "This import batch is not ready to commit.")
         return redirect(reverse("fincore:import_review", args=[batch.id]))
     if not batch.account:
         messages.error(request, "No account is assigned to this import batch.")
         return redirect(reverse("fincore:import_review", args=[batch.id]))
 
-    rows = list(batch.rows.all())
-    if not rows:
+    # A resumed commit only looks at rows past the checkpoint.
+    rows = batch.rows.filter(id__gt=batch.committed_through_row).only("id", "mapped")
+    if batch.status == "validated" and not rows.exists():
         messages.error(request, "No rows found for this import batch.")
         return redirect(reverse("fincore:import_review", args=[batch.id]))
 
-    def parse_date_value(raw_value):
-        raw_value = (raw_value or "").strip()
-        for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y"):
-            try:
-                return datetime.strptime(raw_value, fmt).date()
-            except ValueError:
-                continue
-        return None
-
+    # Validate every remaining row before the first write so a bad row never
+    # leaves the batch half committed.
     row_errors = 0
+    skipped = 0
     validated = []
-    for row in rows:
-        mapped = row.mapped or {}
-        errors = []
-        raw_date = mapped.get("date", "")
-        raw_description = mapped.get("description", "")
-
-        parsed_date = parse_date_value(str(raw_date))
-        if not parsed_date:
-            errors.append("Invalid date value.")
-
-        # Use signed_amount (new batches) or fall back to amount (old batches)
-        raw_signed = str(mapped.get("signed_amount", "") or "").strip()
-        if raw_signed:
-            try:
-                parsed_amount = Decimal(raw_signed)
-            except (InvalidOperation, ValueError):
-                errors.append("Invalid signed amount value.")
-                parsed_amount = None
-        else:
-            raw_amount = str(mapped.get("amount", "") or "").strip()
-            try:
-                parsed_amount = _parse_numeric(raw_amount)
-            except (InvalidOperation, ValueError):
-                errors.append("Invalid amount value.")
-                parsed_amount = None
-
-        description = str(raw_description).strip()
-
+    for row in rows.iterator(chunk_size=COMMIT_CHUNK_SIZE):
+        if (row.mapped or {}).get("duplicate"):
+            skipped += 1
+            continue
+        item, errors = _commit_item(row.mapped or {})
         if errors:
             row_errors += 1
             row.errors = errors
             row.save(update_fields=["errors"])
             continue
-
-        kind = "expense" if parsed_amount < 0 else "income"
-        validated.append(
-            {
-                "date": parsed_date,
-                "amount": parsed_amount,
-                "description": description,
-                "kind": kind,
-            }
-        )
+        item["row_id"] = row.id
+        validated.append(item)
 
     if row_errors:
-        batch.status = "failed"
         batch.error_message = f"{row_errors} row(s) failed commit validation."
-        batch.save(update_fields=["status", "error_message"])
+        if batch.committed_count:
+            # Earlier chunks are already written; stay in "committing" so the
+            # batch can still be rolled back cleanly.
+            batch.save(update_fields=["error_message"])
+        else:
+            batch.status = "failed"
+            batch.save(update_fields=["status", "error_message"])
         messages.error(request, batch.error_message)
         return redirect(reverse("fincore:import_review", args=[batch.id]))
 
-    from fincore.models import Transaction
-
     uncat_income = Category.objects.filter(
         name="Uncategorized Income", kind="income", is_protected=True
     ).first()
@@ -496,48 +745,144 @@ def import_commit(request, batch_id):
         name="Uncategorized Expense", kind="expense", is_protected=True
     ).first()
 
-    with db_transaction.atomic():
-        Transaction.objects.bulk_create(
-            [
-                Transaction(
-                    date=item["date"],
-                    account=batch.account,
-                    amount=item["amount"],
-                    kind=item["kind"],
-                    payee="",
-                    category=uncat_expense if item["kind"] == "expense" else uncat_income,
-                    transfer_group=None,
-                    is_imported=True,
-                    import_batch=batch,
-                    description=item["description"],
-                    source="csv",
-                )
-                for item in validated
-            ],
-            batch_size=500,
-        )
-        batch.status = "imported"
+    # Rules are compiled once per commit; unmatched rows stay uncategorized.
+    matcher = load_rule_matcher(batch.account)
+
+    if batch.status != "committing":
+        batch.status = "committing"
         batch.error_message = ""
         batch.save(update_fields=["status", "error_message"])
 
-    messages.success(request, f"Imported {len(validated)} rows successfully.")
+    # Each chunk is its own short transaction: the checkpoint moves together
+    # with the rows it covers, so an interrupted commit can resume or roll back.
+    categorized = 0
+    imported = 0
+    checkpoint = batch.committed_through_row
+    try:
+        for start in range(0, len(validated), COMMIT_CHUNK_SIZE):
+            chunk = validated[start : start + COMMIT_CHUNK_SIZE]
+            new_transactions = []
+            ruled = set()
+            for item in chunk:
+                rule = matcher.match(item["description"], item["payee"], item["amount"], batch.account_id)
+                if rule is not None:
+                    ruled.add(item["row_id"])
+                    category, kind, vendor = rule.category, rule.category.kind, rule.vendor
+                else:
+                    category = uncat_expense if item["kind"] == "expense" else uncat_income
+                    kind, vendor = item["kind"], None
+                new_transactions.append(
+                    Transaction(
+                        date=item["date"],
+                        account=batch.account,
+                        amount=item["amount"],
+                        kind=kind,
+                        payee=item["payee"],
+                        vendor=vendor,
+                        category=category,
+                        transfer_group=None,
+                        is_imported=True,
+                        import_batch=batch,
+                        description=item["description"],
+                        external_id=item["external_id"],
+                        source=batch.source,
+                    )
+                )
+            row_ids = [item["row_id"] for item in chunk]
+            next_checkpoint = chunk[-1]["row_id"]
+            with write_transaction():
+                # Another batch may have committed the same bank ids since staging.
+                # Checked under the write lock, with the account row locked on
+                # PostgreSQL, so two statements for one account cannot both insert.
+                chunk_ids = {txn.external_id for txn in new_transactions if txn.external_id}
+                if chunk_ids:
+                    Account.objects.select_for_update().filter(pk=batch.account_id).exists()
+                    committed_ids = set(
+                        Transaction.objects.filter(account=batch.account, external_id__in=chunk_ids).values_list(
+                            "external_id", flat=True
+                        )
+                    )
+                    if committed_ids:
+                        kept = [
+                            (row_id, txn)
+                            for row_id, txn in zip(row_ids, new_transactions)
+                            if txn.external_id not in committed_ids
+                        ]
+                        skipped += len(new_transactions) - len(kept)
+                        row_ids = [row_id for row_id, _ in kept]
+                        new_transactions = [txn for _, txn in kept]
+                claimed = ImportBatch.objects.filter(
+                    pk=batch.pk, status="committing", committed_through_row=checkpoint
+                ).update(
+                    committed_through_row=next_checkpoint,
+                    committed_count=F("committed_count") + len(new_transactions),
+                )
+                if not claimed:
+                    raise _CheckpointMoved()
+                bulk_insert(Transaction, new_transactions, batch_size=500)
+            imported += len(new_transactions)
+            categorized += len(ruled.intersection(row_ids))
+            checkpoint = next_checkpoint
+    except _CheckpointMoved:
+        messages.error(request, "This import batch is being committed or rolled back by another request.")
+        return redirect(reverse("fincore:import_review", args=[batch.id]))
+
+    ImportBatch.objects.filter(pk=batch.pk, status="committing").update(status="imported", error_message="")
+
+    notes = []
+    if categorized:
+        notes.append(f"{categorized} categorized by rules")
+    if skipped:
+        notes.append(f"{skipped} duplicate(s) skipped")
+    suffix = f" ({', '.join(notes)})" if notes else ""
+    messages.success(request, f"Imported {imported} rows successfully{suffix}.")
     return redirect(reverse("fincore:import_review", args=[batch.id]))
 
 
+def _delete_in_chunks(queryset, chunk_size=COMMIT_CHUNK_SIZE):
+    """Delete ``queryset`` a chunk of primary keys at a time, one short transaction each."""
+    model = queryset.model
+    while True:
+        ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            break
+        with write_transaction():
+            model.objects.filter(pk__in=ids).delete()
+
+
+def _remove_batch(batch):
+    """
+    Remove a batch, its transactions and staged rows in chunks. The batch is
+    marked "rolling_back" first so reports ignore it while its transactions
+    are being deleted, and a failed run can simply be started again.
+    """
+    if batch.status in {"imported", *ImportBatch.IN_FLIGHT_STATUSES}:
+        ImportBatch.objects.filter(pk=batch.pk).update(status="rolling_back")
+        _delete_in_chunks(Transaction.objects.filter(import_batch=batch))
+    _delete_in_chunks(ImportRow.objects.filter(batch=batch))
+    batch.delete()
+
+
+def _batch_has_payments(batch):
+    return Transaction.objects.filter(import_batch=batch).filter(
+        Q(is_invoice_matched=True) | Q(is_bill_matched=True)
+    ).exists()
+
+
 def import_rollback(request, batch_id):
     if request.method != "POST":
         return HttpResponseBadRequest("Invalid method")
 
     batch = get_object_or_404(ImportBatch, pk=batch_id)
-    if batch.status != "imported":
+    if batch.status not in {"imported", *ImportBatch.IN_FLIGHT_STATUSES}:
         messages.error(request, "Only imported batches can be rolled back.")
         return redirect(reverse("fincore:import_review", args=[batch.id]))
+    if _batch_has_payments(batch):
+        messages.error(request, "Remove invoice and bill payment matches for this batch before rolling back.")
+        return redirect(reverse("fincore:import_review", args=[batch.id]))
 
     account_id = batch.account_id
-    with db_transaction.atomic():
-        Transaction.objects.filter(import_batch=batch).delete()
-        ImportRow.objects.filter(batch=batch).delete()
-        batch.delete()
+    _remove_batch(batch)
 
     messages.success(request, "Import batch rolled back and removed.")
     if account_id:
@@ -552,21 +897,19 @@ def import_delete(request, batch_id):
     batch = get_object_or_404(ImportBatch, pk=batch_id)
     account_id = batch.account_id
 
-    if batch.status == "imported":
+    if batch.status in {"imported", *ImportBatch.IN_FLIGHT_STATUSES}:
         confirm_text = (request.POST.get("confirm_text") or "").strip().upper()
         confirm_checked = request.POST.get("confirm_checked") == "on"
         if confirm_text != "DELETE" or not confirm_checked:
             messages.error(request, "Confirmation required to delete an imported batch.")
             return redirect(reverse("fincore:import_review", args=[batch.id]))
-        with db_transaction.atomic():
-            Transaction.objects.filter(import_batch=batch).delete()
-            ImportRow.objects.filter(batch=batch).delete()
-            batch.delete()
+        if _batch_has_payments(batch):
+            messages.error(request, "Remove invoice and bill payment matches for this batch before deleting it.")
+            return redirect(reverse("fincore:import_review", args=[batch.id]))
+        _remove_batch(batch)
         messages.success(request, "Imported batch deleted with transactions removed.")
     else:
-        with db_transaction.atomic():
-            ImportRow.objects.filter(batch=batch).delete()
-            batch.delete()
+        _remove_batch(batch)
         messages.success(request, "Import batch deleted.")
 
     if account_id:
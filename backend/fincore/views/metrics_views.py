@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from fincore import metrics
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint. Set FINCORE_METRICS_TOKEN to require a bearer token."""
+    token = settings.FINCORE_METRICS_TOKEN
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not constant_time_compare(supplied, token):
+            return HttpResponseForbidden("Invalid metrics token.")
+    return HttpResponse(metrics.render_text(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,29 +1,41 @@
-from datetime import date, timedelta
+import csv
+import io
+import json
+from datetime import timedelta
 from decimal import Decimal, InvalidOperation
-from uuid import uuid4
 
+from django.contrib import messages
 from django.utils.dateparse import parse_date
-from django.db.models import Sum
 from django.core.paginator import Paginator
 from django.db import transaction as db_transaction
-from django.http import HttpResponseBadRequest
+from django.http import HttpResponseBadRequest, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 
 from fincore.models import (
     Account,
     Category,
+    DocumentSequence,
     Invoice,
     InvoiceItem,
     InvoicePayment,
     Transaction,
     Vendor,
 )
+from fincore.services.invoice_matching import (
+    allocate_invoice_payments,
+    allocate_lump_sum,
+    apply_invoice_matches,
+    parse_allocation_rows,
+    parse_match_keys,
+    propose_invoice_matches,
+)
+from fincore.services.line_items import MAX_LINE_ITEMS, parse_item_id, sync_line_items
 from fincore.views.utils import selectable_accounts
 from .transaction_views import REPORT_RANGE_OPTIONS, _resolve_report_range
 
 
-def _generate_invoice_number():
-    return f"INV{date.today():%Y%m%d}-{uuid4().hex[:6].upper()}"
+INVOICE_ITEM_FIELDS = ["category_id", "description", "amount", "tax_exempt", "tax", "total"]
 
 
 def sales_transactions_list(request):
@@ -172,7 +184,7 @@ def sales_invoice_create(request):
             item_count = int(item_count_raw)
         except (TypeError, ValueError):
             item_count = 1
-        item_count = max(1, min(item_count, 50))
+        item_count = max(1, min(item_count, MAX_LINE_ITEMS))
         item_rows = [
             {
                 "category_id": "",
@@ -233,6 +245,7 @@ def sales_invoice_create(request):
                     "category_id": int(category_field),
                     "description": description,
                     "amount": amount,
+                    "tax_exempt": tax_exempt,
                     "tax": tax_value,
                     "total": total,
                 }
@@ -244,12 +257,9 @@ def sales_invoice_create(request):
         if not errors:
             customer = get_object_or_404(Vendor, pk=int(customer_id), kind="payer")
             account = get_object_or_404(Account, pk=int(account_id))
-            invoice_number = _generate_invoice_number()
-            while Invoice.objects.filter(number=invoice_number).exists():
-                invoice_number = _generate_invoice_number()
             with db_transaction.atomic():
                 invoice = Invoice.objects.create(
-                    number=invoice_number,
+                    number=DocumentSequence.allocate("invoice")[0],
                     customer=customer,
                     account=account,
                     date=invoice_date,
@@ -262,16 +272,7 @@ def sales_invoice_create(request):
                     total=subtotal + tax_total,
                     notes=notes,
                 )
-                for item in items:
-                    InvoiceItem.objects.create(
-                        invoice=invoice,
-                        category_id=item["category_id"],
-                        description=item["description"],
-                        amount=item["amount"],
-                        tax_exempt=item["tax_exempt"],
-                        tax=item["tax"],
-                        total=item["total"],
-                    )
+                InvoiceItem.objects.bulk_create(InvoiceItem(invoice=invoice, **item) for item in items)
             return redirect("fincore:sales_transactions_list")
 
     return render(
@@ -307,8 +308,10 @@ def sales_invoice_edit(request, invoice_id):
     tax_rate_locked = invoice.status in {"paid", "partially_paid"}
     errors = []
 
+    existing_items = list(invoice.items.all())
     item_rows = [
         {
+            "id": item.id,
             "category_id": str(item.category_id),
             "description": item.description,
             "amount": str(item.amount),
@@ -316,7 +319,7 @@ def sales_invoice_edit(request, invoice_id):
             "total": str(item.total),
             "tax_exempt": item.tax_exempt,
         }
-        for item in invoice.items.all()
+        for item in existing_items
     ]
     if not item_rows:
         item_rows = [
@@ -366,7 +369,7 @@ def sales_invoice_edit(request, invoice_id):
             item_count = int(item_count_raw)
         except (TypeError, ValueError):
             item_count = 1
-        item_count = max(1, min(item_count, 50))
+        item_count = max(1, min(item_count, MAX_LINE_ITEMS))
         item_rows = [
             {
                 "category_id": "",
@@ -387,7 +390,9 @@ def sales_invoice_edit(request, invoice_id):
             description = (request.POST.get(f"item_description_{idx}") or "").strip()
             amount_raw = (request.POST.get(f"item_amount_{idx}") or "").strip()
             tax_exempt = (request.POST.get(f"item_tax_exempt_{idx}") or "").strip() == "1"
+            item_id = parse_item_id(request.POST.get(f"item_id_{idx}"))
             item_rows[idx - 1] = {
+                "id": item_id,
                 "category_id": category_field,
                 "description": description,
                 "amount": amount_raw,
@@ -424,6 +429,7 @@ def sales_invoice_edit(request, invoice_id):
             tax_total += tax_value
             items.append(
                 {
+                    "id": item_id,
                     "category_id": int(category_field),
                     "description": description,
                     "amount": amount,
@@ -451,17 +457,7 @@ def sales_invoice_edit(request, invoice_id):
                 invoice.total = subtotal + tax_total
                 invoice.notes = notes
                 invoice.save()
-                invoice.items.all().delete()
-                for item in items:
-                    InvoiceItem.objects.create(
-                        invoice=invoice,
-                        category_id=item["category_id"],
-                        description=item["description"],
-                        amount=item["amount"],
-                        tax_exempt=item["tax_exempt"],
-                        tax=item["tax"],
-                        total=item["total"],
-                    )
+                sync_line_items(InvoiceItem, "invoice", invoice, items, INVOICE_ITEM_FIELDS, existing=existing_items)
             return redirect("fincore:sales_transactions_list")
 
     return render(
@@ -493,7 +489,7 @@ def _build_invoice_match_context(invoice):
         .filter(date__gte=match_start, date__lte=match_end)
         .filter(account=invoice.account)
         .filter(amount__gt=0)
-        .exclude(invoice_payments__isnull=False)
+        .filter(is_invoice_matched=False)
     )
 
     # Best matches: transactions that can cover full remaining balance
@@ -559,74 +555,123 @@ def sales_invoice_match_apply(request):
     if not matches:
         return HttpResponseBadRequest("No matches selected.")
 
-    # Validate all matches before applying
-    total_matched = Decimal("0.00")
-    validated_matches = []
-    
-    for match in matches:
-        txn = get_object_or_404(Transaction, pk=match["transaction_id"])
-        amount = match["amount"]
-        
-        if txn.amount <= 0:
-            return HttpResponseBadRequest(f"Transaction {txn.id} must be positive.")
-        if txn.account_id != invoice.account_id:
-            return HttpResponseBadRequest(f"Transaction {txn.id} account mismatch.")
-        
-        # Check transaction available balance
-        already_matched = (
-            InvoicePayment.objects.filter(transaction=txn)
-            .aggregate(total=Sum("amount"))["total"]
-            or Decimal("0.00")
-        )
-        if amount + already_matched > txn.amount:
-            return HttpResponseBadRequest(
-                f"Transaction {txn.id}: amount {amount} exceeds available {txn.amount - already_matched}."
-            )
-        
-        total_matched += amount
-        validated_matches.append({"transaction": txn, "amount": amount})
-    
-    # Check invoice remaining balance
-    remaining = invoice.remaining_balance
-    if total_matched > remaining:
-        return HttpResponseBadRequest(
-            f"Total matched {total_matched} exceeds invoice remaining {remaining}."
-        )
+    _, errors = allocate_invoice_payments(
+        [(invoice.id, match["transaction_id"], match["amount"]) for match in matches]
+    )
+    if errors:
+        message = errors[0].split(": ", 1)[-1]
+        return HttpResponseBadRequest(message[:1].upper() + message[1:])
+    invoice.refresh_from_db()
+
+    return render(
+        request,
+        "fincore/sales/transactions/match_list.html",
+        _build_invoice_match_context(invoice),
+    )
 
-    # Get the primary category from the invoice (first item's category)
-    first_item = invoice.items.select_related("category").first()
-    invoice_category = first_item.category if first_item else None
 
-    # Apply all matches atomically
-    with db_transaction.atomic():
-        for match in validated_matches:
-            txn = match["transaction"]
-            InvoicePayment.objects.create(
-                invoice=invoice,
-                transaction=txn,
-                amount=match["amount"],
-            )
-            # Set transaction category and vendor from invoice
-            update_fields = []
-            if invoice_category and txn.category_id != invoice_category.id:
-                txn.category = invoice_category
-                txn.kind = invoice_category.kind
-                update_fields += ["category", "kind"]
-            if invoice.customer_id and txn.vendor_id != invoice.customer_id:
-                txn.vendor = invoice.customer
-                update_fields.append("vendor")
-            if update_fields:
-                txn.save(update_fields=update_fields)
-        invoice.update_status_from_payments()
-        invoice.save()
+def sales_invoice_lump_sum(request):
+    if request.method != "POST":
+        return HttpResponseBadRequest("Invalid method")
+    invoice_id = (request.POST.get("invoice_id") or "").strip()
+    txn_id = (request.POST.get("transaction_id") or "").strip()
+    order = (request.POST.get("order") or "date").strip()
+    if not invoice_id.isdigit() or not txn_id.isdigit():
+        return HttpResponseBadRequest("Invalid selection")
 
+    invoice = get_object_or_404(Invoice, pk=int(invoice_id))
+    created, allocated, errors = allocate_lump_sum(int(txn_id), invoice.customer_id, order=order)
+    if errors:
+        return HttpResponseBadRequest(errors[0])
+    invoice.refresh_from_db()
     return render(
         request,
         "fincore/sales/transactions/match_list.html",
-        _build_invoice_match_context(invoice),
+        {
+            **_build_invoice_match_context(invoice),
+            "lump_sum_result": {"created": created, "allocated": allocated},
+        },
+    )
+
+
+def sales_invoice_auto_match(request):
+    accounts = list(selectable_accounts())
+    account_id = (request.GET.get("account_id") or request.POST.get("account_id") or "").strip()
+    account = next((acct for acct in accounts if str(acct.id) == account_id), None)
+
+    if request.method == "POST":
+        pairs = parse_match_keys(request.POST.getlist("accept"))
+        if not pairs:
+            messages.error(request, "No matches selected.")
+        else:
+            applied, skipped = apply_invoice_matches(pairs)
+            note = f" {skipped} skipped because the invoice or deposit changed." if skipped else ""
+            messages.success(request, f"Matched {applied} invoice(s).{note}")
+        url = reverse("fincore:sales_invoice_auto_match")
+        return redirect(f"{url}?account_id={account.id}" if account else url)
+
+    proposals = propose_invoice_matches(account)
+    return render(
+        request,
+        "fincore/sales/transactions/auto_match.html",
+        {
+            "proposals": proposals,
+            "accounts": accounts,
+            "account_id": account.id if account else None,
+            "matched_total": sum((proposal.amount for proposal in proposals), Decimal("0.00")),
+        },
     )
 
 
+ALLOCATION_UPLOAD_LIMIT = 5000
+
+
+def _allocation_rows(request):
+    """Rows from a JSON body, an uploaded CSV file or pasted CSV text."""
+    if request.content_type == "application/json":
+        payload = json.loads(request.body or b"{}")
+        rows = payload.get("allocations") if isinstance(payload, dict) else payload
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("Expected a list of allocation objects.")
+        return rows
+    upload = request.FILES.get("allocations_file")
+    if upload is not None:
+        text = upload.read().decode("utf-8-sig")
+    else:
+        text = request.POST.get("allocations_text") or ""
+    return list(csv.DictReader(io.StringIO(text.strip())))
+
+
+def sales_invoice_allocate(request):
+    context = {"errors": [], "applied": None, "limit": ALLOCATION_UPLOAD_LIMIT}
+    if request.method != "POST":
+        return render(request, "fincore/sales/transactions/allocate.html", context)
+
+    wants_json = request.content_type == "application/json"
+    try:
+        rows = _allocation_rows(request)
+    except (ValueError, UnicodeDecodeError, csv.Error) as exc:
+        rows = []
+        errors = [f"Could not read allocations: {exc}"]
+    else:
+        errors = []
+        if not rows:
+            errors.append("No allocations provided.")
+        elif len(rows) > ALLOCATION_UPLOAD_LIMIT:
+            errors.append(f"At most {ALLOCATION_UPLOAD_LIMIT} allocations per request.")
+
+    applied = 0
+    if not errors:
+        allocations, errors = parse_allocation_rows(rows)
+        if not errors:
+            applied, errors = allocate_invoice_payments(allocations)
+
+    if wants_json:
+        return JsonResponse({"applied": applied, "errors": errors}, status=400 if errors else 200)
+    context.update({"errors": errors, "applied": None if errors else applied})
+    return render(request, "fincore/sales/transactions/allocate.html", context, status=400 if errors else 200)
+
+
 def sales_invoice_payment_delete(request, payment_id):
     if request.method != "POST":
         return HttpResponseBadRequest("Invalid method")
@@ -652,8 +697,9 @@ def sales_invoice_payment_delete(request, payment_id):
             if txn.vendor_id is not None:
                 txn.vendor = None
                 update_fields.append("vendor")
-            if update_fields:
-                txn.save(update_fields=update_fields)
+            txn.is_invoice_matched = False
+            update_fields.append("is_invoice_matched")
+            txn.save(update_fields=update_fields)
         invoice.update_status_from_payments()
         invoice.save()
     return redirect("fincore:sales_invoice_detail", invoice_id=invoice.id)
@@ -0,0 +1,78 @@
+from django.http import HttpResponse
+from django.shortcuts import render
+
+from fincore.db.reports import report_view
+from fincore.services.sales_tax import BASES, GROUPS, PERIODS, period_label, sales_tax_summary
+from .transaction_views import REPORT_RANGE_OPTIONS, _build_simple_xlsx, _resolve_report_range
+
+
+def _choice(request, name, options):
+    value = (request.GET.get(name) or "").strip()
+    return value if value in dict(options) else options[0][0]
+
+
+def _sales_tax_context(request):
+    date_range, start_date, end_date = _resolve_report_range(
+        request.GET.get("date_range"), request.GET.get("date_from"), request.GET.get("date_to")
+    )
+    basis = _choice(request, "basis", BASES)
+    period = _choice(request, "period", PERIODS)
+    group_by = _choice(request, "group_by", GROUPS)
+    rows, totals = sales_tax_summary(start_date, end_date, basis=basis, period=period, group_by=group_by)
+    for row in rows:
+        row["period_label"] = period_label(row["period"], period)
+    return {
+        "rows": rows,
+        "totals": totals,
+        "filters": {
+            "date_range": date_range,
+            "date_from": request.GET.get("date_from") or "",
+            "date_to": request.GET.get("date_to") or "",
+            "basis": basis,
+            "period": period,
+            "group_by": group_by,
+        },
+        "start_date": start_date,
+        "end_date": end_date,
+        "report_ranges": REPORT_RANGE_OPTIONS,
+        "bases": BASES,
+        "periods": PERIODS,
+        "groups": GROUPS,
+        "query_string": request.GET.urlencode(),
+    }
+
+
+@report_view
+def sales_tax_report(request):
+    return render(request, "fincore/reports/sales_tax.html", _sales_tax_context(request))
+
+
+@report_view
+def sales_tax_export_xlsx(request):
+    context = _sales_tax_context(request)
+    filters = context["filters"]
+    by_customer = filters["group_by"] == "customer"
+    sheet = [
+        ["Period", "Customer" if by_customer else "Tax rate %", "Invoices", "Taxable", "Exempt", "Tax"],
+    ]
+    for row in context["rows"]:
+        sheet.append(
+            [
+                row["period_label"],
+                row["customer"] if by_customer else float(row["rate"]),
+                row["invoices"],
+                float(row["taxable"]),
+                float(row["exempt"]),
+                float(row["tax"]),
+            ]
+        )
+    totals = context["totals"]
+    sheet.append(["Total", "", "", float(totals["taxable"]), float(totals["exempt"]), float(totals["tax"])])
+
+    content = _build_simple_xlsx(sheet, sheet_name="Sales Tax")
+    response = HttpResponse(
+        content,
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+    response["Content-Disposition"] = f'attachment; filename="sales-tax-{filters["basis"]}.xlsx"'
+    return response
@@ -29,6 +29,8 @@ from fincore.models import (
     TransferGroup,
     Vendor,
 )
+from fincore.db.postgres import monthly_category_totals
+from fincore.db.reports import report_view
 from fincore.views.utils import selectable_accounts
 
 
@@ -346,11 +348,23 @@ def _build_time_columns(display_by, start_date, end_date):
     return columns
 
 
+def _search_q(term):
+    """
+    Match ``term`` in the description, payee or account name. Accounts are
+    looked up first so every branch filters the transaction table itself; on
+    PostgreSQL the branches then combine the trigram and account indexes
+    instead of scanning the ledger.
+    """
+    account_ids = list(Account.objects.filter(name__icontains=term).values_list("id", flat=True))
+    return Q(description__icontains=term) | Q(payee__icontains=term) | Q(account_id__in=account_ids)
+
+
 def _build_dimension_columns(values):
     labels = sorted({value or "Unassigned" for value in values})
     return [{"key": label, "label": label} for label in labels]
 
 
+@report_view
 def category_report(request, pk):
     category = get_object_or_404(Category, pk=pk)
     if category.kind == "transfer":
@@ -390,14 +404,15 @@ def category_report(request, pk):
     )
 
     txn_qs = (
-        Transaction.objects.select_related("account", "vendor")
+        Transaction.objects.reportable()
+        .select_related("account", "vendor")
         .filter(category=category)
         .order_by("-date", "-id")
     )
     if category.kind == "income":
-        txn_qs = txn_qs.filter(invoice_payments__isnull=True)
+        txn_qs = txn_qs.filter(is_invoice_matched=False)
     if category.kind in {"expense", "payroll"}:
-        txn_qs = txn_qs.filter(bill_payments__isnull=True)
+        txn_qs = txn_qs.filter(is_bill_matched=False)
 
     if start_date:
         txn_qs = txn_qs.filter(date__gte=start_date)
@@ -567,6 +582,12 @@ def _profit_loss_context(request):
     columns = []
     if display_by in {"days", "weeks", "months", "quarters", "years"}:
         columns = _build_time_columns(display_by, start_date, end_date)
+    # Monthly transaction totals come from the PostgreSQL materialized view when it is current.
+    view_filters = {
+        "account_id": int(account_id) if account_id else None,
+        "vendor_id": int(vendor_id) if vendor_id else None,
+        "category_id": int(category_id) if category_id else None,
+    }
 
     def build_rows(data_rows, column_list):
         rows = []
@@ -623,9 +644,9 @@ def _profit_loss_context(request):
 
         # ── Transaction-based income (imports, manual) ──
         income_txn_qs = (
-            Transaction.objects.select_related("category", "account", "vendor")
-            .filter(category__isnull=False, kind="income")
-            .exclude(invoice_payments__isnull=False)
+            Transaction.objects.reportable()
+            .select_related("category", "account", "vendor")
+            .filter(category__isnull=False, kind="income", is_invoice_matched=False)
         )
         if account_id:
             income_txn_qs = income_txn_qs.filter(account_id=int(account_id))
@@ -669,11 +690,15 @@ def _profit_loss_context(request):
                 data_rows[category_id_key]["values"][period_key] = row["total"] or Decimal("0.00")
 
             # Income transactions
-            txn_grouped = (
-                income_txn_qs.annotate(period=trunc_map_txn[display_by])
-                .values("category_id", "category__name", "period")
-                .annotate(total=Sum("amount"))
-            )
+            txn_grouped = None
+            if display_by == "months":
+                txn_grouped = monthly_category_totals(["income"], start_date, end_date, **view_filters)
+            if txn_grouped is None:
+                txn_grouped = (
+                    income_txn_qs.annotate(period=trunc_map_txn[display_by])
+                    .values("category_id", "category__name", "period")
+                    .annotate(total=Sum("amount"))
+                )
             for row in txn_grouped:
                 category_id_key = row["category_id"]
                 period_key = row["period"].date() if hasattr(row["period"], "date") else row["period"]
@@ -722,9 +747,9 @@ def _profit_loss_context(request):
     if kind in {"all", "cogs", "expense", "payroll"}:
         txn_kinds = ["cogs", "expense", "payroll"] if kind == "all" else [kind]
         txn_qs = (
-            Transaction.objects.select_related("category", "account", "vendor")
-            .filter(category__isnull=False, kind__in=txn_kinds)
-            .exclude(invoice_payments__isnull=False)
+            Transaction.objects.reportable()
+            .select_related("category", "account", "vendor")
+            .filter(category__isnull=False, kind__in=txn_kinds, is_invoice_matched=False)
         )
         if account_id:
             txn_qs = txn_qs.filter(account_id=int(account_id))
@@ -745,11 +770,15 @@ def _profit_loss_context(request):
                 "quarters": TruncQuarter("date"),
                 "years": TruncYear("date"),
             }
-            grouped = (
-                txn_qs.annotate(period=trunc_map[display_by])
-                .values("category_id", "category__name", "category__kind", "period")
-                .annotate(total=Sum("amount"))
-            )
+            grouped = None
+            if display_by == "months":
+                grouped = monthly_category_totals(txn_kinds, start_date, end_date, **view_filters)
+            if grouped is None:
+                grouped = (
+                    txn_qs.annotate(period=trunc_map[display_by])
+                    .values("category_id", "category__name", "category__kind", "period")
+                    .annotate(total=Sum("amount"))
+                )
             data_rows = {"cogs": {}, "payroll": {}, "expense": {}}
             for row in grouped:
                 kind_key = row["category__kind"]
@@ -1008,8 +1037,10 @@ def _balance_sheet_context(request):
     )
 
     account_id_int = int(account_id) if account_id.isdigit() else None
+    all_accounts = list(Account.objects.filter(is_active=True).order_by("name"))
     balances = (
-        Transaction.objects.filter(date__lte=as_of_date)
+        Transaction.objects.reportable()
+        .filter(date__lte=as_of_date)
         .values("account_id")
         .annotate(total=Sum("amount"))
     )
@@ -1043,7 +1074,7 @@ def _balance_sheet_context(request):
     assets_total = sum((a.balance for a in leaf_accounts), Decimal("0.00"))
 
     def _category_totals(kind_value):
-        qs = Transaction.objects.select_related("category").filter(
+        qs = Transaction.objects.reportable().select_related("category").filter(
             category__kind=kind_value, date__lte=as_of_date
         )
         if account_id:
@@ -1111,7 +1142,8 @@ def _cashflow_context(request):
     categories = list(Category.objects.filter(is_active=True).order_by("name"))
 
     base_qs = (
-        Transaction.objects.select_related("category", "account", "vendor")
+        Transaction.objects.reportable()
+        .select_related("category", "account", "vendor")
         .filter(date__gte=start_date, date__lte=end_date)
         .exclude(kind__in=["transfer", "opening"])
     )
@@ -1267,26 +1299,31 @@ def _cashflow_context(request):
     }
 
 
+@report_view
 def profit_loss_report(request):
     context = _profit_loss_context(request)
     return render(request, "fincore/reports/profit_loss.html", context)
 
 
+@report_view
 def balance_sheet_report(request):
     context = _balance_sheet_context(request)
     return render(request, "fincore/reports/balance_sheet.html", context)
 
 
+@report_view
 def balance_sheet_content(request):
     context = _balance_sheet_context(request)
     return render(request, "fincore/reports/balance_sheet_content.html", context)
 
 
+@report_view
 def cashflow_report(request):
     context = _cashflow_context(request)
     return render(request, "fincore/reports/cashflow.html", context)
 
 
+@report_view
 def cashflow_content(request):
     context = _cashflow_context(request)
     return render(request, "fincore/reports/cashflow_content.html", context)
@@ -1379,6 +1416,7 @@ def _build_simple_xlsx(rows, sheet_name="Profit & Loss"):
     return buffer.read()
 
 
+@report_view
 def profit_loss_export_xlsx(request):
     context = _profit_loss_context(request)
     columns = context["columns"]
@@ -1462,6 +1500,7 @@ def profit_loss_export_xlsx(request):
     return response
 
 
+@report_view
 def profit_loss_content(request):
     """
     HTMX endpoint that returns just the P&L table content (for filter updates).
@@ -1660,11 +1699,7 @@ def transaction_table(request):
         search_terms = [term for term in search.split() if term]
         if search_terms:
             for term in search_terms:
-                qs = qs.filter(
-                    Q(description__icontains=term)
-                    | Q(payee__icontains=term)
-                    | Q(account__name__icontains=term)
-                )
+                qs = qs.filter(_search_q(term))
 
     sort_map = {
         "date": "date",
@@ -1728,11 +1763,7 @@ def transaction_table(request):
         search_terms = [term for term in search.split() if term]
         if search_terms:
             for term in search_terms:
-                options_qs = options_qs.filter(
-                    Q(description__icontains=term)
-                    | Q(payee__icontains=term)
-                    | Q(account__name__icontains=term)
-                )
+                options_qs = options_qs.filter(_search_q(term))
     options_qs = apply_amount_filters(options_qs)
     
     # Payee options - exclude payee filter to show available payees
@@ -0,0 +1,150 @@
+"""
+Worker warm-up for gunicorn (see ``gunicorn.conf.py``).
+
+Without it, the first request on every new worker imports the view modules,
+compiles each template it touches and opens a database connection. Every
+deploy and every ``max_requests`` recycle then shows up as a latency spike.
+
+``preload()`` does the import and compile work. With ``preload_app`` it runs
+once in the master, and workers inherit the result copy-on-write. Otherwise
+each worker runs it before taking traffic. It:
+
+* imports every ``fincore.views`` module and populates the URL resolver;
+* compiles the project's templates into the cached template loader;
+* parses the Vite manifest.
+
+``open_connections()`` runs in each worker after fork. Django keeps one
+connection per thread, so it opens one on every request thread of the gthread
+pool. Each thread reads the reference tables the filter bars load, which warms
+the SQLite page cache and the connection's prepared state.
+"""
+
+import importlib
+import logging
+import pkgutil
+import threading
+import time
+from concurrent.futures import wait
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+THREAD_WARMUP_TIMEOUT = 10
+
+
+def import_views():
+    import fincore.views
+
+    modules = [
+        importlib.import_module(module.name)
+        for module in pkgutil.iter_modules(fincore.views.__path__, prefix="fincore.views.")
+    ]
+    get_resolver()._populate()
+    return len(modules)
+
+
+def project_template_dirs(backend):
+    base = Path(settings.BASE_DIR).resolve()
+    for directory in backend.template_dirs:
+        directory = Path(directory).resolve()
+        if directory.is_dir() and directory.is_relative_to(base) and "site-packages" not in directory.parts:
+            yield directory
+
+
+def compile_templates():
+    """Compile every project template into the cached loader; returns ``(compiled, failed names)``."""
+    backend = engines["django"]
+    compiled, failed = 0, []
+    for directory in project_template_dirs(backend):
+        for path in sorted(directory.rglob("*.html")):
+            name = path.relative_to(directory).as_posix()
+            try:
+                backend.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError):
+                failed.append(name)
+            else:
+                compiled += 1
+    return compiled, failed
+
+
+def preload():
+    """Import and compile everything a first request would; returns a summary dict."""
+    from fincore.templatetags.vite import load_manifest
+
+    started = time.monotonic()
+    views = import_views()
+    templates, failed = compile_templates()
+    manifest = load_manifest()
+    # Nothing above should touch the database, but a forked worker must never
+    # inherit an open connection from the master.
+    connections.close_all()
+    if failed:
+        logger.warning("Templates that failed to precompile: %s", ", ".join(failed))
+    return {
+        "seconds": time.monotonic() - started,
+        "view_modules": views,
+        "templates": templates,
+        "template_failures": len(failed),
+        "manifest_entries": len(manifest),
+    }
+
+
+def _connection_aliases():
+    from fincore.db.reports import usable_snapshot_alias
+
+    aliases = [DEFAULT_DB_ALIAS]
+    snapshot = usable_snapshot_alias()
+    if snapshot:
+        aliases.append(snapshot)
+    return aliases
+
+
+def connect_thread(aliases):
+    """Open this thread's connections and read the reference tables through them."""
+    from fincore.models import Account, Category, Vendor
+
+    for alias in aliases:
+        connections[alias].ensure_connection()
+    list(Account.objects.using(DEFAULT_DB_ALIAS).values_list("id", "name", "parent_id"))
+    list(Category.objects.using(DEFAULT_DB_ALIAS).values_list("id", "name", "kind", "parent_id"))
+    Vendor.objects.using(DEFAULT_DB_ALIAS).exists()
+
+
+def open_connections(executor=None, threads=1):
+    """
+    Open database connections for ``threads`` request threads of ``executor``
+    (gunicorn's gthread pool), or for the calling thread when there is no pool.
+    Returns how many threads were warmed. A barrier holds every task until all
+    have started, so the pool has to start ``threads`` distinct threads.
+    """
+    aliases = _connection_aliases()
+    if executor is None or threads <= 1:
+        try:
+            connect_thread(aliases)
+        except DatabaseError:
+            logger.warning("Could not warm database connections", exc_info=True)
+            return 0
+        return 1
+
+    barrier = threading.Barrier(threads, timeout=THREAD_WARMUP_TIMEOUT)
+
+    def task():
+        try:
+            connect_thread(aliases)
+        finally:
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+
+    futures = [executor.submit(task) for _ in range(threads)]
+    done, _pending = wait(futures, timeout=THREAD_WARMUP_TIMEOUT * 2)
+    failures = [future.exception() for future in done if future.exception() is not None]
+    if failures:
+        logger.warning("Could not warm %s database connections: %s", len(failures), failures[0])
+    return len(done) - len(failures)
@@ -1,5 +1,8 @@
 import multiprocessing
 import os
+import time
+
+_started_at = time.monotonic()
 
 bind = "0.0.0.0:8000"
 workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
@@ -8,3 +11,45 @@ errorlog = "-"
 worker_class = "gthread"
 threads = int(os.environ.get("GUNICORN_THREADS", 4))
 timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+# Load Django, the views and the templates once in the master (fincore.warmup);
+# workers fork from it already warm. Set GUNICORN_PRELOAD=0 to use --reload.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") not in {"0", "false", "False", ""}
+# Recycle workers after this many requests (0 = never); the jitter staggers restarts.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 0))
+
+
+def _describe(report):
+    return (
+        f"{report['view_modules']} view modules, {report['templates']} templates"
+        f" ({report['template_failures']} failed), {report['manifest_entries']} manifest entries"
+        f" in {report['seconds']:.2f}s"
+    )
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before any worker forks.
+    if server.cfg.preload_app:
+        from fincore.warmup import preload
+
+        server.log.info("Preloaded %s", _describe(preload()))
+    server.log.info("Master ready in %.2fs", time.monotonic() - _started_at)
+
+
+def post_fork(server, worker):
+    worker.fincore_forked_at = time.monotonic()
+
+
+def post_worker_init(worker):
+    from fincore import warmup
+
+    if not worker.cfg.preload_app:
+        worker.log.info("Worker %s preloaded %s", worker.pid, _describe(warmup.preload()))
+    connected = warmup.open_connections(getattr(worker, "tpool", None), worker.cfg.threads)
+    worker.log.info(
+        "Worker %s ready in %.2fs after fork, %s/%s threads connected",
+        worker.pid,
+        time.monotonic() - worker.fincore_forked_at,
+        connected,
+        worker.cfg.threads,
+    )